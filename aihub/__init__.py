@@ -0,0 +1,3 @@
+# Shared inventory, deployment and APIM tooling for the AI Hub Gateway
+# landing zone. Submodules are imported on demand; importing the package
+# resolves no CLI, credential or backend.
@@ -0,0 +1,142 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import arm_client
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+MGMT_API_VERSION = "2022-08-01"
+ALL_ACCESS_SUBSCRIPTION = "built-in all-access subscription"
+
+GATEWAY_POOL_SIZE = 16
+
+# Management requests a crawl keeps in flight at once
+APIM_MAX_IN_FLIGHT = int(os.environ.get("APIM_MAX_IN_FLIGHT", "8"))
+
+
+# -------------------------------------------------
+# Management plane
+# -------------------------------------------------
+
+class ApimClient:
+    # Management calls for one APIM service. All instances share the ARM
+    # client's keep-alive pool and cached token, so checking several
+    # landing zones in one run pays for TLS and auth only once.
+    def __init__(
+        self,
+        subscription_id: str,
+        resource_group: str,
+        service_name: str,
+        api_version: str = MGMT_API_VERSION,
+        arm: arm_client.ArmClient | None = None
+    ):
+        self.arm = arm or arm_client.get_client()
+        self.api_version = api_version
+        self.base_path = (
+            f"/subscriptions/{subscription_id}"
+            f"/resourceGroups/{resource_group}"
+            f"/providers/Microsoft.ApiManagement"
+            f"/service/{service_name}"
+        )
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        return self.arm.send(
+            method,
+            f"{self.base_path}{path}",
+            params={"api-version": self.api_version},
+            **kwargs
+        )
+
+    def get(self, path: str) -> Any:
+        # None for 404; policies may come back as XML text
+        r = self.request("GET", path)
+
+        if r.status_code == 404:
+            return None
+
+        r.raise_for_status()
+
+        if "application/json" in r.headers.get("Content-Type", ""):
+            return r.json()
+        return r.text
+
+    def get_many(self, paths: List[str], max_in_flight: int = APIM_MAX_IN_FLIGHT) -> List[Any]:
+        # Results come back in input order; throttling is handled (and
+        # shared across threads) by the ARM client
+        if max_in_flight <= 1:
+            return [self.get(p) for p in paths]
+
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            return list(pool.map(self.get, paths))
+
+    def post(self, path: str, **kwargs) -> Any:
+        r = self.request("POST", path, **kwargs)
+        r.raise_for_status()
+        return r.json() if r.content else None
+
+    def list(self, path: str) -> List[Dict]:
+        page = self.get(path) or {}
+        items = list(page.get("value", []))
+
+        while page.get("nextLink"):
+            r = self.arm.send("GET", page["nextLink"])
+            r.raise_for_status()
+            page = r.json()
+            items.extend(page.get("value", []))
+
+        return items
+
+    def get_subscription_key(self) -> str:
+        subscriptions = self.list("/subscriptions")
+
+        subscription_id = None
+
+        # Prefer Built-in all-access
+        for sub in subscriptions:
+            name = sub.get("properties", {}).get("displayName")
+            if name and name.lower() == ALL_ACCESS_SUBSCRIPTION:
+                subscription_id = sub["name"]
+                break
+
+        # Fallback: any active
+        if not subscription_id:
+            for sub in subscriptions:
+                if sub.get("properties", {}).get("state") == "active":
+                    subscription_id = sub["name"]
+                    break
+
+        if not subscription_id:
+            raise RuntimeError("No active APIM subscription found")
+
+        return self.post(f"/subscriptions/{subscription_id}/listSecrets")["primaryKey"]
+
+
+# -------------------------------------------------
+# Gateway (data plane)
+# -------------------------------------------------
+
+_gateway_session: requests.Session | None = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway_session() -> requests.Session:
+    # Keep-alive pool for calls through the APIM gateway itself
+    global _gateway_session
+    with _gateway_lock:
+        if _gateway_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=GATEWAY_POOL_SIZE,
+                pool_maxsize=GATEWAY_POOL_SIZE
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _gateway_session = session
+        return _gateway_session
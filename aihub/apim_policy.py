@@ -0,0 +1,361 @@
+import argparse
+import functools
+import json
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+POLICY_DIR = Path(__file__).resolve().parent.parent / "infra" / "modules" / "apim" / "policies"
+FRAGMENT_FILE_PATTERN = "frag-{}.xml"
+
+SECTIONS = ("inbound", "backend", "outbound", "on-error")
+
+# Policies that explicitly pick or call the backend
+ROUTING_POLICIES = {"set-backend-service", "forward-request"}
+
+# Raw-text fallback for policies that do not parse
+ROUTING_KEYWORDS = ("set-backend-service", "set-backend", "forward-request")
+
+# Containers; their children are part of the pipeline, they are not
+CONTROL_FLOW = {"choose", "when", "otherwise", "retry", "wait"}
+
+_EXPRESSION_START = re.compile(r"@[({]")
+_PLACEHOLDER = re.compile(r"__expr(\d+)__")
+
+
+# -------------------------------------------------
+# Parsing
+# -------------------------------------------------
+
+def _expression_end(text: str, start: int) -> int:
+    # start points at the opening bracket of @( or @{; returns the index
+    # just past the matching close, skipping C# string and char literals
+    close = {"(": ")", "{": "}"}
+    stack = [close[text[start]]]
+    i = start + 1
+
+    while i < len(text) and stack:
+        c = text[i]
+        if c in "\"'":
+            i += 1
+            while i < len(text) and text[i] != c:
+                i += 2 if text[i] == "\\" else 1
+        elif c in close:
+            stack.append(close[c])
+        elif c == stack[-1]:
+            stack.pop()
+        i += 1
+
+    return i
+
+
+def protect_expressions(text: str) -> Tuple[str, List[str]]:
+    # Policy files carry raw C# (quotes, &&, generics) inside attributes
+    # and element text, which is not valid XML. Each expression is swapped
+    # for a placeholder before parsing and restored in the model.
+    out: List[str] = []
+    expressions: List[str] = []
+    pos = 0
+
+    for m in _EXPRESSION_START.finditer(text):
+        if m.start() < pos:
+            continue
+        end = _expression_end(text, m.start() + 1)
+        out.append(text[pos:m.start()])
+        out.append(f"__expr{len(expressions)}__")
+        expressions.append(text[m.start():end])
+        pos = end
+
+    out.append(text[pos:])
+    return "".join(out), expressions
+
+
+class PolicyParseError(ValueError):
+    pass
+
+
+class PolicyDocument:
+    def __init__(self, root: ET.Element, expressions: List[str]):
+        self.root = root
+        self.expressions = expressions
+
+    def restore(self, value: str | None) -> str | None:
+        if value is None:
+            return None
+        return _PLACEHOLDER.sub(lambda m: self.expressions[int(m.group(1))], value)
+
+    @property
+    def is_fragment(self) -> bool:
+        return self.root.tag == "fragment"
+
+    def section(self, name: str) -> ET.Element | None:
+        return self.root.find(name)
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_policy(xml_text: str) -> PolicyDocument:
+    # Memoized on the document text: identical policies attached to many
+    # operations are parsed once
+    text, expressions = protect_expressions(xml_text)
+    try:
+        return PolicyDocument(ET.fromstring(text.strip()), expressions)
+    except ET.ParseError as e:
+        raise PolicyParseError(f"Invalid policy XML: {e}") from e
+
+
+def policy_xml(policy) -> str | None:
+    # ARM returns policies as {"properties": {"value": "<policies>..."}};
+    # raw XML text is accepted as well
+    if not policy:
+        return None
+    if isinstance(policy, dict):
+        return policy.get("properties", {}).get("value")
+    return policy
+
+
+# -------------------------------------------------
+# Fragments
+# -------------------------------------------------
+
+class FragmentStore:
+    # Resolves include-fragment ids against frag-<id>.xml in the policy
+    # folder (if any), falling back to fetch(id) (e.g. the live service)
+    def __init__(
+        self,
+        policy_dir: Path | str | None = POLICY_DIR,
+        fetch: Callable[[str], str | None] | None = None
+    ):
+        self.policy_dir = Path(policy_dir) if policy_dir else None
+        self.fetch = fetch
+        self._parsed: Dict[str, PolicyDocument | None] = {}
+
+    def get(self, fragment_id: str) -> PolicyDocument | None:
+        # A missing or unparsable fragment is reported as unresolved
+        if fragment_id not in self._parsed:
+            try:
+                self._parsed[fragment_id] = self._load(fragment_id)
+            except PolicyParseError as e:
+                print(f"Warning: Fragment {fragment_id}: {e}")
+                self._parsed[fragment_id] = None
+        return self._parsed[fragment_id]
+
+    def _load(self, fragment_id: str) -> PolicyDocument | None:
+        if self.policy_dir:
+            path = self.policy_dir / FRAGMENT_FILE_PATTERN.format(fragment_id)
+            if path.exists():
+                return parse_policy(path.read_text(encoding="utf-8"))
+
+        if self.fetch:
+            text = policy_xml(self.fetch(fragment_id))
+            if text:
+                return parse_policy(text)
+
+        return None
+
+
+# -------------------------------------------------
+# Effective pipeline
+# -------------------------------------------------
+
+class PolicyAnalyzer:
+    def __init__(self, fragments: FragmentStore | None = None):
+        self.fragments = fragments or FragmentStore()
+
+    def _steps(
+        self,
+        doc: PolicyDocument,
+        element: ET.Element,
+        source: str,
+        depth: int,
+        parent: List[Dict] | None,
+        seen: Tuple[str, ...]
+    ) -> List[Dict]:
+        steps: List[Dict] = []
+
+        for child in element:
+            if not isinstance(child.tag, str):
+                continue  # comments and processing instructions
+
+            if child.tag == "base":
+                if parent is None:
+                    # Inherited from a scope that was not provided
+                    # (product or global)
+                    steps.append({"policy": "base", "source": source, "depth": depth})
+                else:
+                    steps.extend(dict(s, depth=s["depth"] + depth) for s in parent)
+                continue
+
+            if child.tag == "include-fragment":
+                fragment_id = child.get("fragment-id")
+                fragment = self.fragments.get(fragment_id)
+                if fragment is None or fragment_id in seen:
+                    steps.append({
+                        "policy": "include-fragment",
+                        "source": source,
+                        "depth": depth,
+                        "fragment": fragment_id,
+                        "unresolved": True
+                    })
+                    continue
+                steps.extend(self._steps(
+                    fragment, fragment.root, f"fragment:{fragment_id}",
+                    depth, None, seen + (fragment_id,)
+                ))
+                continue
+
+            step = {"policy": child.tag, "source": source, "depth": depth}
+            attributes = {k: doc.restore(v) for k, v in child.attrib.items()}
+            if attributes:
+                step["attributes"] = attributes
+            steps.append(step)
+
+            if child.tag in CONTROL_FLOW:
+                steps.extend(self._steps(doc, child, source, depth + 1, None, seen))
+
+        return steps
+
+    def effective_pipeline(
+        self,
+        policy,
+        parent: Dict[str, List[Dict]] | None = None,
+        source: str = "policy"
+    ) -> Dict[str, List[Dict]]:
+        # <base/> is replaced by the parent's section (e.g. the API
+        # pipeline for an operation); without a parent it stays a marker.
+        # A missing policy inherits the parent unchanged.
+        text = policy_xml(policy)
+        if not text:
+            return {s: list((parent or {}).get(s, [])) for s in SECTIONS}
+
+        doc = parse_policy(text)
+
+        # A fragment has no sections; its root is the statement list
+        if doc.is_fragment:
+            return {"fragment": self._steps(doc, doc.root, source, 0, None, ())}
+
+        pipeline = {}
+        for name in SECTIONS:
+            section = doc.section(name)
+            parent_steps = parent.get(name, []) if parent is not None else None
+            pipeline[name] = (
+                self._steps(doc, section, source, 0, parent_steps, ())
+                if section is not None else []
+            )
+        return pipeline
+
+
+def routing_steps(pipeline: Dict[str, List[Dict]]) -> List[Dict]:
+    return [
+        step
+        for steps in pipeline.values()
+        for step in steps
+        if step["policy"] in ROUTING_POLICIES
+    ]
+
+
+def backend_ids(pipeline: Dict[str, List[Dict]]) -> List[str]:
+    ids = []
+    for step in routing_steps(pipeline):
+        backend_id = step.get("attributes", {}).get("backend-id")
+        if backend_id and backend_id not in ids:
+            ids.append(backend_id)
+    return ids
+
+
+def summarize(steps: List[Dict]) -> List[str]:
+    # Policy names in pipeline order, once each, tagged with the fragment
+    # they came from
+    labels = []
+    for step in steps:
+        if step["policy"] in CONTROL_FLOW:
+            continue
+        label = step["policy"]
+        if step.get("unresolved"):
+            label = f"include-fragment {step['fragment']} (unresolved)"
+        elif step["source"].startswith("fragment:"):
+            label = f"{label} [{step['source'][len('fragment:'):]}]"
+        if label not in labels:
+            labels.append(label)
+    return labels
+
+
+_default_analyzer: PolicyAnalyzer | None = None
+
+
+def get_analyzer() -> PolicyAnalyzer:
+    global _default_analyzer
+    if _default_analyzer is None:
+        _default_analyzer = PolicyAnalyzer()
+    return _default_analyzer
+
+
+def has_backend_routing(policy, analyzer: PolicyAnalyzer | None = None) -> bool:
+    # True when the policy itself (including its fragments, excluding
+    # anything inherited through <base/>) selects or calls a backend.
+    # Malformed XML falls back to the keyword check instead of failing.
+    analyzer = analyzer or get_analyzer()
+    try:
+        return bool(routing_steps(analyzer.effective_pipeline(policy)))
+    except PolicyParseError:
+        return has_routing_keyword(policy)
+
+
+def has_routing_keyword(policy) -> bool:
+    text = policy_xml(policy) or ""
+    return any(k in text for k in ROUTING_KEYWORDS)
+
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+
+def print_pipeline(title: str, pipeline: Dict[str, List[Dict]]):
+    print(title)
+    for name, steps in pipeline.items():
+        print(f"  {name}: {', '.join(summarize(steps)) or '-'}")
+    ids = backend_ids(pipeline)
+    if ids:
+        print(f"  backend-id: {', '.join(ids)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show the effective APIM policy pipeline with fragments resolved"
+    )
+    parser.add_argument("policies", nargs="+", help="Policy XML files")
+    parser.add_argument("--parent", help="Policy that <base/> resolves to (e.g. the API policy)")
+    parser.add_argument("--fragments", default=str(POLICY_DIR), help="Folder with frag-<id>.xml files")
+    parser.add_argument("--format", choices=["text", "json"], default="text")
+    args = parser.parse_args()
+
+    analyzer = PolicyAnalyzer(FragmentStore(args.fragments))
+    parent = None
+    if args.parent:
+        parent = analyzer.effective_pipeline(
+            Path(args.parent).read_text(encoding="utf-8"), source="parent"
+        )
+
+    results = {}
+    for path in args.policies:
+        try:
+            results[path] = analyzer.effective_pipeline(
+                Path(path).read_text(encoding="utf-8"), parent
+            )
+        except PolicyParseError as e:
+            print(f"Warning: {path}: {e}")
+
+    if args.format == "json":
+        print(json.dumps(results, indent=2))
+        return
+
+    for path, pipeline in results.items():
+        print_pipeline(path, pipeline)
+
+
+if __name__ == "__main__":
+    main()
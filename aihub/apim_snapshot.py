@@ -0,0 +1,390 @@
+import argparse
+import difflib
+import hashlib
+import json
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+from .apim_policy import (
+    POLICY_DIR, FragmentStore, PolicyAnalyzer, PolicyParseError, policy_xml, summarize
+)
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+APIM_SNAPSHOT_FILE = "apim_snapshot.json"
+SNAPSHOT_VERSION = 1
+
+
+# -------------------------------------------------
+# Content-addressed policy store
+# -------------------------------------------------
+
+def policy_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _store(blobs: Dict[str, str], policy) -> str | None:
+    # Each distinct policy body is kept once; records refer to it by hash
+    text = policy_xml(policy)
+    if not text:
+        return None
+    digest = policy_hash(text)
+    blobs.setdefault(digest, text)
+    return digest
+
+
+# -------------------------------------------------
+# Crawl
+# -------------------------------------------------
+
+def fetch_routing_details(client, apis: List[Dict], max_in_flight: int) -> List[Dict]:
+    # Fetch every API policy, operation list and operation policy with a
+    # bounded number of requests in flight instead of one at a time
+    api_ids = [api["name"] for api in apis]
+
+    api_policies = client.get_many(
+        [f"/apis/{api_id}/policies/policy" for api_id in api_ids],
+        max_in_flight
+    )
+    operations = [
+        (page or {}).get("value", [])
+        for page in client.get_many(
+            [f"/apis/{api_id}/operations" for api_id in api_ids],
+            max_in_flight
+        )
+    ]
+
+    op_paths = [
+        f"/apis/{api_id}/operations/{op['name']}/policies/policy"
+        for api_id, ops in zip(api_ids, operations)
+        for op in ops
+    ]
+    op_policies = iter(client.get_many(op_paths, max_in_flight))
+
+    return [
+        {
+            "api_policy": api_policy,
+            "operation_policies": [(op["name"], next(op_policies)) for op in ops]
+        }
+        for api_policy, ops in zip(api_policies, operations)
+    ]
+
+
+def crawl(client, max_in_flight: int, label: str | None = None) -> Dict:
+    # One live pass over the service; everything after this works offline
+    blobs: Dict[str, str] = {}
+
+    backends = {
+        b["name"]: {"url": b.get("properties", {}).get("url")}
+        for b in client.list("/backends")
+    }
+
+    fragments = {
+        f["name"]: _store(blobs, f)
+        for f in client.list("/policyFragments")
+    }
+
+    apis = client.list("/apis")
+    details = fetch_routing_details(client, apis, max_in_flight)
+
+    return {
+        "version": SNAPSHOT_VERSION,
+        "generatedAt": datetime.utcnow().isoformat() + "Z",
+        "label": label,
+        "service": client.base_path,
+        "backends": backends,
+        "fragments": fragments,
+        "apis": [
+            {
+                "name": api["name"],
+                "path": api["properties"].get("path"),
+                "serviceUrl": api["properties"].get("serviceUrl"),
+                "backendId": api["properties"].get("backendId"),
+                "policy": _store(blobs, detail["api_policy"]),
+                "operations": [
+                    {"name": op_id, "policy": _store(blobs, op_policy)}
+                    for op_id, op_policy in detail["operation_policies"]
+                ]
+            }
+            for api, detail in zip(apis, details)
+        ],
+        "policies": blobs
+    }
+
+
+def write_snapshot(snapshot: Dict, path: str = APIM_SNAPSHOT_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, indent=2)
+
+
+def load_snapshot(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(
+            f"{path}: unsupported snapshot version {snapshot.get('version')}"
+        )
+    return snapshot
+
+
+def policy_text(snapshot: Dict, digest: str | None) -> str | None:
+    return snapshot["policies"][digest] if digest else None
+
+
+def snapshot_analyzer(snapshot: Dict) -> PolicyAnalyzer:
+    # Fragments resolve against the ones deployed with the snapshot; the
+    # repo copies are only used if the crawl saw no fragments at all
+    fragments = snapshot.get("fragments", {})
+    return PolicyAnalyzer(FragmentStore(
+        None if fragments else POLICY_DIR,
+        fetch=lambda fragment_id: policy_text(snapshot, fragments.get(fragment_id))
+    ))
+
+
+# -------------------------------------------------
+# Diff
+# -------------------------------------------------
+
+def _by_name(items: List[Dict]) -> Dict[str, Dict]:
+    return {item["name"]: item for item in items}
+
+
+def _keyed_changes(old: Dict, new: Dict) -> Dict[str, List[str]]:
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "removed": sorted(old.keys() - new.keys()),
+        "changed": sorted(k for k in old.keys() & new.keys() if old[k] != new[k])
+    }
+
+
+def _pipeline_summary(analyzer: PolicyAnalyzer, text: str | None) -> Dict:
+    try:
+        pipeline = analyzer.effective_pipeline(text)
+    except PolicyParseError as e:
+        return {"error": str(e)}
+    return {name: summarize(steps) for name, steps in pipeline.items()}
+
+
+def _policy_change(
+    old: Dict, new: Dict,
+    old_digest: str | None, new_digest: str | None,
+    old_analyzer: PolicyAnalyzer, new_analyzer: PolicyAnalyzer
+) -> Dict | None:
+    # Equal hashes mean equal bodies: nothing is parsed for the common case
+    if old_digest == new_digest:
+        return None
+
+    old_text = policy_text(old, old_digest)
+    new_text = policy_text(new, new_digest)
+    before = _pipeline_summary(old_analyzer, old_text)
+    after = _pipeline_summary(new_analyzer, new_text)
+
+    return {
+        "from": old_digest,
+        "to": new_digest,
+        "sections": {
+            name: {"from": before.get(name), "to": after.get(name)}
+            for name in dict.fromkeys(list(before) + list(after))
+            if before.get(name) != after.get(name)
+        },
+        "text": list(difflib.unified_diff(
+            (old_text or "").splitlines(),
+            (new_text or "").splitlines(),
+            "old", "new", lineterm=""
+        ))
+    }
+
+
+def diff_snapshots(old: Dict, new: Dict) -> Dict:
+    old_analyzer = snapshot_analyzer(old)
+    new_analyzer = snapshot_analyzer(new)
+
+    def policy_change(old_digest, new_digest):
+        return _policy_change(old, new, old_digest, new_digest, old_analyzer, new_analyzer)
+
+    diff = {
+        "backends": _keyed_changes(old["backends"], new["backends"]),
+        "fragments": {},
+        "apis": {}
+    }
+
+    old_fragments = old.get("fragments", {})
+    new_fragments = new.get("fragments", {})
+    for fragment_id in sorted(old_fragments.keys() | new_fragments.keys()):
+        change = policy_change(old_fragments.get(fragment_id), new_fragments.get(fragment_id))
+        if change:
+            diff["fragments"][fragment_id] = change
+
+    old_apis = _by_name(old["apis"])
+    new_apis = _by_name(new["apis"])
+
+    for name in sorted(old_apis.keys() | new_apis.keys()):
+        a = old_apis.get(name)
+        b = new_apis.get(name)
+
+        if a is None or b is None:
+            diff["apis"][name] = {"status": "added" if a is None else "removed"}
+            continue
+
+        entry: Dict = {}
+
+        settings = {
+            key: {"from": a.get(key), "to": b.get(key)}
+            for key in ("path", "serviceUrl", "backendId")
+            if a.get(key) != b.get(key)
+        }
+        if settings:
+            entry["settings"] = settings
+
+        change = policy_change(a["policy"], b["policy"])
+        if change:
+            entry["policy"] = change
+
+        old_ops = _by_name(a["operations"])
+        new_ops = _by_name(b["operations"])
+        ops = {}
+        for op_id in sorted(old_ops.keys() | new_ops.keys()):
+            if op_id not in old_ops or op_id not in new_ops:
+                ops[op_id] = {"status": "added" if op_id not in old_ops else "removed"}
+                continue
+            change = policy_change(old_ops[op_id]["policy"], new_ops[op_id]["policy"])
+            if change:
+                ops[op_id] = {"policy": change}
+        if ops:
+            entry["operations"] = ops
+
+        if entry:
+            entry["status"] = "changed"
+            diff["apis"][name] = entry
+
+    return diff
+
+
+def has_differences(diff: Dict) -> bool:
+    return (
+        any(diff["backends"].values())
+        or bool(diff["fragments"])
+        or bool(diff["apis"])
+    )
+
+
+# -------------------------------------------------
+# Report
+# -------------------------------------------------
+
+def _steps_label(steps) -> str:
+    # A section summary, or the parse error recorded in its place
+    if isinstance(steps, list):
+        return ", ".join(steps) or "-"
+    return steps or "-"
+
+
+def _print_policy_change(change: Dict, indent: str, show_text: bool):
+    for name, sections in change["sections"].items():
+        print(f"{indent}{name}: {_steps_label(sections['from'])} -> {_steps_label(sections['to'])}")
+    if not change["sections"]:
+        print(f"{indent}(text only, same effective pipeline)")
+    if show_text:
+        for line in change["text"]:
+            print(f"{indent}  {line}")
+
+
+def print_diff(diff: Dict, old: Dict, new: Dict, show_text: bool = False):
+    print(f"Old: {old.get('label') or old['service']} ({old['generatedAt']})")
+    print(f"New: {new.get('label') or new['service']} ({new['generatedAt']})")
+
+    if not has_differences(diff):
+        print("\nNo differences")
+        return
+
+    backends = diff["backends"]
+    if any(backends.values()):
+        print("\nBackends:")
+        for name in backends["added"]:
+            print(f"  + {name} ({new['backends'][name].get('url')})")
+        for name in backends["removed"]:
+            print(f"  - {name} ({old['backends'][name].get('url')})")
+        for name in backends["changed"]:
+            print(f"  ~ {name}: {old['backends'][name].get('url')} -> {new['backends'][name].get('url')}")
+
+    if diff["fragments"]:
+        print("\nFragments:")
+        for fragment_id, change in diff["fragments"].items():
+            print(f"  ~ {fragment_id}")
+            _print_policy_change(change, "    ", show_text)
+
+    if diff["apis"]:
+        print("\nAPIs:")
+        for name, entry in diff["apis"].items():
+            if entry["status"] != "changed":
+                print(f"  {'+' if entry['status'] == 'added' else '-'} {name}")
+                continue
+
+            print(f"  ~ {name}")
+            for key, change in entry.get("settings", {}).items():
+                print(f"    {key}: {change['from']} -> {change['to']}")
+            if "policy" in entry:
+                print("    API policy:")
+                _print_policy_change(entry["policy"], "      ", show_text)
+            for op_id, op in entry.get("operations", {}).items():
+                if "status" in op:
+                    print(f"    {'+' if op['status'] == 'added' else '-'} operation {op_id}")
+                    continue
+                print(f"    Operation '{op_id}' policy:")
+                _print_policy_change(op["policy"], "      ", show_text)
+
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Save APIM routing snapshots and compare them offline"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    crawl_cmd = commands.add_parser("crawl", help="Crawl an APIM service into a snapshot")
+    crawl_cmd.add_argument("--subscription", required=True)
+    crawl_cmd.add_argument("--resource-group", required=True)
+    crawl_cmd.add_argument("--service", required=True, help="APIM service name")
+    crawl_cmd.add_argument("--label", help="Name shown in diffs (e.g. lz2)")
+    crawl_cmd.add_argument("-o", "--output", default=APIM_SNAPSHOT_FILE)
+
+    diff_cmd = commands.add_parser("diff", help="Compare two snapshots (no ARM calls)")
+    diff_cmd.add_argument("old")
+    diff_cmd.add_argument("new")
+    diff_cmd.add_argument("--text", action="store_true", help="Include unified policy text diffs")
+    diff_cmd.add_argument("--format", choices=["text", "json"], default="text")
+
+    args = parser.parse_args()
+
+    if args.command == "crawl":
+        from .apim import APIM_MAX_IN_FLIGHT, ApimClient
+        client = ApimClient(args.subscription, args.resource_group, args.service)
+        snapshot = crawl(client, APIM_MAX_IN_FLIGHT, args.label)
+        write_snapshot(snapshot, args.output)
+        print(
+            f"Saved {len(snapshot['apis'])} APIs and "
+            f"{len(snapshot['policies'])} distinct policies to {args.output}"
+        )
+        return
+
+    old = load_snapshot(args.old)
+    new = load_snapshot(args.new)
+    diff = diff_snapshots(old, new)
+
+    if args.format == "json":
+        print(json.dumps(diff, indent=2))
+    else:
+        print_diff(diff, old, new, args.text)
+
+    # Like diff(1): non-zero when the snapshots differ
+    sys.exit(1 if has_differences(diff) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List
+
+import requests
+from requests.adapters import HTTPAdapter
+from azure.core.credentials import AccessToken
+from azure.identity import DefaultAzureCredential
+
+from . import response_cache
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+# Overridable so the client can be pointed at a local fake ARM server
+ARM_ENDPOINT = os.environ.get("ARM_ENDPOINT", "https://management.azure.com")
+ARM_SCOPE = "https://management.azure.com/.default"
+
+RESOURCES_API_VERSION = "2021-04-01"
+NETWORK_API_VERSION = "2023-09-01"
+COGNITIVE_API_VERSION = "2023-05-01"
+
+# Refresh the bearer token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = 300
+
+# Throttled (429) and transiently unavailable responses are retried,
+# honouring Retry-After when ARM sends it
+ARM_MAX_RETRIES = int(os.environ.get("ARM_MAX_RETRIES", "5"))
+RETRY_STATUSES = {429, 502, 503, 504}
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 60.0
+
+# Below this many remaining subscription reads every caller pauses
+# briefly, so a concurrent crawl slows down before ARM starts sending 429s
+ARM_READS_LOW_WATERMARK = int(os.environ.get("ARM_READS_LOW_WATERMARK", "25"))
+RATE_LIMIT_HEADER = "x-ms-ratelimit-remaining-subscription-reads"
+
+
+class StaticTokenCredential:
+    # Used with ARM_ACCESS_TOKEN, e.g. for a fake server or a token
+    # obtained from `az account get-access-token`
+    def __init__(self, token: str):
+        self.token = token
+
+    def get_token(self, *scopes):
+        return AccessToken(self.token, int(time.time()) + 3600)
+
+
+# -------------------------------------------------
+# ARM REST CLIENT
+# -------------------------------------------------
+
+class ArmClient:
+    def __init__(
+        self,
+        base_url: str = ARM_ENDPOINT,
+        credential=None,
+        pool_size: int = 16,
+        timeout: int = 30
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.subscription_id = os.environ.get("AZURE_SUBSCRIPTION_ID")
+
+        if credential is None and os.environ.get("ARM_ACCESS_TOKEN"):
+            credential = StaticTokenCredential(os.environ["ARM_ACCESS_TOKEN"])
+        self._credential = credential
+
+        self._token = None
+        self._expires_on = 0
+        self._lock = threading.Lock()
+
+        # Shared back-off: a throttled response pauses every thread
+        self._resume_at = 0.0
+
+        # One keep-alive pool shared by every call (and every worker thread)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _get_token(self) -> str:
+        with self._lock:
+            if self._token is None or self._expires_on - time.time() < TOKEN_REFRESH_MARGIN:
+                if self._credential is None:
+                    self._credential = DefaultAzureCredential()
+                access_token = self._credential.get_token(ARM_SCOPE)
+                self._token = access_token.token
+                self._expires_on = access_token.expires_on
+            return self._token
+
+    def _url(self, path: str) -> str:
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}{path}"
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        api_version: str | None = None,
+        use_cache: bool = True,
+        **kwargs
+    ) -> Any:
+        params = dict(kwargs.pop("params", {}) or {})
+        if api_version:
+            params["api-version"] = api_version
+
+        if method != "GET" or not use_cache:
+            return self._send(method, path, params, **kwargs)
+
+        key = response_cache.normalize_key(
+            "GET", self._url(path), *sorted(f"{k}={v}" for k, v in params.items())
+        )
+        return response_cache.cached(
+            key, lambda: self._send(method, path, params, **kwargs)
+        )
+
+    @staticmethod
+    def retry_delay(response: requests.Response, attempt: int) -> float:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), RETRY_MAX_DELAY)
+            except ValueError:
+                pass
+        # Exponential backoff with jitter so parallel callers spread out
+        delay = min(RETRY_BASE_DELAY * 2 ** attempt, RETRY_MAX_DELAY)
+        return delay * random.uniform(0.5, 1.0)
+
+    def send(
+        self,
+        method: str,
+        path: str,
+        params: Dict | None = None,
+        max_retries: int = ARM_MAX_RETRIES,
+        **kwargs
+    ) -> requests.Response:
+        # Authenticated request on the shared session; the final status is
+        # left to the caller
+        attempt = 0
+        while True:
+            self._wait_for_quota()
+
+            headers = {
+                "Authorization": f"Bearer {self._get_token()}",
+                "Content-Type": "application/json"
+            }
+
+            r = self.session.request(
+                method,
+                self._url(path),
+                params=params,
+                headers=headers,
+                timeout=self.timeout,
+                **kwargs
+            )
+
+            self._note_rate_limit(r)
+
+            if r.status_code not in RETRY_STATUSES or attempt >= max_retries:
+                return r
+
+            delay = self.retry_delay(r, attempt)
+            print(f"ARM returned HTTP {r.status_code}, retrying in {delay:.1f}s")
+            self._pause(delay)
+            attempt += 1
+
+    def _pause(self, delay: float):
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.time() + delay)
+
+    def _wait_for_quota(self):
+        delay = self._resume_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _note_rate_limit(self, response: requests.Response):
+        remaining = response.headers.get(RATE_LIMIT_HEADER)
+        if remaining and remaining.isdigit() and int(remaining) < ARM_READS_LOW_WATERMARK:
+            self._pause(RETRY_BASE_DELAY)
+
+    def _send(self, method: str, path: str, params: Dict, **kwargs) -> Any:
+        r = self.send(method, path, params, **kwargs)
+
+        if r.status_code >= 400:
+            raise RuntimeError(
+                f"ARM request failed:\n"
+                f"{method} {r.url}\n"
+                f"HTTP {r.status_code}: {r.text}"
+            )
+
+        return r.json() if r.content else None
+
+    def get(self, path: str, api_version: str | None = None, use_cache: bool = True) -> Any:
+        return self.request("GET", path, api_version, use_cache)
+
+    def list(
+        self,
+        path: str,
+        api_version: str,
+        params: Dict | None = None,
+        use_cache: bool = True
+    ) -> List[Dict]:
+        items: List[Dict] = []
+
+        page = self.request("GET", path, api_version, use_cache, params=params)
+        items.extend(page.get("value", []))
+
+        # nextLink already carries api-version and the continuation token
+        while page.get("nextLink"):
+            page = self.request("GET", page["nextLink"], use_cache=use_cache)
+            items.extend(page.get("value", []))
+
+        return items
+
+    def subscription_path(self, subscription_id: str | None = None) -> str:
+        subscription_id = subscription_id or self.subscription_id
+        if not subscription_id:
+            raise RuntimeError(
+                "No subscription selected for ARM client "
+                "(call set_subscription or set AZURE_SUBSCRIPTION_ID)"
+            )
+        return f"/subscriptions/{subscription_id}"
+
+
+_client: ArmClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> ArmClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ArmClient()
+        return _client
+
+
+# -------------------------------------------------
+# Inventory helpers (same signatures as the az CLI backend)
+# -------------------------------------------------
+
+def set_subscription(subscription_id: str):
+    # Scoped to this client, the global `az account` context is untouched
+    get_client().subscription_id = subscription_id
+
+
+def get_resources(
+    resource_group: str,
+    subscription_id: str | None = None,
+    use_cache: bool = True
+) -> List[Dict]:
+    client = get_client()
+    return client.list(
+        f"{client.subscription_path(subscription_id)}/resourceGroups/{resource_group}/resources",
+        RESOURCES_API_VERSION,
+        # changedTime drives incremental inventory runs
+        params={"$expand": "createdTime,changedTime"},
+        use_cache=use_cache
+    )
+
+
+def list_private_endpoints(subscription_id: str | None = None) -> List[Dict]:
+    client = get_client()
+    return client.list(
+        f"{client.subscription_path(subscription_id)}/providers/Microsoft.Network/privateEndpoints",
+        NETWORK_API_VERSION
+    )
+
+
+def list_resource_groups(subscription_id: str | None = None, tag: str | None = None) -> List[Dict]:
+    client = get_client()
+    params = None
+    if tag:
+        key, _, value = tag.partition("=")
+        odata = f"tagName eq '{key}'"
+        if value:
+            odata += f" and tagValue eq '{value}'"
+        params = {"$filter": odata}
+    return client.list(
+        f"{client.subscription_path(subscription_id)}/resourcegroups",
+        RESOURCES_API_VERSION,
+        params=params
+    )
+
+
+def get_cognitive_network_access(resource_id: str) -> Dict:
+    try:
+        acct = get_client().get(resource_id, COGNITIVE_API_VERSION)
+        props = acct.get("properties", {})
+        return {
+            "publicNetworkAccess": props.get("publicNetworkAccess"),
+            "endpoint": props.get("endpoint")
+        }
+    except Exception:
+        return {
+            "publicNetworkAccess": None,
+            "endpoint": None
+        }
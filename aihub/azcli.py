@@ -0,0 +1,113 @@
+import functools
+import json
+import os
+import shutil
+from typing import TYPE_CHECKING, Any, List
+
+from . import response_cache
+
+if TYPE_CHECKING:
+    from .command_runner import CommandResult
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+# Seconds before a single az lookup is terminated (0 = no limit)
+AZ_COMMAND_TIMEOUT = float(os.environ.get("AZ_COMMAND_TIMEOUT", "300")) or None
+
+# Subscription selected through set_subscription (part of the cache key)
+CURRENT_SUBSCRIPTION: str | None = None
+
+
+# -------------------------------------------------
+# Azure CLI discovery
+# -------------------------------------------------
+
+@functools.lru_cache(maxsize=None)
+def find_az_cli() -> str:
+    # Resolved on first use, so importing never requires az on PATH
+    for exe in ("az", "az.cmd"):
+        path = shutil.which(exe)
+        if path:
+            return path
+    raise FileNotFoundError("Azure CLI not found on PATH")
+
+
+# -------------------------------------------------
+# Command helpers
+# -------------------------------------------------
+
+def run_cmd(cmd: List[str], timeout: float | None = None) -> "CommandResult":
+    # Output is shown live and captured; the console stays attached for prompts.
+    # asyncio is only imported once a command actually runs.
+    from . import command_runner
+    return command_runner.run(cmd, timeout=timeout, tee=True, interactive=True)
+
+def run_cmd_capture(
+    cmd: List[str],
+    timeout: float | None = AZ_COMMAND_TIMEOUT
+) -> "CommandResult":
+    from . import command_runner
+    return command_runner.run(cmd, timeout=timeout)
+
+def run_az_json(cmd: List[str]) -> Any:
+    # Read-only lookups; cached per subscription context (see response_cache)
+    key = response_cache.normalize_key("az", CURRENT_SUBSCRIPTION, *cmd)
+    return response_cache.cached(key, lambda: run_az_json_uncached(cmd))
+
+def run_az_json_uncached(cmd: List[str]) -> Any:
+    result = run_cmd_capture([find_az_cli()] + cmd + ["-o", "json"])
+
+    if result.timed_out:
+        raise RuntimeError(
+            f"Azure CLI command timed out after {result.duration:.0f}s:\n"
+            f"Command: {' '.join(cmd)}"
+        )
+
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"Azure CLI command failed:\n"
+            f"Command: {' '.join(cmd)}\n"
+            f"STDERR:\n{result.stderr}"
+        )
+
+    try:
+        return json.loads(result.stdout)
+    except json.JSONDecodeError as e:
+        raise RuntimeError(
+            f"Failed to parse JSON output from Azure CLI:\n"
+            f"STDOUT:\n{result.stdout}"
+        ) from e
+
+def run_az_raw(cmd: List[str]):
+    result = run_cmd([find_az_cli()] + cmd, timeout=AZ_COMMAND_TIMEOUT)
+    if not result.ok:
+        print("STDERR:", result.stderr)
+        raise RuntimeError("Azure CLI command failed")
+
+def set_subscription(subscription_id: str):
+    global CURRENT_SUBSCRIPTION
+    CURRENT_SUBSCRIPTION = subscription_id
+
+    run_az_raw([
+        "account", "set",
+        "--subscription", subscription_id
+    ])
+
+def get_latest_subscription_deployment() -> str:
+    result = run_cmd_capture([
+        find_az_cli(),
+        "deployment", "sub", "list",
+        "--query", "sort_by([], &properties.timestamp)[-1].name",
+        "-o", "tsv"
+    ])
+
+    if result.returncode != 0 or not result.stdout.strip():
+        raise RuntimeError("Unable to determine latest subscription deployment")
+
+    return result.stdout.strip()
+
+def subscription_args(subscription_id: str | None) -> List[str]:
+    # Explicit per-command subscription, leaving `az account` untouched
+    return ["--subscription", subscription_id] if subscription_id else []
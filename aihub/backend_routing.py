@@ -0,0 +1,221 @@
+import random
+import re
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .apim_policy import POLICY_DIR
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+# Policy that defines the routes and per-deployment clusters
+ROUTES_POLICY_FILE = POLICY_DIR / "openai_api_policy.xml"
+
+# <retry count="3"> in frag-backend-routing.xml: up to 4 attempts in total
+MAX_RETRIES = 3
+
+# Throttling window when a failed response carries none of the headers
+DEFAULT_RETRY_AFTER = 10
+
+# Checked in this order, as in the fragment
+RETRY_AFTER_HEADERS = ("Retry-After", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+
+
+# -------------------------------------------------
+# Routes
+# -------------------------------------------------
+
+class Route:
+    def __init__(self, name: str, location: str, backend_id: str, priority: int):
+        self.name = name
+        self.location = location
+        self.backend_id = backend_id
+        self.priority = priority
+        self.is_throttling = False
+        self.retry_after = 0.0
+
+    def copy(self) -> "Route":
+        # Clusters get their own copies (Json.NET clones a JObject added
+        # to a second JArray), so throttling is tracked per deployment
+        return Route(self.name, self.location, self.backend_id, self.priority)
+
+    def __repr__(self) -> str:
+        return f"Route({self.name!r}, {self.backend_id!r}, priority={self.priority})"
+
+
+def is_failure(status: int) -> bool:
+    return status == 429 or status >= 500
+
+
+def retry_after_seconds(headers: Dict[str, str]) -> int:
+    # Header lookups are case-insensitive in APIM
+    lowered = {k.lower(): v for k, v in headers.items()}
+    for name in RETRY_AFTER_HEADERS:
+        value = lowered.get(name.lower())
+        if value is not None:
+            try:
+                return int(value)
+            except ValueError:
+                pass
+    return DEFAULT_RETRY_AFTER
+
+
+class RoutingTable:
+    # The cached `routes` array for one deployment; shared by every request
+    # to that deployment. Times are plain seconds on the caller's clock.
+    def __init__(self, routes: List[Route], rng: random.Random | None = None):
+        self.routes = routes
+        self.rng = rng or random.Random()
+
+    @staticmethod
+    def _allowed(route: Route, allowed: List[str] | None) -> bool:
+        # Empty allowedBackend means every backend is allowed
+        return not allowed or route.backend_id.strip() in allowed
+
+    def reset_expired(self, now: float):
+        for route in self.routes:
+            if route.is_throttling and now >= route.retry_after:
+                route.is_throttling = False
+                route.retry_after = 0.0
+
+    def select(self, allowed: List[str] | None = None) -> int:
+        # Lowest priority among available allowed routes, random among
+        # ties; -1 when none is available
+        selected_priority = None
+        candidates: List[int] = []
+
+        for i, route in enumerate(self.routes):
+            if route.is_throttling or not self._allowed(route, allowed):
+                continue
+            if selected_priority is None or route.priority < selected_priority:
+                selected_priority = route.priority
+                candidates = [i]
+            elif route.priority == selected_priority:
+                candidates.append(i)
+
+        if not candidates:
+            return -1
+        if len(candidates) == 1:
+            return candidates[0]
+        return candidates[self.rng.randrange(len(candidates))]
+
+    def mark_throttling(self, index: int, now: float, headers: Dict[str, str]):
+        route = self.routes[index]
+        route.is_throttling = True
+        route.retry_after = now + retry_after_seconds(headers)
+
+    def remaining(self, allowed: List[str] | None = None) -> int:
+        return sum(
+            1 for route in self.routes
+            if not route.is_throttling and self._allowed(route, allowed)
+        )
+
+    def no_route_error(self, allowed: List[str] | None = None) -> Tuple[int, str, str]:
+        # (status, reason, message) of the fragment's return-response
+        if not allowed:
+            return 503, "Service Unavailable", "No backends are currently available"
+        if any(r.is_throttling and self._allowed(r, allowed) for r in self.routes):
+            return 429, "Too Many Requests", "Rate limit exceeded for allowed backends"
+        return 503, "Service Unavailable", "No allowed backends are currently available"
+
+
+class RoutingAttempt:
+    # One request going through frag-backend-routing.xml. Call next_route
+    # before each forward and on_response after it:
+    #
+    #     attempt = RoutingAttempt(table)
+    #     while True:
+    #         index = attempt.next_route(now)
+    #         if index is None: return attempt.error
+    #         status, headers = forward(table.routes[index])
+    #         if not attempt.on_response(now, status, headers): break
+    def __init__(self, table: RoutingTable, allowed: List[str] | None = None):
+        self.table = table
+        self.allowed = allowed
+        self.retries = 0
+        self.route_index = -1
+        self.routes_tried: List[int] = []
+        self.error: Tuple[int, str, str] | None = None
+
+    def next_route(self, now: float) -> int | None:
+        self.table.reset_expired(now)
+        self.route_index = self.table.select(self.allowed)
+        if self.route_index == -1:
+            self.error = self.table.no_route_error(self.allowed)
+            return None
+        self.error = None
+        self.routes_tried.append(self.route_index)
+        return self.route_index
+
+    def on_response(self, now: float, status: int, headers: Dict[str, str]) -> bool:
+        # True when the retry loop runs again
+        if not is_failure(status):
+            return False
+
+        self.table.mark_throttling(self.route_index, now, headers)
+        if self.table.remaining(self.allowed) == 0 or self.retries >= MAX_RETRIES:
+            return False
+
+        self.retries += 1
+        return True
+
+
+# -------------------------------------------------
+# Loading the route configuration
+# -------------------------------------------------
+
+_ROUTE_BLOCK = re.compile(r"routes\.Add\(new JObject\(\)\s*\{(.*?)\}\s*\);", re.S)
+_CLUSTER_BLOCK = re.compile(r"clusters\.Add\(new JObject\(\)\s*\{(.*?)\}\s*\);", re.S)
+_PAIR = re.compile(r'\{\s*"([^"]+)"\s*,\s*("[^"]*"|[^}]+?)\s*\}')
+_ROUTE_REF = re.compile(r"routes\[(\d+)\]")
+
+
+def _pairs(block: str) -> Dict[str, str]:
+    return {k: v.strip().strip('"') for k, v in _PAIR.findall(block)}
+
+
+def load_clusters_from_policy(path: Path | str = ROUTES_POLICY_FILE) -> Dict[str, List[Route]]:
+    # Reads the routes.Add / clusters.Add blocks of the oaClusters
+    # expression, so simulations use exactly what is deployed
+    text = Path(path).read_text(encoding="utf-8")
+
+    routes = []
+    for block in _ROUTE_BLOCK.findall(text):
+        fields = _pairs(block)
+        routes.append(Route(
+            fields["name"], fields["location"], fields["backend-id"], int(fields["priority"])
+        ))
+
+    clusters: Dict[str, List[Route]] = {}
+    for block in _CLUSTER_BLOCK.findall(text):
+        name = _pairs(block)["deploymentName"]
+        clusters[name] = [routes[int(i)].copy() for i in _ROUTE_REF.findall(block)]
+
+    if not clusters:
+        raise ValueError(f"{path}: no route clusters found")
+    return clusters
+
+
+def clusters_from_config(doc: Dict) -> Dict[str, List[Route]]:
+    # {"routes": [{"name", "location", "backend-id", "priority"}],
+    #  "clusters": {"chat": ["backend-id", ...]}}
+    routes = {
+        r["backend-id"]: Route(r["name"], r.get("location", ""), r["backend-id"], int(r["priority"]))
+        for r in doc["routes"]
+    }
+    return {
+        deployment: [routes[backend_id].copy() for backend_id in backend_ids]
+        for deployment, backend_ids in doc["clusters"].items()
+    }
+
+
+def build_tables(
+    clusters: Dict[str, List[Route]],
+    rng: random.Random | None = None
+) -> Dict[str, RoutingTable]:
+    rng = rng or random.Random()
+    return {
+        deployment: RoutingTable([r.copy() for r in routes], rng)
+        for deployment, routes in clusters.items()
+    }
@@ -0,0 +1,257 @@
+import asyncio
+import codecs
+import locale
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, List, Sequence, TextIO
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+# CLI processes allowed to run at once across all threads
+CMD_MAX_CONCURRENT = int(os.environ.get("CMD_MAX_CONCURRENT", "8"))
+
+# Bytes kept per stream; older output is dropped once a stream exceeds it
+CMD_CAPTURE_MAX_BYTES = int(os.environ.get("CMD_CAPTURE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+READ_CHUNK_SIZE = 64 * 1024
+KILL_GRACE_SECONDS = 5.0
+
+# Same decoding subprocess.run(text=True) used
+ENCODING = locale.getpreferredencoding(False)
+
+
+# -------------------------------------------------
+# Output capture
+# -------------------------------------------------
+
+class RingBuffer:
+    # Keeps the last max_bytes written, so a chatty command cannot
+    # exhaust memory while its tail (usually the error) is preserved
+    def __init__(self, max_bytes: int = CMD_CAPTURE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.chunks: deque = deque()
+        self.size = 0
+        self.dropped = 0
+
+    def append(self, data: bytes):
+        self.chunks.append(data)
+        self.size += len(data)
+
+        while self.size > self.max_bytes:
+            excess = self.size - self.max_bytes
+            head = self.chunks[0]
+            if len(head) <= excess:
+                self.chunks.popleft()
+                self.size -= len(head)
+                self.dropped += len(head)
+            else:
+                self.chunks[0] = head[excess:]
+                self.size -= excess
+                self.dropped += excess
+
+    @property
+    def truncated(self) -> bool:
+        return self.dropped > 0
+
+    def getvalue(self) -> str:
+        return b"".join(self.chunks).decode(ENCODING, errors="replace")
+
+
+class CommandResult:
+    def __init__(
+        self,
+        cmd: Sequence[str],
+        returncode: int | None,
+        stdout: str,
+        stderr: str,
+        duration: float,
+        timed_out: bool = False,
+        truncated: bool = False
+    ):
+        self.cmd = list(cmd)
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.duration = duration
+        self.timed_out = timed_out
+        self.truncated = truncated
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    def __repr__(self) -> str:
+        return (
+            f"CommandResult(cmd={self.cmd[:3]!r}, returncode={self.returncode}, "
+            f"timed_out={self.timed_out}, duration={self.duration:.1f}s)"
+        )
+
+
+async def _pump(stream: asyncio.StreamReader, buffer: RingBuffer, tee: TextIO | None):
+    # Read in chunks rather than lines so prompts without a trailing
+    # newline are shown immediately and long JSON lines are no problem
+    decoder = codecs.getincrementaldecoder(ENCODING)(errors="replace")
+    while True:
+        data = await stream.read(READ_CHUNK_SIZE)
+        if not data:
+            break
+        buffer.append(data)
+        if tee is not None:
+            tee.write(decoder.decode(data))
+            tee.flush()
+
+
+async def _terminate(process: asyncio.subprocess.Process) -> int | None:
+    if process.returncode is not None:
+        return process.returncode
+
+    try:
+        process.terminate()
+        try:
+            return await asyncio.wait_for(process.wait(), KILL_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            process.kill()
+            return await process.wait()
+    except ProcessLookupError:
+        return process.returncode
+
+
+async def execute(
+    cmd: Sequence[str],
+    timeout: float | None = None,
+    tee: bool = False,
+    interactive: bool = False,
+    capture_bytes: int = CMD_CAPTURE_MAX_BYTES,
+    env: Dict[str, str] | None = None,
+    cwd: str | None = None
+) -> CommandResult:
+    # Runs on whatever loop awaits it, without a concurrency limit; most
+    # callers want run()/run_async(), which go through the shared runner
+    started = time.monotonic()
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        # Only interactive commands (azd up) may read the console
+        stdin=None if interactive else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=env,
+        cwd=cwd
+    )
+
+    stdout = RingBuffer(capture_bytes)
+    stderr = RingBuffer(capture_bytes)
+
+    async def communicate() -> int:
+        await asyncio.gather(
+            _pump(process.stdout, stdout, sys.stdout if tee else None),
+            _pump(process.stderr, stderr, sys.stderr if tee else None)
+        )
+        return await process.wait()
+
+    timed_out = False
+    try:
+        returncode = await asyncio.wait_for(communicate(), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        returncode = await _terminate(process)
+    except asyncio.CancelledError:
+        await _terminate(process)
+        raise
+
+    return CommandResult(
+        cmd,
+        returncode,
+        stdout.getvalue(),
+        stderr.getvalue(),
+        time.monotonic() - started,
+        timed_out=timed_out,
+        truncated=stdout.truncated or stderr.truncated
+    )
+
+
+# -------------------------------------------------
+# Runner
+# -------------------------------------------------
+
+class CommandRunner:
+    # Owns an event loop on a daemon thread, so synchronous callers
+    # (including enrichment worker threads) and coroutines on other loops
+    # all share one concurrency limit
+    def __init__(self, max_concurrent: int = CMD_MAX_CONCURRENT):
+        self.max_concurrent = max(1, max_concurrent)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="command-runner", daemon=True
+                ).start()
+                self._semaphore = asyncio.Semaphore(self.max_concurrent)
+                self._loop = loop
+        return self._loop
+
+    async def _limited(self, cmd: Sequence[str], **kwargs) -> CommandResult:
+        async with self._semaphore:
+            return await execute(cmd, **kwargs)
+
+    def submit(self, cmd: Sequence[str], **kwargs) -> Future:
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._limited(cmd, **kwargs), loop)
+
+    def run(self, cmd: Sequence[str], **kwargs) -> CommandResult:
+        future = self.submit(cmd, **kwargs)
+        try:
+            return future.result()
+        except KeyboardInterrupt:
+            # Cancelling the task terminates the child process
+            future.cancel()
+            raise
+
+    def run_many(self, cmds: List[Sequence[str]], **kwargs) -> List[CommandResult]:
+        # Results are returned in input order
+        futures = [self.submit(cmd, **kwargs) for cmd in cmds]
+        try:
+            return [f.result() for f in futures]
+        except KeyboardInterrupt:
+            for f in futures:
+                f.cancel()
+            raise
+
+    async def run_async(self, cmd: Sequence[str], **kwargs) -> CommandResult:
+        # Awaitable from any loop; cancelling the awaiting task cancels
+        # the command on the runner loop as well
+        return await asyncio.wrap_future(self.submit(cmd, **kwargs))
+
+
+_runner: CommandRunner | None = None
+_runner_lock = threading.Lock()
+
+
+def get_runner() -> CommandRunner:
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = CommandRunner()
+        return _runner
+
+
+def run(cmd: Sequence[str], **kwargs) -> CommandResult:
+    return get_runner().run(cmd, **kwargs)
+
+
+def run_many(cmds: List[Sequence[str]], **kwargs) -> List[CommandResult]:
+    return get_runner().run_many(cmds, **kwargs)
+
+
+async def run_async(cmd: Sequence[str], **kwargs) -> CommandResult:
+    return await get_runner().run_async(cmd, **kwargs)
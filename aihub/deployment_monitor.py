@@ -0,0 +1,335 @@
+import asyncio
+import json
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from . import arm_client
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+DEPLOYMENTS_API_VERSION = "2021-04-01"
+DEPLOYMENT_TYPE = "Microsoft.Resources/deployments"
+TERMINAL_STATES = {"Succeeded", "Failed", "Canceled"}
+
+POLL_INTERVAL = 10.0
+MAX_CONCURRENT_POLLS = 8
+
+# Consecutive failed polls (auth, token, 404, ...) before the monitor
+# gives up and returns what it has
+MAX_POLL_FAILURES = 5
+
+TIMING_REPORT_FILE = "deployment_timing.json"
+TIMING_HISTORY_FILE = "deployment_timing_history.ndjson"
+
+_DURATION_RE = re.compile(
+    r"^P(?:(?P<d>\d+(?:\.\d+)?)D)?"
+    r"(?:T(?:(?P<h>\d+(?:\.\d+)?)H)?(?:(?P<m>\d+(?:\.\d+)?)M)?(?:(?P<s>\d+(?:\.\d+)?)S)?)?$"
+)
+
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+
+def parse_duration(value: str | None) -> float | None:
+    # ARM reports ISO 8601 durations, e.g. PT1M23.456S
+    if not value:
+        return None
+    m = _DURATION_RE.match(value)
+    if not m:
+        return None
+    parts = {k: float(v) if v else 0.0 for k, v in m.groupdict().items()}
+    return parts["d"] * 86400 + parts["h"] * 3600 + parts["m"] * 60 + parts["s"]
+
+
+def format_seconds(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    minutes, secs = divmod(int(seconds), 60)
+    return f"{minutes}m{secs:02d}s" if minutes else f"{secs}s"
+
+
+def deployment_path(subscription_id: str, deployment_name: str) -> str:
+    return (
+        f"/subscriptions/{subscription_id}"
+        f"/providers/Microsoft.Resources/deployments/{deployment_name}"
+    )
+
+
+def _get(path: str) -> Any:
+    # Polling must always see fresh state, never the response cache
+    return arm_client.get_client().get(path, DEPLOYMENTS_API_VERSION, use_cache=False)
+
+
+def _list(path: str) -> List[Dict]:
+    return arm_client.get_client().list(path, DEPLOYMENTS_API_VERSION, use_cache=False)
+
+
+def find_deployment(subscription_id: str, name_prefix: str, started_after: float) -> str | None:
+    # azd names subscription deployments "<env>-<unix time>"
+    deployments = _list(
+        f"/subscriptions/{subscription_id}/providers/Microsoft.Resources/deployments"
+    )
+
+    candidates = []
+    for d in deployments:
+        name = d.get("name", "")
+        if not name.startswith(f"{name_prefix}-"):
+            continue
+        suffix = name[len(name_prefix) + 1:]
+        if suffix.isdigit() and int(suffix) >= started_after - 60:
+            candidates.append((int(suffix), name))
+
+    return max(candidates)[1] if candidates else None
+
+
+def _operation_record(op: Dict) -> Dict:
+    props = op.get("properties", {})
+    target = props.get("targetResource") or {}
+    return {
+        "id": target.get("id"),
+        "name": target.get("resourceName"),
+        "type": target.get("resourceType"),
+        "state": props.get("provisioningState"),
+        "timestamp": props.get("timestamp"),
+        "durationSeconds": parse_duration(props.get("duration"))
+    }
+
+
+# -------------------------------------------------
+# Monitor
+# -------------------------------------------------
+
+class DeploymentMonitor:
+    def __init__(
+        self,
+        subscription_id: str,
+        deployment_name: str,
+        interval: float = POLL_INTERVAL,
+        max_concurrent: int = MAX_CONCURRENT_POLLS,
+        on_module_succeeded: Callable[[Dict], None] | None = None,
+        provisioning: asyncio.Task | None = None,
+        max_failures: int = MAX_POLL_FAILURES
+    ):
+        self.subscription_id = subscription_id
+        self.deployment_name = deployment_name
+        self.interval = interval
+        # The azd up task; once it has finished the monitor polls one last
+        # time and stops, whatever state ARM reports
+        self.provisioning = provisioning
+        self.max_failures = max_failures
+        # Why the monitor stopped before a terminal state, if it did
+        self.stop_reason: str | None = None
+        # Called once per module, with its resource operations, as soon
+        # as the module deployment succeeds. Must not block the loop.
+        self.on_module_succeeded = on_module_succeeded
+        self.modules: Dict[str, Dict] = {}
+        self.deployment: Dict = {}
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    def log(self, message: str):
+        print(f"[monitor] {message}")
+
+    async def _poll_module_operations(self, module: Dict):
+        # Nested module deployments live at resource group scope
+        async with self._semaphore:
+            try:
+                ops = await asyncio.to_thread(_list, f"{module['id']}/operations")
+            except Exception as e:
+                self.log(f"Warning: Failed to poll module {module['name']}: {e}")
+                return
+
+        module["resources"] = [
+            _operation_record(op) for op in ops
+            if (op.get("properties", {}).get("targetResource") or {}).get("id")
+        ]
+
+    def _update_module(self, record: Dict):
+        name = record["name"]
+        module = self.modules.get(name)
+
+        if module is None:
+            module = self.modules[name] = {**record, "state": None, "resources": []}
+
+        previous_state = module["state"]
+        module.update(record)
+        if record["state"] != previous_state:
+            if record["state"] in TERMINAL_STATES:
+                self.log(f"{name}: {record['state']} in {format_seconds(record['durationSeconds'])}")
+            else:
+                self.log(f"{name}: {record['state']}")
+        return module
+
+    async def poll_once(self) -> bool:
+        path = deployment_path(self.subscription_id, self.deployment_name)
+
+        self.deployment, ops = await asyncio.gather(
+            asyncio.to_thread(_get, path),
+            asyncio.to_thread(_list, f"{path}/operations")
+        )
+
+        pending = []
+        for op in ops:
+            record = _operation_record(op)
+            if record["type"] != DEPLOYMENT_TYPE or not record["id"]:
+                continue
+
+            was_terminal = self.modules.get(record["name"], {}).get("state") in TERMINAL_STATES
+            module = self._update_module(record)
+
+            # Finished modules are polled one last time, then left alone
+            if not was_terminal:
+                pending.append(module)
+
+        await asyncio.gather(*(self._poll_module_operations(m) for m in pending))
+
+        if self.on_module_succeeded:
+            for m in pending:
+                if m["state"] == "Succeeded":
+                    try:
+                        self.on_module_succeeded(m)
+                    except Exception as e:
+                        self.log(f"Warning: Module handler failed for {m['name']}: {e}")
+
+        state = self.deployment.get("properties", {}).get("provisioningState")
+        return state in TERMINAL_STATES
+
+    async def _wait(self):
+        # Sleeps for the poll interval, waking early when azd up exits
+        if self.provisioning is None:
+            await asyncio.sleep(self.interval)
+        else:
+            await asyncio.wait([self.provisioning], timeout=self.interval)
+
+    async def run(self) -> Dict:
+        # Returns the report once the deployment is terminal; a partial
+        # report (stopReason set) when azd up exits first or polling keeps
+        # failing
+        self.log(f"Watching deployment {self.deployment_name}")
+        failures = 0
+        while True:
+            provisioning_done = self.provisioning is not None and self.provisioning.done()
+            try:
+                if await self.poll_once():
+                    break
+                failures = 0
+            except Exception as e:
+                failures += 1
+                self.log(f"Warning: Poll failed ({failures}/{self.max_failures}): {e}")
+                if failures >= self.max_failures:
+                    self.stop_reason = f"{failures} consecutive poll failures"
+                    break
+
+            if provisioning_done:
+                self.stop_reason = "azd up finished before the deployment reached a terminal state"
+                break
+            await self._wait()
+
+        report = self.report()
+        if self.stop_reason:
+            self.log(f"Stopped watching: {self.stop_reason} (partial report)")
+        else:
+            self.log(
+                f"Deployment {report['state']} in {format_seconds(report['durationSeconds'])}"
+            )
+        return report
+
+    def report(self) -> Dict:
+        props = self.deployment.get("properties", {})
+        modules = sorted(
+            self.modules.values(),
+            key=lambda m: m.get("durationSeconds") or 0,
+            reverse=True
+        )
+        return {
+            "generatedAt": datetime.utcnow().isoformat() + "Z",
+            "subscriptionId": self.subscription_id,
+            "deployment": self.deployment_name,
+            "state": props.get("provisioningState"),
+            "durationSeconds": parse_duration(props.get("duration")),
+            "stopReason": self.stop_reason,
+            "modules": [
+                {
+                    "name": m["name"],
+                    "state": m["state"],
+                    "durationSeconds": m["durationSeconds"],
+                    "resources": sorted(
+                        m["resources"],
+                        key=lambda r: r.get("durationSeconds") or 0,
+                        reverse=True
+                    )
+                }
+                for m in modules
+            ]
+        }
+
+
+async def watch_new_deployment(
+    subscription_id: str,
+    name_prefix: str,
+    started_after: float,
+    provisioning: asyncio.Task | None = None,
+    interval: float = POLL_INTERVAL,
+    on_module_succeeded: Callable[[Dict], None] | None = None
+) -> Dict | None:
+    # Wait for azd to create the subscription deployment, then follow it
+    while True:
+        provisioning_done = provisioning is not None and provisioning.done()
+        try:
+            name = await asyncio.to_thread(
+                find_deployment, subscription_id, name_prefix, started_after
+            )
+        except Exception as e:
+            print(f"[monitor] Warning: Failed to list deployments: {e}")
+            name = None
+
+        if name:
+            return await DeploymentMonitor(
+                subscription_id,
+                name,
+                interval,
+                on_module_succeeded=on_module_succeeded,
+                provisioning=provisioning
+            ).run()
+        if provisioning_done:
+            print("[monitor] No new deployment found")
+            return None
+
+        await asyncio.sleep(interval)
+
+
+# -------------------------------------------------
+# Report
+# -------------------------------------------------
+
+def print_timing_summary(report: Dict):
+    print("\n========== DEPLOYMENT TIMING ==========\n")
+    for m in report["modules"]:
+        print(f"  {m['name']:<40} {m['state'] or '-':<10} {format_seconds(m['durationSeconds'])}")
+    print(f"\n  Total: {format_seconds(report['durationSeconds'])} ({report['state']})")
+    if report.get("stopReason"):
+        print(f"  Partial: {report['stopReason']}")
+
+
+def write_timing_report(
+    report: Dict,
+    path: str = TIMING_REPORT_FILE,
+    history_path: str = TIMING_HISTORY_FILE
+):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    # One compact line per deployment for tracking regressions over time
+    with open(history_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "generatedAt": report["generatedAt"],
+            "deployment": report["deployment"],
+            "state": report["state"],
+            "durationSeconds": report["durationSeconds"],
+            "modules": {m["name"]: m["durationSeconds"] for m in report["modules"]}
+        }) + "\n")
+
+    print(f"Deployment timing written to {path}")
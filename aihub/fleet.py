@@ -0,0 +1,129 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from . import inventory
+from .azcli import run_az_json, subscription_args
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+# Landing zones inventoried side by side in fleet mode
+FLEET_MAX_SCOPES = int(os.environ.get("FLEET_MAX_SCOPES", "4"))
+FLEET_OUTPUT_FILE = "fleet_inventory.json"
+
+
+# -------------------------------------------------
+# Fleet inventory (many subscriptions / resource groups)
+# -------------------------------------------------
+
+def parse_scope(text: str) -> Tuple[str, str]:
+    subscription_id, sep, resource_group = text.strip().partition("/")
+    if not sep or not subscription_id or not resource_group:
+        raise ValueError(
+            f"Invalid scope '{text}', expected <subscriptionId>/<resourceGroup>"
+        )
+    return subscription_id, resource_group
+
+def list_resource_groups(subscription_id: str, tag: str | None = None) -> List[Dict]:
+    if inventory.uses_arm():
+        from . import arm_client
+        return arm_client.list_resource_groups(subscription_id, tag)
+
+    cmd = ["group", "list"] + subscription_args(subscription_id)
+    if tag:
+        cmd += ["--tag", tag]
+    return run_az_json(cmd)
+
+def resolve_tag_scopes(subscriptions: List[str], tag: str) -> List[Tuple[str, str]]:
+    scopes = []
+    for subscription_id in subscriptions:
+        for rg in list_resource_groups(subscription_id, tag):
+            scopes.append((subscription_id, rg["name"]))
+    return scopes
+
+def inventory_scope(scope: Tuple[str, str], max_workers: int) -> Dict:
+    subscription_id, resource_group = scope
+    section = {
+        "subscriptionId": subscription_id,
+        "resourceGroup": resource_group,
+        "error": None,
+        "resources": []
+    }
+
+    # A failing landing zone is reported in its section, never fatal
+    try:
+        section["resources"] = inventory.build_inventory(resource_group, max_workers, subscription_id)
+    except Exception as e:
+        print(f"Warning: Inventory failed for {subscription_id}/{resource_group}: {e}")
+        section["error"] = str(e)
+
+    section["resourceCount"] = len(section["resources"])
+    return section
+
+def split_by_scope(records: List[Dict], scopes: List[Tuple[str, str]]) -> List[Dict]:
+    sections = {
+        (sub.lower(), rg.lower()): {
+            "subscriptionId": sub,
+            "resourceGroup": rg,
+            "error": None,
+            "resources": []
+        }
+        for sub, rg in scopes
+    }
+
+    for r in records:
+        parts = (r.get("id") or "").lower().split("/")
+        if "subscriptions" not in parts or "resourcegroups" not in parts:
+            continue
+        key = (
+            parts[parts.index("subscriptions") + 1],
+            parts[parts.index("resourcegroups") + 1]
+        )
+        if key in sections:
+            sections[key]["resources"].append(r)
+
+    for section in sections.values():
+        section["resourceCount"] = len(section["resources"])
+
+    return list(sections.values())
+
+def build_fleet_inventory(
+    scopes: List[Tuple[str, str]],
+    max_scopes: int = FLEET_MAX_SCOPES,
+    max_workers: int = inventory.INVENTORY_MAX_WORKERS
+) -> Dict:
+    # Deduplicate while keeping the requested order
+    scopes = list(dict.fromkeys(scopes))
+
+    # Every lookup names its subscription explicitly, so scopes can run
+    # side by side without touching the global `az account` context
+    if inventory.backend() == "graph":
+        from . import resource_graph
+        sections = split_by_scope(resource_graph.build_inventory(scopes), scopes)
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, max_scopes)) as pool:
+            sections = list(pool.map(
+                lambda scope: inventory_scope(scope, max_workers),
+                scopes
+            ))
+
+    return {
+        "generatedAt": datetime.utcnow().isoformat() + "Z",
+        "scopes": sections
+    }
+
+def write_fleet_outputs(doc: Dict, path: str = FLEET_OUTPUT_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+
+    for section in doc["scopes"]:
+        status = f"ERROR: {section['error']}" if section["error"] else "ok"
+        print(
+            f"  {section['subscriptionId']}/{section['resourceGroup']}: "
+            f"{section['resourceCount']} resources ({status})"
+        )
+    print(f"Fleet inventory written to {path}")
@@ -0,0 +1,50 @@
+from typing import Dict
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+CHAT_PATH = "/openai/deployments/chat/chat/completions"
+OPENAI_API_VERSION = "2024-10-21"
+
+DEFAULT_PROMPT = "Reply OK"
+DEFAULT_MAX_TOKENS = 5
+
+
+# -------------------------------------------------
+# Chat completions through the APIM gateway
+# -------------------------------------------------
+
+# One definition of the call, shared by the smoke tests (requests
+# sessions) and the load tools (httpx clients); no client library is
+# imported here.
+
+def chat_url(gateway_url: str, chat_path: str = CHAT_PATH, api_version: str = OPENAI_API_VERSION) -> str:
+    return f"{gateway_url.rstrip('/')}{chat_path}?api-version={api_version}"
+
+
+def chat_headers(subscription_key: str) -> Dict[str, str]:
+    return {
+        "Content-Type": "application/json",
+        "Ocp-Apim-Subscription-Key": subscription_key
+    }
+
+
+def chat_payload(
+    prompt: str = DEFAULT_PROMPT,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    system: str | None = None
+) -> Dict:
+    messages = [{"role": "system", "content": system}] if system else []
+    messages.append({"role": "user", "content": prompt})
+    return {
+        "model": "chat",
+        "messages": messages,
+        "max_tokens": max_tokens
+    }
+
+
+def post_chat(client, url: str, subscription_key: str, payload: Dict, **kwargs):
+    # client.post on a requests.Session returns the response; on an
+    # httpx.AsyncClient it returns an awaitable
+    return client.post(url, headers=chat_headers(subscription_key), json=payload, **kwargs)
@@ -0,0 +1,557 @@
+import csv
+import importlib.util
+import json
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+from . import azcli
+from . import inventory_incremental
+from . import inventory_stream
+from . import response_cache
+from .azcli import run_az_json, run_az_json_uncached, subscription_args
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+# Concurrent network lookups during inventory enrichment (1 = serial)
+INVENTORY_MAX_WORKERS = int(os.environ.get("INVENTORY_MAX_WORKERS", "8"))
+
+# Re-enrich only resources that changed since the previous
+# resources_inventory.json (set INVENTORY_INCREMENTAL=1)
+INVENTORY_INCREMENTAL = os.environ.get("INVENTORY_INCREMENTAL", "0") == "1"
+
+# "arm", "graph" (one Resource Graph query per inventory) or "cli"
+BACKENDS = ("arm", "graph", "cli")
+
+_backend: str | None = None
+
+
+# -------------------------------------------------
+# Backend resolution
+# -------------------------------------------------
+
+def arm_available() -> bool:
+    # Checked without importing: requests and azure-identity are only
+    # loaded once an ARM backend is actually used
+    return all(
+        importlib.util.find_spec(name) is not None
+        for name in ("requests", "azure.identity")
+    )
+
+def backend() -> str:
+    # Native ARM REST by default, falling back to the az CLI when the ARM
+    # dependencies are not installed; INVENTORY_BACKEND overrides
+    if _backend is None:
+        set_backend(os.environ.get("INVENTORY_BACKEND") or ("arm" if arm_available() else "cli"))
+    return _backend
+
+def set_backend(name: str):
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inventory backend '{name}', expected one of {BACKENDS}")
+    _backend = name
+
+def uses_arm() -> bool:
+    return backend() in ("arm", "graph")
+
+def set_subscription(subscription_id: str):
+    if uses_arm():
+        from . import arm_client
+        arm_client.set_subscription(subscription_id)
+        return
+
+    azcli.set_subscription(subscription_id)
+
+
+def invalidate_cached(resource_group: str, subscription_id: str | None = None) -> int:
+    # Forget cached lookups a deployment to this resource group can change:
+    # its resource listing, per-resource reads (account show, ARM GETs by
+    # id) and the subscription's private endpoint listing. Returns the
+    # number of entries dropped.
+    rg_path = f"/resourcegroups/{resource_group.lower()}/"
+    rg_flag = ["--resource-group", resource_group.lower()]
+    subscription = (subscription_id or "").lower()
+
+    def match(key: str) -> bool:
+        if rg_path in key:
+            return True
+        tokens = key.split()
+        if any(tokens[i:i + 2] == rg_flag for i in range(len(tokens) - 1)):
+            return True
+        if "privateendpoints" in key or "private-endpoint" in key:
+            # Listings without an explicit subscription use the current one
+            return not subscription or subscription in key or "subscription" not in key
+        return False
+
+    removed = response_cache.invalidate(match)
+    if removed:
+        print(f"Dropped {removed} cached lookup(s) for resource group {resource_group}")
+    return removed
+
+# -------------------------------------------------
+# Resource and network lookups
+# -------------------------------------------------
+
+def get_resources(
+    resource_group: str,
+    subscription_id: str | None = None,
+    use_cache: bool = True
+) -> List[Dict]:
+    if uses_arm():
+        from . import arm_client
+        return arm_client.get_resources(resource_group, subscription_id, use_cache)
+
+    cmd = [
+        "resource", "list",
+        "--resource-group", resource_group
+    ] + subscription_args(subscription_id)
+    return run_az_json(cmd) if use_cache else run_az_json_uncached(cmd)
+
+def list_private_endpoints(subscription_id: str | None = None) -> List[Dict]:
+    if uses_arm():
+        from . import arm_client
+        return arm_client.list_private_endpoints(subscription_id)
+
+    return run_az_json([
+        "network", "private-endpoint", "list"
+    ] + subscription_args(subscription_id))
+
+def build_private_endpoint_index(private_endpoints: List[Dict]) -> Dict[str, List[Dict]]:
+    # privateLinkServiceId (lower-cased) -> private endpoints targeting it
+    index: Dict[str, List[Dict]] = {}
+
+    for pe in private_endpoints:
+        connections = (
+            pe.get("properties", {})
+              .get("privateLinkServiceConnections") or []
+        )
+        targets = {
+            (c.get("properties", {}).get("privateLinkServiceId") or "").lower()
+            for c in connections
+        }
+        for target in targets:
+            if target:
+                index.setdefault(target, []).append(pe)
+
+    return index
+
+def get_private_endpoints(
+    resource_id: str,
+    pe_index: Dict[str, List[Dict]] | None = None
+) -> List[Dict]:
+    if pe_index is None:
+        pe_index = build_private_endpoint_index(list_private_endpoints())
+    return pe_index.get(resource_id.lower(), [])
+
+def get_public_endpoint(resource: Dict) -> str | None:
+    rid = resource.get("id")
+    name = resource.get("name")
+    location = resource.get("location")
+
+    # Azure OpenAI accounts
+    if "openai" in name.lower():
+        return f"https://{name}.openai.azure.com"
+
+    # Standard Cognitive Services
+    try:
+        acct = run_az_json([
+            "cognitiveservices", "account", "show",
+            "--ids", rid
+        ])
+        return acct.get("properties", {}).get("endpoint")
+    except Exception:
+        return None
+    
+def get_cognitive_network_access(resource_id: str) -> Dict:
+    if uses_arm():
+        from . import arm_client
+        return arm_client.get_cognitive_network_access(resource_id)
+
+    try:
+        acct = run_az_json([
+            "cognitiveservices", "account", "show",
+            "--ids", resource_id
+        ])
+        props = acct.get("properties", {})
+        return {
+            "publicNetworkAccess": props.get("publicNetworkAccess"),
+            "endpoint": props.get("endpoint")
+        }
+    except Exception:
+        return {
+            "publicNetworkAccess": None,
+            "endpoint": None
+        }
+
+def extract_network_info(
+    resource: Dict,
+    pe_index: Dict[str, List[Dict]] | None = None
+) -> Dict:
+    network = {
+        "publicEndpoint": None,
+        "publicNetworkAccess": None,
+        "vnet": None,
+        "subnet": None,
+        "privateEndpoints": []
+    }
+
+    rid = resource.get("id")
+    name = resource.get("name", "").lower()
+    rtype = resource.get("type")
+
+    if not rid:
+        return network
+
+    # -------------------------------------------------
+    # Public endpoint + network access (Cognitive / OpenAI)
+    # -------------------------------------------------
+
+    # Azure OpenAI accounts (endpoint always exists)
+    if rtype == "Microsoft.CognitiveServices/accounts" and "openai" in name:
+        network["publicEndpoint"] = f"https://{resource['name']}.openai.azure.com"
+        network["publicNetworkAccess"] = "Enabled"  # logical endpoint exists
+
+    # Other Cognitive Services (Content Safety, Language, etc.)
+    elif rtype == "Microsoft.CognitiveServices/accounts":
+        net_access = get_cognitive_network_access(rid)
+        network["publicNetworkAccess"] = net_access.get("publicNetworkAccess")
+
+        # Only set endpoint if public access is enabled
+        if net_access.get("publicNetworkAccess") == "Enabled":
+            network["publicEndpoint"] = net_access.get("endpoint")
+
+    # -------------------------------------------------
+    # Private endpoints (authoritative for VNET / subnet)
+    # -------------------------------------------------
+
+    network.update(private_endpoint_network(rid, pe_index))
+
+    return network
+
+def private_endpoint_network(
+    resource_id: str,
+    pe_index: Dict[str, List[Dict]] | None = None
+) -> Dict:
+    network = {
+        "vnet": None,
+        "subnet": None,
+        "privateEndpoints": []
+    }
+
+    for pe in get_private_endpoints(resource_id, pe_index):
+        subnet_id = (
+            pe.get("properties", {})
+              .get("subnet", {})
+              .get("id")
+        )
+
+        network["privateEndpoints"].append({
+            "name": pe.get("name"),
+            "subnetId": subnet_id
+        })
+
+        if subnet_id:
+            parts = subnet_id.split("/")
+            if "virtualNetworks" in parts and "subnets" in parts:
+                network["vnet"] = parts[parts.index("virtualNetworks") + 1]
+                network["subnet"] = parts[parts.index("subnets") + 1]
+
+    return network
+
+# -------------------------------------------------
+# Enrichment
+# -------------------------------------------------
+
+def enrich_resource(
+    r: Dict,
+    resource_group: str,
+    pe_index: Dict[str, List[Dict]] | None = None
+) -> Dict:
+    name = r.get("name", "<unknown>")
+    rtype = r.get("type", "<unknown>")
+    rid = r.get("id")
+
+    print(f"Processing resource: {name} ({rtype})")
+
+    # Default network structure (always present)
+    net = {
+        "publicEndpoint": None,
+        "vnet": None,
+        "subnet": None,
+        "privateEndpoints": []
+    }
+
+    # Network enrichment is best-effort, never fatal
+    try:
+        if rid:
+            net = extract_network_info(r, pe_index)
+    except Exception as e:
+        print(
+            f"Warning: Failed to extract network info for "
+            f"{name} ({rtype}): {e}"
+        )
+
+    record = enrich_record_fields(r, resource_group)
+    record.update({
+        "publicEndpoint": net.get("publicEndpoint"),
+        "vnet": net.get("vnet"),
+        "subnet": net.get("subnet"),
+        "privateEndpoints": net.get("privateEndpoints", [])
+    })
+    return record
+
+def enrich_record_fields(r: Dict, resource_group: str) -> Dict:
+    return {
+        "name": r.get("name", "<unknown>"),
+        "type": r.get("type", "<unknown>"),
+        "resourceGroup": r.get("resourceGroup", resource_group),
+        "location": r.get("location"),
+        "id": r.get("id"),
+        "tags": r.get("tags", {}),
+        "publicEndpoint": None,
+        "vnet": None,
+        "subnet": None,
+        "privateEndpoints": [],
+        # Change markers for incremental runs
+        "changedTime": r.get("changedTime"),
+        "etag": r.get("etag")
+    }
+
+def iter_enriched(
+    resources: List[Dict],
+    resource_group: str,
+    max_workers: int = INVENTORY_MAX_WORKERS,
+    subscription_id: str | None = None
+) -> Iterator[Dict]:
+    if not resources:
+        return
+
+    # One subscription-wide listing, looked up per resource by exact ID
+    try:
+        pe_index = build_private_endpoint_index(list_private_endpoints(subscription_id))
+    except Exception as e:
+        print(f"Warning: Failed to list private endpoints: {e}")
+        pe_index = {}
+
+    if max_workers <= 1:
+        for r in resources:
+            yield enrich_resource(r, resource_group, pe_index)
+        return
+
+    # Enrichment is I/O bound (one az process per lookup), so a bounded
+    # thread pool is enough. map() yields in input order, which keeps the
+    # output deterministic regardless of completion order.
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        yield from pool.map(
+            lambda r: enrich_resource(r, resource_group, pe_index),
+            resources
+        )
+
+def enrich_resources(
+    resources: List[Dict],
+    resource_group: str,
+    max_workers: int = INVENTORY_MAX_WORKERS,
+    subscription_id: str | None = None
+) -> List[Dict]:
+    return list(iter_enriched(resources, resource_group, max_workers, subscription_id))
+
+# -------------------------------------------------
+# Inventory builds
+# -------------------------------------------------
+
+def build_inventory(
+    resource_group: str,
+    max_workers: int = INVENTORY_MAX_WORKERS,
+    subscription_id: str | None = None
+) -> List[Dict]:
+    if backend() == "graph":
+        from . import arm_client, resource_graph
+        subscription_id = subscription_id or arm_client.get_client().subscription_id
+        return resource_graph.build_inventory([(subscription_id, resource_group)])
+
+    resources = get_resources(resource_group, subscription_id)
+    if not resources:
+        print(f"No resources found in resource group {resource_group}")
+        return []
+
+    return enrich_resources(resources, resource_group, max_workers, subscription_id)
+
+def build_inventory_incremental(
+    resource_group: str,
+    previous_file: str = inventory_incremental.PREVIOUS_INVENTORY_FILE,
+    max_workers: int = INVENTORY_MAX_WORKERS,
+    subscription_id: str | None = None
+) -> Tuple[List[Dict], Dict[str, List[str]]]:
+    previous = inventory_incremental.load_previous_inventory(resource_group, previous_file)
+    # Bypass the cache: a cached listing would hide changedTime/etag updates
+    resources = get_resources(resource_group, subscription_id, use_cache=False) or []
+
+    plan = inventory_incremental.plan_incremental(resources, previous)
+
+    # Only new or changed resources pay for network enrichment
+    stale = {rid.lower() for rid in plan["added"] + plan["modified"]}
+    to_enrich = [r for r in resources if (r.get("id") or "").lower() in stale]
+
+    enriched = {
+        record["id"].lower(): record
+        for record in enrich_resources(to_enrich, resource_group, max_workers, subscription_id)
+    }
+
+    inventory = inventory_incremental.merge_incremental(resources, previous, enriched)
+    return inventory, plan
+
+def build_inventory_streaming(
+    resource_group: str,
+    resume: bool = False,
+    max_workers: int = INVENTORY_MAX_WORKERS
+) -> int:
+    # Each record is appended to NDJSON/CSV as soon as it is enriched;
+    # the files are renamed into place only when the run completes
+    resources = get_resources(resource_group) or []
+    current_ids = [r.get("id") for r in resources]
+
+    with inventory_stream.StreamingInventoryWriter(resume=resume, current_ids=current_ids) as writer:
+        pending = [r for r in resources if not writer.is_recorded(r.get("id"))]
+
+        for record in iter_enriched(pending, resource_group, max_workers):
+            writer.write(record)
+
+        return writer.count
+
+class PipelinedInventory:
+    # Starts enriching resources while azd up is still running: every
+    # module that succeeds hands its resources to the pool right away,
+    # and finish() only has to pick up stragglers and private endpoints.
+    def __init__(
+        self,
+        resource_group: str,
+        subscription_id: str | None = None,
+        max_workers: int = INVENTORY_MAX_WORKERS
+    ):
+        self.resource_group = resource_group
+        self.subscription_id = subscription_id
+        self.pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        self.early: Dict[str, Future] = {}
+        self._rg_marker = f"/resourcegroups/{resource_group.lower()}/providers/"
+
+        # Early enrichment must not see lookups cached before this deploy
+        invalidate_cached(resource_group, subscription_id)
+
+    def _is_inventoried(self, resource: Dict) -> bool:
+        # Top-level resources of the target RG only, as `resource list`
+        # returns; nested module deployments look top-level but are not listed
+        from .deployment_monitor import DEPLOYMENT_TYPE
+
+        rid = (resource.get("id") or "").lower()
+        rtype = resource.get("type") or ""
+        return (
+            resource.get("state") == "Succeeded"
+            and self._rg_marker in rid
+            and rtype.count("/") == 1
+            and rtype.lower() != DEPLOYMENT_TYPE.lower()
+        )
+
+    def on_module_succeeded(self, module: Dict):
+        # Called from the monitor's event loop, so only submit work here
+        started = 0
+        for r in module.get("resources", []):
+            key = (r.get("id") or "").lower()
+            if not self._is_inventoried(r) or key in self.early:
+                continue
+
+            # Private endpoints are usually created by later modules, so
+            # they are resolved in finish() against a fresh listing
+            self.early[key] = self.pool.submit(enrich_resource, r, self.resource_group, {})
+            started += 1
+
+        if started:
+            print(f"[pipeline] {module['name']}: enriching {started} resource(s) early")
+
+    def _complete(self, r: Dict, pe_index: Dict[str, List[Dict]]) -> Dict:
+        rid = r.get("id") or ""
+        future = self.early.get(rid.lower())
+        if future is None:
+            return enrich_resource(r, self.resource_group, pe_index)
+
+        try:
+            early = future.result()
+        except Exception as e:
+            print(f"Warning: Early enrichment failed for {r.get('name')}: {e}")
+            return enrich_resource(r, self.resource_group, pe_index)
+
+        # Listing fields are authoritative; only the network lookups are reused
+        record = enrich_record_fields(r, self.resource_group)
+        record["publicEndpoint"] = early["publicEndpoint"]
+        record.update(private_endpoint_network(rid, pe_index))
+        return record
+
+    def finish(self) -> List[Dict]:
+        try:
+            # Bypass the cache: the RG changed under any earlier listing
+            resources = get_resources(
+                self.resource_group, self.subscription_id, use_cache=False
+            ) or []
+            if not resources:
+                print(f"No resources found in resource group {self.resource_group}")
+                return []
+
+            try:
+                pe_index = build_private_endpoint_index(
+                    list_private_endpoints(self.subscription_id)
+                )
+            except Exception as e:
+                print(f"Warning: Failed to list private endpoints: {e}")
+                pe_index = {}
+
+            reused = sum(1 for r in resources if (r.get("id") or "").lower() in self.early)
+            print(f"[pipeline] {reused}/{len(resources)} resources enriched during provisioning")
+
+            return list(self.pool.map(lambda r: self._complete(r, pe_index), resources))
+        finally:
+            self.close()
+
+    def close(self):
+        # Idempotent; queued early enrichments are dropped, running ones
+        # are waited for
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "PipelinedInventory":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# -------------------------------------------------
+# Outputs
+# -------------------------------------------------
+
+def write_outputs(inventory: List[Dict], resource_group: str):
+    with open("resources_inventory.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "generatedAt": datetime.utcnow().isoformat() + "Z",
+            "resourceGroup": resource_group,
+            "resources": inventory
+        }, f, indent=2)
+
+    with open("resources_inventory.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(
+            f,
+            fieldnames=[
+                "name", "type", "resourceGroup", "location",
+                "publicEndpoint", "vnet", "subnet"
+            ]
+        )
+        writer.writeheader()
+        for r in inventory:
+            writer.writerow({
+                "name": r["name"],
+                "type": r["type"],
+                "resourceGroup": r["resourceGroup"],
+                "location": r["location"],
+                "publicEndpoint": r["publicEndpoint"],
+                "vnet": r["vnet"],
+                "subnet": r["subnet"]
+            })
@@ -0,0 +1,183 @@
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+COLUMNAR_OUTPUT_DIR = "inventory_columnar"
+TAG_COLUMN_PREFIX = "tag."
+
+RESOURCE_COLUMNS = [
+    "generatedAt", "resourceGroup", "name", "type", "location", "id",
+    "publicEndpoint", "vnet", "subnet", "privateEndpointCount"
+]
+PRIVATE_ENDPOINT_COLUMNS = [
+    "generatedAt", "resourceId", "name", "subnetId", "vnet", "subnet"
+]
+
+
+def _require_pyarrow():
+    # pyarrow is optional and only imported when a columnar export is
+    # requested, so the default JSON/CSV path does not pay for it
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.feather
+    except ImportError as e:
+        raise RuntimeError(
+            "Columnar export requires pyarrow (pip install pyarrow)"
+        ) from e
+    return pyarrow
+
+
+# -------------------------------------------------
+# Snapshot loading
+# -------------------------------------------------
+
+def load_snapshot(path: str) -> Tuple[str | None, List[Dict]]:
+    # resources_inventory.json, fleet_inventory.json or streamed NDJSON
+    p = Path(path)
+
+    if p.suffix == ".ndjson":
+        with open(p, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        # NDJSON carries no header; the file time stands in for generatedAt
+        generated_at = datetime.utcfromtimestamp(p.stat().st_mtime).isoformat() + "Z"
+        return generated_at, records
+
+    with open(p, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+
+    if "scopes" in doc:
+        records = [r for section in doc["scopes"] for r in section["resources"]]
+    else:
+        records = doc.get("resources", [])
+
+    return doc.get("generatedAt"), records
+
+
+# -------------------------------------------------
+# Flattening
+# -------------------------------------------------
+
+def _vnet_subnet(subnet_id: str | None) -> Tuple[str | None, str | None]:
+    if not subnet_id:
+        return None, None
+    parts = subnet_id.split("/")
+    if "virtualNetworks" in parts and "subnets" in parts:
+        return (
+            parts[parts.index("virtualNetworks") + 1],
+            parts[parts.index("subnets") + 1]
+        )
+    return None, None
+
+
+def flatten_resources(records: List[Dict], generated_at: str | None) -> Dict[str, List]:
+    tag_keys = sorted({k for r in records for k in (r.get("tags") or {})})
+
+    columns: Dict[str, List] = {c: [] for c in RESOURCE_COLUMNS}
+    for key in tag_keys:
+        columns[TAG_COLUMN_PREFIX + key] = []
+
+    for r in records:
+        columns["generatedAt"].append(generated_at)
+        for c in RESOURCE_COLUMNS[1:-1]:
+            columns[c].append(r.get(c))
+        columns["privateEndpointCount"].append(len(r.get("privateEndpoints") or []))
+
+        tags = r.get("tags") or {}
+        for key in tag_keys:
+            columns[TAG_COLUMN_PREFIX + key].append(tags.get(key))
+
+    return columns
+
+
+def explode_private_endpoints(records: List[Dict], generated_at: str | None) -> Dict[str, List]:
+    columns: Dict[str, List] = {c: [] for c in PRIVATE_ENDPOINT_COLUMNS}
+
+    for r in records:
+        for pe in r.get("privateEndpoints") or []:
+            vnet, subnet = _vnet_subnet(pe.get("subnetId"))
+            columns["generatedAt"].append(generated_at)
+            columns["resourceId"].append(r.get("id"))
+            columns["name"].append(pe.get("name"))
+            columns["subnetId"].append(pe.get("subnetId"))
+            columns["vnet"].append(vnet)
+            columns["subnet"].append(subnet)
+
+    return columns
+
+
+# -------------------------------------------------
+# Writers
+# -------------------------------------------------
+
+def _partition_dir(out_dir: Path, table: str, generated_at: str | None) -> Path:
+    # Hive-style partition; ':' is not valid in Windows paths
+    value = (generated_at or "unknown").replace(":", "")
+    return out_dir / table / f"generatedAt={value}"
+
+
+def _write_table(pa, columns: Dict[str, List], path: Path, fmt: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    arrays = {}
+    for name, values in columns.items():
+        arrow_type = pa.int32() if name == "privateEndpointCount" else pa.string()
+        arrays[name] = pa.array(values, type=arrow_type)
+    table = pa.table(arrays)
+
+    if fmt == "parquet":
+        pa.parquet.write_table(table, path)
+    else:
+        pa.feather.write_feather(table, path)
+
+
+def export_snapshot(
+    path: str,
+    out_dir: str = COLUMNAR_OUTPUT_DIR,
+    fmt: str = "parquet"
+) -> Path:
+    pa = _require_pyarrow()
+
+    generated_at, records = load_snapshot(path)
+    suffix = "parquet" if fmt == "parquet" else "arrow"
+    root = Path(out_dir)
+
+    resources_dir = _partition_dir(root, "resources", generated_at)
+    _write_table(
+        pa,
+        flatten_resources(records, generated_at),
+        resources_dir / f"part-0.{suffix}",
+        fmt
+    )
+
+    _write_table(
+        pa,
+        explode_private_endpoints(records, generated_at),
+        _partition_dir(root, "private_endpoints", generated_at) / f"part-0.{suffix}",
+        fmt
+    )
+
+    print(f"Exported {len(records)} resources from {path} to {resources_dir}")
+    return resources_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export inventory snapshots to partitioned Parquet/Arrow tables"
+    )
+    parser.add_argument("snapshots", nargs="+", help="Inventory JSON/NDJSON files")
+    parser.add_argument("--out", default=COLUMNAR_OUTPUT_DIR, help="Output directory")
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    args = parser.parse_args()
+
+    for path in args.snapshots:
+        export_snapshot(path, args.out, args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+PREVIOUS_INVENTORY_FILE = "resources_inventory.json"
+CHANGE_REPORT_FILE = "resources_inventory_changes.json"
+
+PRIVATE_ENDPOINT_TYPE = "microsoft.network/privateendpoints"
+
+
+# -------------------------------------------------
+# Previous snapshot
+# -------------------------------------------------
+
+def load_previous_inventory(
+    resource_group: str,
+    path: str = PREVIOUS_INVENTORY_FILE
+) -> List[Dict]:
+    p = Path(path)
+    if not p.exists():
+        return []
+
+    try:
+        with open(p, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: Ignoring unreadable previous inventory {path}: {e}")
+        return []
+
+    if (doc.get("resourceGroup") or "").lower() != resource_group.lower():
+        return []
+
+    return doc.get("resources", [])
+
+
+def fingerprint(item: Dict) -> str | None:
+    # changedTime comes from the resource list; etag is used where the
+    # provider returns one. Without either a resource is always re-enriched.
+    if not item.get("changedTime") and not item.get("etag"):
+        return None
+    return f"{item.get('changedTime')}|{item.get('etag')}"
+
+
+# -------------------------------------------------
+# Diff
+# -------------------------------------------------
+
+def rid_type(resource_id: str) -> str:
+    parts = resource_id.lower().split("/")
+    if "providers" not in parts:
+        return ""
+    i = parts.index("providers")
+    return "/".join(parts[i + 1:i + 3])
+
+
+def plan_incremental(resources: List[Dict], previous: List[Dict]) -> Dict[str, List[str]]:
+    previous_by_id = {
+        r["id"].lower(): r for r in previous if r.get("id")
+    }
+    current_ids = set()
+
+    plan = {
+        "added": [],
+        "modified": [],
+        "unchanged": [],
+        "removed": []
+    }
+
+    for r in resources:
+        rid = (r.get("id") or "").lower()
+        if not rid:
+            continue
+        current_ids.add(rid)
+
+        old = previous_by_id.get(rid)
+        if old is None:
+            plan["added"].append(r["id"])
+        elif fingerprint(r) is None or fingerprint(r) != fingerprint(old):
+            plan["modified"].append(r["id"])
+        else:
+            plan["unchanged"].append(r["id"])
+
+    plan["removed"] = [
+        old["id"] for rid, old in previous_by_id.items()
+        if rid not in current_ids
+    ]
+
+    # Network info lives on the target resource's record, but a private
+    # endpoint being added/changed/removed only bumps the endpoint's own
+    # changedTime. Any such change invalidates every cached record.
+    pe_changed = any(
+        rid_type(rid) == PRIVATE_ENDPOINT_TYPE
+        for rid in plan["added"] + plan["modified"] + plan["removed"]
+    )
+    if pe_changed:
+        plan["modified"].extend(plan["unchanged"])
+        plan["unchanged"] = []
+
+    return plan
+
+
+def merge_incremental(
+    resources: List[Dict],
+    previous: List[Dict],
+    enriched: Dict[str, Dict]
+) -> List[Dict]:
+    # Output follows the current listing order; each record is either the
+    # freshly enriched one or the previous record carried over unchanged
+    previous_by_id = {
+        r["id"].lower(): r for r in previous if r.get("id")
+    }
+
+    inventory: List[Dict] = []
+    for r in resources:
+        rid = (r.get("id") or "").lower()
+        record = enriched.get(rid) or previous_by_id.get(rid)
+        if record is not None:
+            inventory.append(record)
+
+    return inventory
+
+
+# -------------------------------------------------
+# Change report
+# -------------------------------------------------
+
+def has_changes(plan: Dict[str, List[str]]) -> bool:
+    return bool(plan["added"] or plan["modified"] or plan["removed"])
+
+
+def write_change_report(
+    plan: Dict[str, List[str]],
+    resource_group: str,
+    path: str = CHANGE_REPORT_FILE
+):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "generatedAt": datetime.utcnow().isoformat() + "Z",
+            "resourceGroup": resource_group,
+            "added": plan["added"],
+            "removed": plan["removed"],
+            "modified": plan["modified"],
+            "unchangedCount": len(plan["unchanged"])
+        }, f, indent=2)
+
+    print(
+        f"Inventory changes: {len(plan['added'])} added, "
+        f"{len(plan['removed'])} removed, "
+        f"{len(plan['modified'])} modified, "
+        f"{len(plan['unchanged'])} unchanged"
+    )
@@ -0,0 +1,201 @@
+import argparse
+import csv
+import json
+import sys
+from typing import Dict, Iterable, List, Set
+
+from .inventory_columnar import load_snapshot
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+TABLE_COLUMNS = [
+    "name", "type", "resourceGroup", "location",
+    "publicEndpoint", "vnet", "subnet"
+]
+
+# public:       a public endpoint is recorded
+# private:      at least one private endpoint
+# public-only:  public endpoint and no private endpoint
+# isolated:     neither
+EXPOSURES = ("public", "private", "public-only", "isolated")
+
+
+def exposure_of(record: Dict) -> Set[str]:
+    public = bool(record.get("publicEndpoint"))
+    private = bool(record.get("privateEndpoints"))
+
+    labels = set()
+    if public:
+        labels.add("public")
+    if private:
+        labels.add("private")
+    if public and not private:
+        labels.add("public-only")
+    if not public and not private:
+        labels.add("isolated")
+    return labels
+
+
+# -------------------------------------------------
+# Index
+# -------------------------------------------------
+
+class InventoryIndex:
+    def __init__(self, records: List[Dict]):
+        self.records = records
+
+        # Each index maps a lower-cased key to the positions of the
+        # matching records, so a query is a handful of set intersections
+        self.by_type: Dict[str, Set[int]] = {}
+        self.by_location: Dict[str, Set[int]] = {}
+        self.by_resource_group: Dict[str, Set[int]] = {}
+        self.by_vnet: Dict[str, Set[int]] = {}
+        self.by_subnet: Dict[str, Set[int]] = {}
+        self.by_tag: Dict[str, Set[int]] = {}
+        self.by_exposure: Dict[str, Set[int]] = {e: set() for e in EXPOSURES}
+
+        for i, r in enumerate(records):
+            self._add(self.by_type, r.get("type"), i)
+            self._add(self.by_location, r.get("location"), i)
+            self._add(self.by_resource_group, r.get("resourceGroup"), i)
+            self._add(self.by_vnet, r.get("vnet"), i)
+            if r.get("vnet") and r.get("subnet"):
+                self._add(self.by_subnet, f"{r['vnet']}/{r['subnet']}", i)
+
+            # Tags are indexed both as "key" and "key=value"
+            for key, value in (r.get("tags") or {}).items():
+                self._add(self.by_tag, key, i)
+                self._add(self.by_tag, f"{key}={value}", i)
+
+            for e in exposure_of(r):
+                self.by_exposure[e].add(i)
+
+    @staticmethod
+    def _add(index: Dict[str, Set[int]], key: str | None, position: int):
+        if key:
+            index.setdefault(key.lower(), set()).add(position)
+
+    @classmethod
+    def from_snapshots(cls, paths: Iterable[str]) -> "InventoryIndex":
+        records: List[Dict] = []
+        for path in paths:
+            records.extend(load_snapshot(path)[1])
+        return cls(records)
+
+    @staticmethod
+    def _union(index: Dict[str, Set[int]], keys: List[str]) -> Set[int]:
+        # Several values for the same filter are OR-ed
+        result: Set[int] = set()
+        for key in keys:
+            result |= index.get(key.lower(), set())
+        return result
+
+    def query(
+        self,
+        types: List[str] | None = None,
+        locations: List[str] | None = None,
+        resource_groups: List[str] | None = None,
+        vnets: List[str] | None = None,
+        subnets: List[str] | None = None,
+        tags: List[str] | None = None,
+        exposure: str | None = None
+    ) -> List[Dict]:
+        candidates: List[Set[int]] = []
+
+        for index, keys in (
+            (self.by_type, types),
+            (self.by_location, locations),
+            (self.by_resource_group, resource_groups),
+            (self.by_vnet, vnets),
+            (self.by_subnet, subnets),
+        ):
+            if keys:
+                candidates.append(self._union(index, keys))
+
+        # Different tags are AND-ed
+        for tag in tags or []:
+            candidates.append(self.by_tag.get(tag.lower(), set()))
+
+        if exposure:
+            candidates.append(self.by_exposure[exposure])
+
+        if not candidates:
+            return list(self.records)
+
+        # Intersect smallest first
+        candidates.sort(key=len)
+        matched = set(candidates[0])
+        for c in candidates[1:]:
+            matched &= c
+            if not matched:
+                break
+
+        return [self.records[i] for i in sorted(matched)]
+
+
+# -------------------------------------------------
+# Output
+# -------------------------------------------------
+
+def print_table(records: List[Dict]):
+    rows = [[str(r.get(c) or "") for c in TABLE_COLUMNS] for r in records]
+    widths = [
+        max([len(c)] + [len(row[i]) for row in rows])
+        for i, c in enumerate(TABLE_COLUMNS)
+    ]
+
+    print("  ".join(c.ljust(w) for c, w in zip(TABLE_COLUMNS, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+    print(f"\n{len(records)} resource(s)")
+
+
+def write_results(records: List[Dict], fmt: str):
+    if fmt == "json":
+        json.dump(records, sys.stdout, indent=2)
+        print()
+    elif fmt == "csv":
+        writer = csv.DictWriter(sys.stdout, fieldnames=TABLE_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for r in records:
+            writer.writerow(r)
+    else:
+        print_table(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Query inventory snapshots (resources_inventory.json, fleet_inventory.json, NDJSON)"
+    )
+    parser.add_argument("snapshots", nargs="+", help="Inventory files to load")
+    parser.add_argument("--type", action="append", dest="types", help="Resource type (repeatable)")
+    parser.add_argument("--location", action="append", dest="locations")
+    parser.add_argument("--resource-group", action="append", dest="resource_groups")
+    parser.add_argument("--vnet", action="append", dest="vnets")
+    parser.add_argument("--subnet", action="append", dest="subnets", metavar="VNET/SUBNET")
+    parser.add_argument(
+        "--tag", action="append", dest="tags", metavar="KEY[=VALUE]",
+        help="Tag key or key=value (repeatable, all must match)"
+    )
+    parser.add_argument("--exposure", choices=EXPOSURES)
+    parser.add_argument("--format", choices=["table", "json", "csv"], default="table")
+    args = parser.parse_args()
+
+    index = InventoryIndex.from_snapshots(args.snapshots)
+    results = index.query(
+        types=args.types,
+        locations=args.locations,
+        resource_groups=args.resource_groups,
+        vnets=args.vnets,
+        subnets=args.subnets,
+        tags=args.tags,
+        exposure=args.exposure
+    )
+    write_results(results, args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+NDJSON_FILE = "resources_inventory.ndjson"
+CSV_FILE = "resources_inventory.csv"
+PARTIAL_SUFFIX = ".partial"
+
+CSV_FIELDS = [
+    "name", "type", "resourceGroup", "location",
+    "publicEndpoint", "vnet", "subnet"
+]
+
+
+# -------------------------------------------------
+# Partial file recovery
+# -------------------------------------------------
+
+def read_partial_records(path: Path) -> List[Dict]:
+    # A crash can leave a half-written last line; keep only the records
+    # up to the last newline
+    if not path.exists():
+        return []
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    end = data.rfind(b"\n") + 1
+    records = []
+    for line in data[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            break
+    return records
+
+
+# -------------------------------------------------
+# Writer
+# -------------------------------------------------
+
+class StreamingInventoryWriter:
+    def __init__(
+        self,
+        ndjson_path: str = NDJSON_FILE,
+        csv_path: str = CSV_FILE,
+        resume: bool = False,
+        current_ids: Iterable[str] | None = None
+    ):
+        self.ndjson_path = Path(ndjson_path)
+        self.csv_path = Path(csv_path)
+        self.ndjson_partial = Path(ndjson_path + PARTIAL_SUFFIX)
+        self.csv_partial = Path(csv_path + PARTIAL_SUFFIX)
+
+        self.recorded_ids: Set[str] = set()
+        previous: List[Dict] = []
+
+        if resume:
+            previous = read_partial_records(self.ndjson_partial)
+            if current_ids is not None:
+                # Resources deleted since the interrupted run are dropped
+                current = {rid.lower() for rid in current_ids if rid}
+                kept = [r for r in previous if (r.get("id") or "").lower() in current]
+                if len(kept) < len(previous):
+                    print(f"Resuming inventory: dropping {len(previous) - len(kept)} resources no longer listed")
+                previous = kept
+            self.recorded_ids = {
+                r["id"].lower() for r in previous if r.get("id")
+            }
+
+        # Re-write the complete records so a torn last line is dropped
+        self._ndjson = open(self.ndjson_partial, "w", encoding="utf-8")
+        for r in previous:
+            self._ndjson.write(json.dumps(r) + "\n")
+
+        # The CSV is always rebuilt from the NDJSON records so both stay
+        # consistent after a resume
+        self._csv_file = open(self.csv_partial, "w", newline="", encoding="utf-8")
+        self._csv = csv.DictWriter(self._csv_file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        self._csv.writeheader()
+        for r in previous:
+            self._csv.writerow(r)
+
+        self.count = len(previous)
+        self._flush()
+
+        if previous:
+            print(f"Resuming inventory: {len(previous)} resources already recorded")
+
+    def is_recorded(self, resource_id: str | None) -> bool:
+        return bool(resource_id) and resource_id.lower() in self.recorded_ids
+
+    def write(self, record: Dict):
+        self._ndjson.write(json.dumps(record) + "\n")
+        self._csv.writerow(record)
+        self._flush()
+
+        if record.get("id"):
+            self.recorded_ids.add(record["id"].lower())
+        self.count += 1
+
+    def _flush(self):
+        self._ndjson.flush()
+        self._csv_file.flush()
+
+    def close(self, commit: bool = True):
+        for f in (self._ndjson, self._csv_file):
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+
+        # Partial files are only promoted once the run completed; an
+        # interrupted run leaves them in place for --resume
+        if commit:
+            os.replace(self.ndjson_partial, self.ndjson_path)
+            os.replace(self.csv_partial, self.csv_path)
+            print(f"Wrote {self.count} resources to {self.ndjson_path} and {self.csv_path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(commit=exc_type is None)
+        return False
@@ -0,0 +1,384 @@
+import argparse
+import asyncio
+import contextlib
+import copy
+import itertools
+import json
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from .gateway import (
+    CHAT_PATH, DEFAULT_MAX_TOKENS, DEFAULT_PROMPT, OPENAI_API_VERSION,
+    chat_payload, chat_url, post_chat
+)
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+REQUEST_TIMEOUT = 60
+
+PERCENTILES = (50, 95, 99)
+
+# Connections per httpx client. httpcore's pool scans every connection
+# for every queued request, so one large pool collapses under load; the
+# pool is split across several small clients instead.
+CONNECTIONS_PER_CLIENT = 8
+
+
+def require_httpx(http2: bool):
+    # httpx (and h2 for HTTP/2) is optional and only imported when a load
+    # run starts, so the smoke tests do not depend on it
+    try:
+        import httpx
+        if http2:
+            import h2  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError(
+            "Load generation requires httpx (pip install httpx, "
+            "or 'httpx[http2]' for --http2)"
+        ) from e
+    return httpx
+
+
+# -------------------------------------------------
+# Requests and samples
+# -------------------------------------------------
+
+def parse_key(text: str) -> Tuple[str, str]:
+    # LABEL=KEY, or a bare key labelled by its last four characters
+    label, sep, key = text.partition("=")
+    if not sep:
+        return f"...{text[-4:]}", text
+    if not label or not key:
+        raise ValueError(f"Invalid key '{text}', expected LABEL=KEY")
+    return label, key
+
+
+class Sample:
+    __slots__ = ("key", "status", "latency", "total_tokens", "completion_tokens", "error")
+
+    def __init__(
+        self,
+        key: str,
+        status: int | None,
+        latency: float,
+        total_tokens: int = 0,
+        completion_tokens: int = 0,
+        error: str | None = None
+    ):
+        self.key = key
+        self.status = status
+        self.latency = latency
+        self.total_tokens = total_tokens
+        self.completion_tokens = completion_tokens
+        self.error = error
+
+
+class LoadConfig:
+    # rps set = open loop (fixed arrival rate); otherwise closed loop with
+    # `users` virtual users
+    def __init__(
+        self,
+        url: str,
+        keys: List[Tuple[str, str]],
+        payload: Dict,
+        duration: float = 30.0,
+        rps: float | None = None,
+        users: int = 1,
+        think_time: float = 0.0,
+        max_in_flight: int = 256,
+        pool_size: int = 64,
+        http2: bool = False,
+        timeout: float = REQUEST_TIMEOUT
+    ):
+        self.url = url
+        self.keys = keys
+        self.payload = payload
+        self.duration = duration
+        self.rps = rps
+        self.users = users
+        self.think_time = think_time
+        self.max_in_flight = max_in_flight
+        self.pool_size = pool_size
+        self.http2 = http2
+        self.timeout = timeout
+
+
+# -------------------------------------------------
+# Load generation
+# -------------------------------------------------
+
+async def _send(client, config: LoadConfig, label: str, key: str, started: float) -> Sample:
+    # `started` is when the request was due; in open-loop mode time spent
+    # waiting for a free slot counts as latency (no coordinated omission)
+    try:
+        r = await post_chat(client, config.url, key, config.payload)
+    except Exception as e:
+        return Sample(label, None, time.perf_counter() - started, error=type(e).__name__)
+
+    latency = time.perf_counter() - started
+    if r.status_code != 200:
+        return Sample(label, r.status_code, latency)
+
+    try:
+        usage = r.json().get("usage") or {}
+    except ValueError:
+        usage = {}
+    return Sample(
+        label, 200, latency,
+        usage.get("total_tokens", 0),
+        usage.get("completion_tokens", 0)
+    )
+
+
+async def _open_loop(clients, config: LoadConfig, keys, samples: List[Sample]):
+    # Arrivals on a fixed schedule, independent of how fast responses come
+    slots = asyncio.Semaphore(config.max_in_flight)
+    tasks = []
+    start = time.perf_counter()
+    rotation = itertools.cycle(clients)
+
+    async def one(label, key, due):
+        client = next(rotation)
+        async with slots:
+            samples.append(await _send(client, config, label, key, due))
+
+    for i in itertools.count():
+        due = start + i / config.rps
+        if due - start >= config.duration:
+            break
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        label, key = next(keys)
+        tasks.append(asyncio.create_task(one(label, key, due)))
+
+    await asyncio.gather(*tasks)
+
+
+async def _closed_loop(clients, config: LoadConfig, keys, samples: List[Sample]):
+    # N virtual users, each waiting for its response before the next call
+    end = time.perf_counter() + config.duration
+
+    async def user(client):
+        while time.perf_counter() < end:
+            label, key = next(keys)
+            samples.append(
+                await _send(client, config, label, key, time.perf_counter())
+            )
+            if config.think_time:
+                await asyncio.sleep(config.think_time)
+
+    await asyncio.gather(*(user(clients[i % len(clients)]) for i in range(config.users)))
+
+
+async def _generate(config: LoadConfig) -> Tuple[List[Sample], float]:
+    httpx = require_httpx(config.http2)
+    keys = itertools.cycle(config.keys)
+    samples: List[Sample] = []
+
+    per_client = min(config.pool_size, CONNECTIONS_PER_CLIENT)
+    limits = httpx.Limits(max_connections=per_client, max_keepalive_connections=per_client)
+
+    async with contextlib.AsyncExitStack() as stack:
+        clients = [
+            await stack.enter_async_context(
+                httpx.AsyncClient(http2=config.http2, limits=limits, timeout=config.timeout)
+            )
+            for _ in range(math.ceil(config.pool_size / per_client))
+        ]
+
+        started = time.perf_counter()
+        if config.rps:
+            await _open_loop(clients, config, keys, samples)
+        else:
+            await _closed_loop(clients, config, keys, samples)
+        elapsed = time.perf_counter() - started
+
+    return samples, elapsed
+
+
+def _worker(config: LoadConfig) -> Tuple[List[Sample], float]:
+    return asyncio.run(_generate(config))
+
+
+def _share(config: LoadConfig, index: int, processes: int) -> LoadConfig:
+    # This worker's slice of the rate, users, connections and in-flight cap
+    share = copy.copy(config)
+    if config.rps:
+        share.rps = config.rps / processes
+    share.users = config.users // processes + (1 if index < config.users % processes else 0)
+    share.pool_size = math.ceil(config.pool_size / processes)
+    share.max_in_flight = math.ceil(config.max_in_flight / processes)
+    return share
+
+
+def run_load(config: LoadConfig, processes: int = 1) -> Dict:
+    # One event loop tops out around a thousand requests per second of
+    # httpx overhead; beyond that the load is split across processes and
+    # their samples merged
+    require_httpx(config.http2)
+
+    if processes <= 1:
+        samples, elapsed = asyncio.run(_generate(config))
+        return summarize(samples, elapsed)
+
+    shares = [_share(config, i, processes) for i in range(processes)]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        results = list(pool.map(_worker, shares))
+
+    samples = [s for worker_samples, _ in results for s in worker_samples]
+    return summarize(samples, max(elapsed for _, elapsed in results))
+
+
+# -------------------------------------------------
+# Statistics
+# -------------------------------------------------
+
+def percentile(sorted_values: List[float], p: float) -> float | None:
+    # Nearest-rank, so reported values are latencies that actually occurred
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _stats(samples: List[Sample], elapsed: float) -> Dict:
+    ok = [s for s in samples if s.status == 200]
+    latencies = sorted(s.latency for s in ok)
+    throttled = sum(1 for s in samples if s.status == 429)
+
+    return {
+        "requests": len(samples),
+        "ok": len(ok),
+        "throttled": throttled,
+        "errors": len(samples) - len(ok) - throttled,
+        "throttleRate": throttled / len(samples) if samples else 0.0,
+        "throughput": len(ok) / elapsed if elapsed else 0.0,
+        "latency": {f"p{p}": percentile(latencies, p) for p in PERCENTILES},
+        "tokensPerSecond": sum(s.total_tokens for s in ok) / elapsed if elapsed else 0.0,
+        "completionTokensPerSecond": (
+            sum(s.completion_tokens for s in ok) / elapsed if elapsed else 0.0
+        )
+    }
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict:
+    by_key: Dict[str, List[Sample]] = {}
+    for s in samples:
+        by_key.setdefault(s.key, []).append(s)
+
+    statuses: Dict[str, int] = {}
+    for s in samples:
+        status = str(s.status) if s.status is not None else s.error
+        statuses[status] = statuses.get(status, 0) + 1
+
+    return {
+        "elapsed": elapsed,
+        "total": _stats(samples, elapsed),
+        "keys": {label: _stats(items, elapsed) for label, items in sorted(by_key.items())},
+        "statuses": statuses
+    }
+
+
+# -------------------------------------------------
+# Report
+# -------------------------------------------------
+
+def _ms(value: float | None) -> str:
+    return f"{value * 1000:.0f}" if value is not None else "-"
+
+
+def print_summary(summary: Dict):
+    print(f"\nDuration: {summary['elapsed']:.1f}s")
+    print("Status codes: " + ", ".join(
+        f"{status}={count}" for status, count in sorted(summary["statuses"].items())
+    ))
+    print()
+    print(
+        f"{'Key':<20} {'Req':>7} {'OK':>7} {'429%':>6} {'Req/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Tok/s':>9}"
+    )
+
+    rows = list(summary["keys"].items())
+    if len(rows) > 1:
+        rows.append(("TOTAL", summary["total"]))
+
+    for label, s in rows:
+        latency = s["latency"]
+        print(
+            f"{label:<20} {s['requests']:>7} {s['ok']:>7} "
+            f"{s['throttleRate'] * 100:>5.1f}% {s['throughput']:>8.1f} "
+            f"{_ms(latency['p50']):>8} {_ms(latency['p95']):>8} {_ms(latency['p99']):>8} "
+            f"{s['tokensPerSecond']:>9.1f}"
+        )
+
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load-test the APIM chat completions path"
+    )
+    parser.add_argument("gateway", help="Gateway base URL (e.g. https://<apim>.azure-api.net)")
+    parser.add_argument(
+        "--key", action="append", dest="keys", required=True, metavar="[LABEL=]KEY",
+        help="APIM product subscription key (repeatable; requests rotate across keys)"
+    )
+    parser.add_argument("--chat-path", default=CHAT_PATH)
+    parser.add_argument("--api-version", default=OPENAI_API_VERSION)
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT)
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS)
+
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--rps", type=float, help="Open loop: fixed arrival rate")
+    mode.add_argument("--users", type=int, default=1, help="Closed loop: concurrent virtual users")
+
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to generate load")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Closed loop pause between calls")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open loop cap on outstanding requests")
+    parser.add_argument("--pool-size", type=int, default=64, help="Pooled connections")
+    parser.add_argument("--http2", action="store_true", help="Negotiate HTTP/2 (needs httpx[http2])")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT)
+    parser.add_argument(
+        "--processes", type=int, default=1,
+        help="Worker processes sharing the load (for more than ~1000 req/s)"
+    )
+    parser.add_argument("--json", metavar="PATH", help="Also write the summary as JSON")
+    args = parser.parse_args()
+
+    config = LoadConfig(
+        url=chat_url(args.gateway, args.chat_path, args.api_version),
+        keys=[parse_key(k) for k in args.keys],
+        payload=chat_payload(args.prompt, args.max_tokens),
+        duration=args.duration,
+        rps=args.rps,
+        users=args.users,
+        think_time=args.think_time,
+        max_in_flight=args.max_in_flight,
+        pool_size=args.pool_size,
+        http2=args.http2,
+        timeout=args.timeout
+    )
+
+    if config.rps:
+        print(f"Open loop: {config.rps:g} req/s for {config.duration:g}s")
+    else:
+        print(f"Closed loop: {config.users} users for {config.duration:g}s")
+
+    summary = run_load(config, args.processes)
+    print_summary(summary)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nSummary written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
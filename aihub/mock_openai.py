@@ -0,0 +1,696 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .backend_routing import Route, RoutingAttempt, RoutingTable, build_tables, clusters_from_config
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8400
+
+# Served routes, as in oai-api-spec-2024-10-21.yaml (relative to /openai)
+ROUTE_PATTERN = re.compile(r"^(?:/openai)?/deployments/([^/]+)/(chat/completions|embeddings)$")
+
+# Header names APIM accepts a subscription key from
+KEY_HEADERS = ("ocp-apim-subscription-key", "api-key")
+
+DEFAULT_COMPLETION_TOKENS = 16
+DEFAULT_EMBEDDING_DIMENSIONS = 1536
+
+# Seconds of Retry-After sent with throttled responses when no limit
+# window applies (injected throttling)
+DEFAULT_RETRY_AFTER = 10
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 401: "Access Denied", 404: "Not Found",
+    405: "Method Not Allowed", 429: "Too Many Requests",
+    500: "Internal Server Error", 503: "Service Unavailable"
+}
+
+
+# -------------------------------------------------
+# Latency distributions
+# -------------------------------------------------
+
+def parse_latency(spec: str):
+    # const:MS | uniform:LOW,HIGH | normal:MEAN,SD | lognormal:MEDIAN,SIGMA
+    # Returns a sampler giving seconds.
+    kind, _, args = spec.partition(":")
+    try:
+        values = [float(v) for v in args.split(",")] if args else []
+        if kind == "const" and len(values) == 1:
+            ms = values[0]
+            return lambda: ms / 1000
+        if kind == "uniform" and len(values) == 2:
+            low, high = values
+            return lambda: random.uniform(low, high) / 1000
+        if kind == "normal" and len(values) == 2:
+            mean, sd = values
+            return lambda: max(0.0, random.gauss(mean, sd)) / 1000
+        if kind == "lognormal" and len(values) == 2:
+            mu, sigma = math.log(values[0]), values[1]
+            return lambda: random.lognormvariate(mu, sigma) / 1000
+    except ValueError:
+        pass
+    raise ValueError(
+        f"Invalid latency '{spec}', expected const:MS, uniform:LOW,HIGH, "
+        f"normal:MEAN,SD or lognormal:MEDIAN,SIGMA"
+    )
+
+
+# -------------------------------------------------
+# Rate limits
+# -------------------------------------------------
+
+class RateLimiter:
+    # Per-minute budget refilled continuously, like Azure OpenAI TPM/RPM
+    # quotas. A limit of 0 disables it. `now` is on the caller's clock
+    # (time.monotonic by default, virtual time in simulations).
+    def __init__(self, per_minute: int, now: float | None = None):
+        self.per_minute = per_minute
+        self.available = float(per_minute)
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float):
+        rate = self.per_minute / 60
+        self.available = min(self.per_minute, self.available + (now - self.updated) * rate)
+        self.updated = now
+
+    def check(self, amount: int, now: float) -> float:
+        # 0 when `amount` fits now, otherwise seconds until it would
+        if not self.per_minute:
+            return 0.0
+        self._refill(now)
+        if amount <= self.available:
+            return 0.0
+        return (amount - self.available) / (self.per_minute / 60)
+
+    def consume(self, amount: int):
+        if self.per_minute:
+            self.available -= amount
+
+    @property
+    def remaining(self) -> int:
+        return max(0, int(self.available)) if self.per_minute else -1
+
+
+# -------------------------------------------------
+# Requests and responses
+# -------------------------------------------------
+
+class Request:
+    __slots__ = ("method", "path", "query", "headers", "body")
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = parts.path
+        self.query = parse_qs(parts.query)
+        self.headers = headers
+        self.body = body
+
+    def subscription_key(self) -> str | None:
+        for name in KEY_HEADERS:
+            if name in self.headers:
+                return self.headers[name]
+        return (self.query.get("subscription-key") or [None])[0]
+
+
+class Response:
+    # Either a complete body or an async iterator of SSE chunks
+    __slots__ = ("status", "headers", "body", "chunks", "reason")
+
+    def __init__(
+        self,
+        status: int,
+        headers: Dict[str, str] | None = None,
+        body: bytes = b"",
+        chunks: AsyncIterator[bytes] | None = None,
+        reason: str | None = None
+    ):
+        self.status = status
+        self.headers = headers or {}
+        self.body = body
+        self.chunks = chunks
+        self.reason = reason
+
+
+def json_response(status: int, doc: Dict, headers: Dict[str, str] | None = None) -> Response:
+    headers = dict(headers or {})
+    headers["Content-Type"] = "application/json"
+    return Response(status, headers, json.dumps(doc).encode("utf-8"))
+
+
+def error_response(status: int, message: str, headers: Dict[str, str] | None = None) -> Response:
+    # errorResponse shape from the spec
+    return json_response(status, {"error": {"code": str(status), "message": message}}, headers)
+
+
+def text_response(status: int, reason: str, message: str) -> Response:
+    # APIM return-response with a plain-text body, as the policies send
+    return Response(status, {"Content-Type": "text/plain"}, message.encode("utf-8"), reason=reason)
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token, as OpenAI documents for English
+    return max(1, math.ceil(len(text) / 4))
+
+
+def _prompt_text(doc: Dict) -> str:
+    if "messages" in doc:
+        parts = []
+        for message in doc.get("messages") or []:
+            content = message.get("content")
+            if isinstance(content, list):
+                parts.extend(p.get("text", "") for p in content if isinstance(p, dict))
+            elif content:
+                parts.append(str(content))
+        return " ".join(parts)
+    inputs = doc.get("input")
+    return " ".join(inputs) if isinstance(inputs, list) else str(inputs or "")
+
+
+# -------------------------------------------------
+# Backend
+# -------------------------------------------------
+
+class MockBackend:
+    # One simulated Azure OpenAI endpoint
+    def __init__(
+        self,
+        name: str,
+        location: str = "local",
+        latency: str = "const:50",
+        token_ms: float = 0.0,
+        tpm: int = 0,
+        rpm: int = 0,
+        retry_after: int | None = None,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        outages: List[Tuple[float, float]] | None = None,
+        completion_tokens: int = DEFAULT_COMPLETION_TOKENS
+    ):
+        self.name = name
+        self.location = location
+        self.latency_spec = latency
+        self.latency = parse_latency(latency)
+        self.token_seconds = token_ms / 1000
+        self.tokens = RateLimiter(tpm)
+        self.requests = RateLimiter(rpm)
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.outages = outages or []
+        self.completion_tokens = completion_tokens
+        self.started = time.monotonic()
+        self.stats = {"requests": 0, "ok": 0, "throttled": 0, "errors": 0}
+
+    @classmethod
+    def from_config(cls, doc: Dict) -> "MockBackend":
+        doc = dict(doc)
+        doc["outages"] = [tuple(w) for w in doc.get("outages", [])]
+        return cls(**doc)
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "x-ms-region": self.location,
+            "x-ms-backend": self.name,
+            "x-ratelimit-remaining-requests": str(self.requests.remaining),
+            "x-ratelimit-remaining-tokens": str(self.tokens.remaining),
+            "apim-request-id": str(uuid.uuid4())
+        }
+
+    def _throttled(self, wait: float | None, message: str) -> Response:
+        self.stats["throttled"] += 1
+        headers = self._headers()
+        seconds = self.retry_after if self.retry_after is not None else (
+            math.ceil(wait) if wait else DEFAULT_RETRY_AFTER
+        )
+        headers["Retry-After"] = str(seconds)
+        headers["x-ratelimit-reset-requests"] = str(seconds)
+        return error_response(429, message, headers)
+
+    def _admit(self, tokens: int) -> Response | None:
+        # Failure injection and quota checks, in the order Azure applies them
+        now = time.monotonic()
+        offset = now - self.started
+
+        if any(start <= offset < end for start, end in self.outages):
+            self.stats["errors"] += 1
+            return error_response(503, "Backend unavailable (simulated outage)", self._headers())
+
+        if self.error_rate and random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return error_response(500, "Internal server error (injected)", self._headers())
+
+        if self.throttle_rate and random.random() < self.throttle_rate:
+            return self._throttled(None, "Rate limit exceeded (injected)")
+
+        wait = max(self.requests.check(1, now), self.tokens.check(tokens, now))
+        if wait:
+            return self._throttled(
+                wait,
+                "Requests to the deployment have exceeded the token or request "
+                "rate limit of your current pricing tier"
+            )
+
+        self.requests.consume(1)
+        self.tokens.consume(tokens)
+        return None
+
+    async def handle(self, request: Request) -> Response:
+        self.stats["requests"] += 1
+
+        match = ROUTE_PATTERN.match(request.path)
+        if not match:
+            return error_response(404, "Resource not found")
+        if request.method != "POST":
+            return error_response(405, "Method not allowed")
+
+        try:
+            doc = json.loads(request.body or b"{}")
+        except ValueError:
+            return error_response(400, "Request body is not valid JSON")
+
+        deployment, operation = match.groups()
+        prompt_tokens = estimate_tokens(_prompt_text(doc))
+
+        if operation == "embeddings":
+            rejected = self._admit(prompt_tokens)
+            if rejected:
+                return rejected
+            await asyncio.sleep(self.latency())
+            self.stats["ok"] += 1
+            return json_response(200, self._embeddings(doc, deployment, prompt_tokens), self._headers())
+
+        max_tokens = doc.get("max_tokens") or self.completion_tokens
+        completion_tokens = min(max_tokens, self.completion_tokens)
+
+        # Quota is charged for prompt + max_tokens up front, as Azure does
+        rejected = self._admit(prompt_tokens + max_tokens)
+        if rejected:
+            return rejected
+
+        self.stats["ok"] += 1
+        if doc.get("stream"):
+            headers = self._headers()
+            headers["Content-Type"] = "text/event-stream"
+            return Response(200, headers, chunks=self._stream(doc, deployment, prompt_tokens, completion_tokens))
+
+        await asyncio.sleep(self.latency() + completion_tokens * self.token_seconds)
+        return json_response(
+            200,
+            self._completion(deployment, prompt_tokens, completion_tokens),
+            self._headers()
+        )
+
+    # -- response bodies (shapes from oai-api-spec-2024-10-21.yaml)
+
+    def _completion(self, deployment: str, prompt_tokens: int, completion_tokens: int) -> Dict:
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": deployment,
+            "system_fingerprint": f"fp_{self.name}",
+            "prompt_filter_results": [],
+            "choices": [{
+                "index": 0,
+                "finish_reason": "length" if completion_tokens >= self.completion_tokens else "stop",
+                "logprobs": None,
+                "message": {"role": "assistant", "content": " ".join(["ok"] * completion_tokens)}
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    def _embeddings(self, doc: Dict, deployment: str, prompt_tokens: int) -> Dict:
+        inputs = doc.get("input")
+        inputs = inputs if isinstance(inputs, list) else [inputs]
+        dimensions = doc.get("dimensions") or DEFAULT_EMBEDDING_DIMENSIONS
+        return {
+            "object": "list",
+            "model": deployment,
+            "data": [
+                {
+                    "object": "embedding",
+                    "index": i,
+                    # Deterministic per input, so repeated calls agree
+                    "embedding": random.Random(str(text)).choices(
+                        (-0.02, -0.01, 0.01, 0.02), k=dimensions
+                    )
+                }
+                for i, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens}
+        }
+
+    async def _stream(
+        self, doc: Dict, deployment: str, prompt_tokens: int, completion_tokens: int
+    ) -> AsyncIterator[bytes]:
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        def event(choices, **extra) -> bytes:
+            body = {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": deployment,
+                "choices": choices,
+                **extra
+            }
+            return f"data: {json.dumps(body)}\n\n".encode("utf-8")
+
+        # Azure order: prompt filter results, role, content deltas, finish
+        yield event([], prompt_filter_results=[])
+        await asyncio.sleep(self.latency())
+        yield event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+
+        for _ in range(completion_tokens):
+            if self.token_seconds:
+                await asyncio.sleep(self.token_seconds)
+            yield event([{"index": 0, "delta": {"content": "ok "}, "finish_reason": None}])
+
+        yield event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+
+        if (doc.get("stream_options") or {}).get("include_usage"):
+            yield event([], usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            })
+
+        yield b"data: [DONE]\n\n"
+
+
+# -------------------------------------------------
+# Gateway
+# -------------------------------------------------
+
+class MockGateway:
+    # APIM in front of the backends: each request runs frag-backend-routing
+    # (aihub.backend_routing) over its deployment's routes, whose backend-id
+    # names a MockBackend. A 429 or 5xx marks the route throttling for the
+    # backend's Retry-After and the request is retried on the next route.
+    # Without clusters every deployment is served by all backends, with
+    # priority in the order given.
+    def __init__(
+        self,
+        backends: List[MockBackend],
+        clusters: Dict[str, List[Route]] | None = None
+    ):
+        self.backends = {b.name: b for b in backends}
+        self.clusters = clusters
+        self.tables: Dict[str, RoutingTable] = build_tables(clusters) if clusters else {}
+        self.stats = {"requests": 0, "retries": 0, "noRoute": 0}
+
+        missing = {
+            r.backend_id for routes in (clusters or {}).values() for r in routes
+        } - self.backends.keys()
+        if missing:
+            raise ValueError(f"Routes name unknown backends: {', '.join(sorted(missing))}")
+
+    def _table(self, deployment: str) -> RoutingTable | None:
+        if self.clusters is None and deployment not in self.tables:
+            self.tables[deployment] = RoutingTable([
+                Route(b.name, b.location, b.name, i + 1)
+                for i, b in enumerate(self.backends.values())
+            ])
+        return self.tables.get(deployment)
+
+    async def handle(self, request: Request) -> Response:
+        self.stats["requests"] += 1
+
+        match = ROUTE_PATTERN.match(request.path)
+        if not match:
+            return error_response(404, "Resource not found")
+
+        deployment = match.group(1)
+        table = self._table(deployment)
+        if table is None:
+            # frag-validate-routes
+            return text_response(400, "No routes", f"No routes found for the deployment ({deployment})")
+
+        attempt = RoutingAttempt(table)
+        while True:
+            index = attempt.next_route(time.monotonic())
+            if index is None:
+                self.stats["noRoute"] += 1
+                return text_response(*attempt.error)
+
+            response = await self.backends[table.routes[index].backend_id].handle(request)
+            if not attempt.on_response(time.monotonic(), response.status, response.headers):
+                break
+
+        self.stats["retries"] += attempt.retries
+        return response
+
+
+# -------------------------------------------------
+# HTTP/1.1 server (stdlib asyncio, keep-alive)
+# -------------------------------------------------
+
+async def _write_response(writer: asyncio.StreamWriter, response: Response, keep_alive: bool):
+    reason = response.reason or REASONS.get(response.status, "")
+    headers = dict(response.headers)
+    headers["Connection"] = "keep-alive" if keep_alive else "close"
+
+    if response.chunks is None:
+        headers["Content-Length"] = str(len(response.body))
+    else:
+        headers["Transfer-Encoding"] = "chunked"
+
+    head = f"HTTP/1.1 {response.status} {reason}\r\n" + "".join(
+        f"{k}: {v}\r\n" for k, v in headers.items()
+    ) + "\r\n"
+
+    if response.chunks is None:
+        writer.write(head.encode("latin-1") + response.body)
+        await writer.drain()
+        return
+
+    writer.write(head.encode("latin-1"))
+    async for chunk in response.chunks:
+        writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        await writer.drain()
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[Request, bool] | None:
+    line = await reader.readline()
+    if not line:
+        return None
+
+    method, target, version = line.decode("latin-1").split(None, 2)
+
+    headers = {}
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    body = await reader.readexactly(int(headers.get("content-length", "0")))
+    keep_alive = (
+        version.strip() == "HTTP/1.1"
+        and headers.get("connection", "").lower() != "close"
+    )
+    return Request(method, target, headers, body), keep_alive
+
+
+class MockServer:
+    # Serves backends, each on its own port, and optionally a gateway that
+    # routes across them. With keys, requests must carry one of them the
+    # way APIM expects (header or subscription-key query).
+    def __init__(
+        self,
+        backends: List[MockBackend],
+        keys: List[str] | None = None,
+        gateway: MockGateway | None = None
+    ):
+        self.backends = backends
+        self.keys = set(keys or [])
+        self.gateway = gateway
+        self.gateway_url: str | None = None
+        self._servers: List[asyncio.Server] = []
+
+    def _handler(self, handle):
+        async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                while True:
+                    parsed = await _read_request(reader)
+                    if parsed is None:
+                        break
+                    request, keep_alive = parsed
+
+                    if self.keys and request.subscription_key() not in self.keys:
+                        response = error_response(
+                            401,
+                            "Access denied due to missing or invalid subscription key"
+                        )
+                    else:
+                        response = await handle(request)
+
+                    await _write_response(writer, response, keep_alive)
+                    if not keep_alive:
+                        break
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+                pass
+            finally:
+                writer.close()
+        return serve
+
+    async def _listen(self, handle, host: str, port: int) -> str:
+        server = await asyncio.start_server(self._handler(handle), host, port)
+        self._servers.append(server)
+        return f"http://{host}:{server.sockets[0].getsockname()[1]}"
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> List[str]:
+        # Backend i listens on port + i and the gateway (if any) on the
+        # port after the last backend; returns the backend base URLs
+        urls = []
+        for i, backend in enumerate(self.backends):
+            # Outage windows count from here
+            backend.started = time.monotonic()
+            urls.append(await self._listen(backend.handle, host, port + i if port else 0))
+
+        if self.gateway is not None:
+            self.gateway_url = await self._listen(
+                self.gateway.handle, host, port + len(self.backends) if port else 0
+            )
+        return urls
+
+    def close(self):
+        for server in self._servers:
+            server.close()
+
+    def stats(self) -> Dict[str, Dict]:
+        stats = {b.name: dict(b.stats) for b in self.backends}
+        if self.gateway is not None:
+            stats["gateway"] = dict(self.gateway.stats)
+        return stats
+
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+
+def load_backends(path: str) -> List[MockBackend]:
+    # {"backends": [{"name": ..., "latency": "lognormal:200,0.5", "tpm": ...}]}
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    return [MockBackend.from_config(b) for b in doc["backends"]]
+
+
+def load_clusters(path: str) -> Dict[str, List[Route]] | None:
+    # Optional "routes"/"clusters" in the same file, in the routing
+    # simulator's format with backend-id naming a backend
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    return clusters_from_config(doc) if "clusters" in doc else None
+
+
+def parse_outage(text: str) -> Tuple[float, float]:
+    start, sep, end = text.partition("-")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Invalid outage '{text}', expected START-END seconds")
+    return float(start), float(end)
+
+
+async def serve(server: MockServer, host: str, port: int, report_every: float):
+    urls = await server.start(host, port)
+    for backend, url in zip(server.backends, urls):
+        print(
+            f"{backend.name} ({backend.location}, latency {backend.latency_spec}, "
+            f"tpm {backend.tokens.per_minute or '-'}, rpm {backend.requests.per_minute or '-'}): {url}"
+        )
+    if server.gateway_url:
+        print(f"gateway (frag-backend-routing): {server.gateway_url}")
+
+    try:
+        while True:
+            await asyncio.sleep(report_every)
+            print(" | ".join(
+                f"{name}: {s['requests']} req, {s['retries']} retries, {s['noRoute']} no route"
+                if name == "gateway" else
+                f"{name}: {s['requests']} req, {s['throttled']} 429, {s['errors']} err"
+                for name, s in server.stats().items()
+            ))
+    finally:
+        server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local mock of Azure OpenAI backends behind APIM (chat and embeddings)"
+    )
+    parser.add_argument("--config", help="JSON file with a 'backends' list (overrides the flags below)")
+    parser.add_argument("--backends", type=int, default=1, help="Number of identical backends")
+    parser.add_argument("--latency", default="const:50", help="const:MS, uniform:LOW,HIGH, normal:MEAN,SD, lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="Generation time per completion token")
+    parser.add_argument("--tpm", type=int, default=0, help="Tokens per minute per backend (0 = unlimited)")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute per backend (0 = unlimited)")
+    parser.add_argument("--retry-after", type=int, help="Fixed Retry-After seconds for 429s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests forced to 429")
+    parser.add_argument("--outage", action="append", type=parse_outage, default=[], metavar="START-END",
+                        help="Seconds after start during which backends return 503 (repeatable)")
+    parser.add_argument("--completion-tokens", type=int, default=DEFAULT_COMPLETION_TOKENS)
+    parser.add_argument("--key", action="append", dest="keys", help="Accepted subscription key (repeatable; default any)")
+    parser.add_argument(
+        "--gateway", action="store_true",
+        help="Also serve a gateway routing across the backends like frag-backend-routing "
+             "(routes/clusters from --config, else backend order is priority)"
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="First port; backend i uses port + i, the gateway the next one")
+    parser.add_argument("--report-every", type=float, default=10.0, help="Seconds between stats lines")
+    args = parser.parse_args()
+
+    if args.config:
+        backends = load_backends(args.config)
+    else:
+        backends = [
+            MockBackend(
+                f"backend-{i + 1}",
+                latency=args.latency,
+                token_ms=args.token_ms,
+                tpm=args.tpm,
+                rpm=args.rpm,
+                retry_after=args.retry_after,
+                error_rate=args.error_rate,
+                throttle_rate=args.throttle_rate,
+                outages=args.outage,
+                completion_tokens=args.completion_tokens
+            )
+            for i in range(args.backends)
+        ]
+
+    gateway = None
+    if args.gateway:
+        gateway = MockGateway(backends, load_clusters(args.config) if args.config else None)
+
+    try:
+        asyncio.run(serve(MockServer(backends, args.keys, gateway), args.host, args.port, args.report_every))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
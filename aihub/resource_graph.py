@@ -0,0 +1,163 @@
+from typing import Dict, List, Tuple
+
+from . import arm_client
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+RESOURCE_GRAPH_API_VERSION = "2022-10-01"
+RESOURCE_GRAPH_PAGE_SIZE = 1000
+
+# Resources of the selected scopes, left-joined with every private
+# endpoint connection that targets them (matched on lower-cased ID)
+INVENTORY_QUERY = """
+resources
+| where {scope_filter}
+| extend rid = tolower(id)
+| join kind=leftouter (
+    resources
+    | where type =~ 'microsoft.network/privateendpoints'
+    | mv-expand conn = properties.privateLinkServiceConnections
+    | extend target = tolower(tostring(conn.properties.privateLinkServiceId))
+    | where isnotempty(target)
+    | summarize privateEndpoints = make_list(
+        pack('name', name, 'subnetId', tostring(properties.subnet.id))
+      ) by target
+) on $left.rid == $right.target
+| project id, name, type, location, tags, subscriptionId,
+          publicNetworkAccess = tostring(properties.publicNetworkAccess),
+          endpoint = tostring(properties.endpoint),
+          privateEndpoints
+| order by subscriptionId asc, id asc
+"""
+
+
+# -------------------------------------------------
+# Query helpers
+# -------------------------------------------------
+
+def _kql_string(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def build_scope_filter(scopes: List[Tuple[str, str]]) -> str:
+    clauses = [
+        f"(subscriptionId =~ {_kql_string(sub)} and resourceGroup =~ {_kql_string(rg)})"
+        for sub, rg in scopes
+    ]
+    return " or ".join(clauses)
+
+
+def query_resource_graph(query: str, subscriptions: List[str]) -> List[Dict]:
+    client = arm_client.get_client()
+    rows: List[Dict] = []
+    skip_token = None
+
+    while True:
+        options = {
+            "$top": RESOURCE_GRAPH_PAGE_SIZE,
+            "resultFormat": "objectArray"
+        }
+        if skip_token:
+            options["$skipToken"] = skip_token
+
+        page = client.request(
+            "POST",
+            "/providers/Microsoft.ResourceGraph/resources",
+            RESOURCE_GRAPH_API_VERSION,
+            json={
+                "subscriptions": subscriptions,
+                "query": query,
+                "options": options
+            }
+        )
+
+        rows.extend(page.get("data", []))
+
+        skip_token = page.get("$skipToken")
+        if not skip_token:
+            return rows
+
+
+# -------------------------------------------------
+# Inventory records
+# -------------------------------------------------
+
+def _resource_group_from_id(resource_id: str) -> str | None:
+    # Resource Graph lower-cases resourceGroup; the ID keeps ARM casing
+    parts = resource_id.split("/")
+    lowered = [p.lower() for p in parts]
+    if "resourcegroups" in lowered:
+        return parts[lowered.index("resourcegroups") + 1]
+    return None
+
+
+def _type_from_id(resource_id: str) -> str | None:
+    # Resource Graph lower-cases type too; rebuild it from the ID, e.g.
+    # .../providers/Microsoft.Network/virtualNetworks/vn/subnets/sn
+    # -> Microsoft.Network/virtualNetworks/subnets
+    parts = resource_id.split("/")
+    lowered = [p.lower() for p in parts]
+    if "providers" not in lowered:
+        return None
+
+    start = len(lowered) - 1 - lowered[::-1].index("providers")
+    segments = parts[start + 1:]
+    if len(segments) < 3:
+        return None
+
+    return "/".join([segments[0]] + segments[1::2])
+
+
+def record_from_row(row: Dict) -> Dict:
+    rid = row.get("id")
+    name = row.get("name", "<unknown>")
+    rtype = _type_from_id(rid or "") or row.get("type", "<unknown>")
+
+    public_endpoint = None
+    if rtype == "Microsoft.CognitiveServices/accounts" and "openai" in name.lower():
+        public_endpoint = f"https://{name}.openai.azure.com"
+    elif rtype == "Microsoft.CognitiveServices/accounts":
+        if row.get("publicNetworkAccess") == "Enabled":
+            public_endpoint = row.get("endpoint") or None
+
+    vnet = None
+    subnet = None
+    private_endpoints = []
+    for pe in row.get("privateEndpoints") or []:
+        subnet_id = pe.get("subnetId") or None
+        private_endpoints.append({
+            "name": pe.get("name"),
+            "subnetId": subnet_id
+        })
+
+        if subnet_id:
+            parts = subnet_id.split("/")
+            if "virtualNetworks" in parts and "subnets" in parts:
+                vnet = parts[parts.index("virtualNetworks") + 1]
+                subnet = parts[parts.index("subnets") + 1]
+
+    return {
+        "name": name,
+        "type": rtype,
+        "resourceGroup": _resource_group_from_id(rid or ""),
+        "location": row.get("location"),
+        "id": rid,
+        "tags": row.get("tags") or {},
+        "publicEndpoint": public_endpoint,
+        "vnet": vnet,
+        "subnet": subnet,
+        "privateEndpoints": private_endpoints
+    }
+
+
+def build_inventory(scopes: List[Tuple[str, str]]) -> List[Dict]:
+    # scopes: (subscription_id, resource_group) pairs, any number of each
+    if not scopes:
+        return []
+
+    subscriptions = sorted({sub for sub, _ in scopes})
+    query = INVENTORY_QUERY.format(scope_filter=build_scope_filter(scopes))
+
+    return [record_from_row(row) for row in query_resource_graph(query, subscriptions)]
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+CACHE_DIR = Path(os.environ.get("AZ_CACHE_DIR", ".az_cache"))
+CACHE_MAX_BYTES = int(os.environ.get("AZ_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Eviction trims the cache to this fraction of CACHE_MAX_BYTES, so the
+# next directory scan is only due after that much new data
+CACHE_EVICT_TARGET = 0.8
+
+# Seconds a response stays valid, by the kind of lookup it answers.
+# Matched in order against the normalized command / URL.
+CACHE_TTLS = [
+    ("cognitiveservices", 3600),
+    ("private-endpoint", 600),
+    ("privateendpoints", 600),
+    ("resource list", 120),
+    ("/resources", 120),
+]
+DEFAULT_TTL = 300
+
+_enabled = os.environ.get("AZ_CACHE_DISABLED", "0") != "1"
+_lock = threading.Lock()
+_evict_lock = threading.Lock()
+
+# Bytes in CACHE_DIR as of the last scan plus this process's stores since;
+# None until the first store scans the directory
+_size_estimate: int | None = None
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "evictions": 0
+}
+
+
+# -------------------------------------------------
+# Keys and TTLs
+# -------------------------------------------------
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+
+def normalize_key(*parts: Any) -> str:
+    # Resource IDs, flags and URLs are case-insensitive in ARM
+    return " ".join(" ".join(str(p).split()) for p in parts if p is not None).lower()
+
+
+def ttl_for(key: str) -> int:
+    for marker, ttl in CACHE_TTLS:
+        if marker in key:
+            return ttl
+    return DEFAULT_TTL
+
+
+def _path_for(key: str) -> Path:
+    return CACHE_DIR / (hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+
+def _count(name: str):
+    with _lock:
+        _stats[name] += 1
+
+
+# -------------------------------------------------
+# Lookup / store
+# -------------------------------------------------
+
+def get(key: str) -> Tuple[bool, Any]:
+    # (hit, value), so a cached null or [] still counts as a hit
+    path = _path_for(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        _count("misses")
+        return False, None
+
+    if entry.get("key") != key or entry.get("expiresAt", 0) < time.time():
+        _count("misses")
+        return False, None
+
+    # mtime doubles as last-access time for LRU eviction
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+    _count("hits")
+    return True, entry.get("value")
+
+
+def put(key: str, value: Any, ttl: int | None = None):
+    global _size_estimate
+    ttl = ttl_for(key) if ttl is None else ttl
+    if ttl <= 0:
+        return
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _path_for(key)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+
+    data = json.dumps({
+        "key": key,
+        "expiresAt": time.time() + ttl,
+        "value": value
+    }).encode("utf-8")
+    try:
+        replaced = path.stat().st_size
+    except OSError:
+        replaced = 0
+
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+    # The directory is only scanned when the running estimate crosses the
+    # limit, so a store does not cost O(entries) under the lock
+    with _lock:
+        _stats["stores"] += 1
+        if _size_estimate is not None:
+            _size_estimate += len(data) - replaced
+        due = _size_estimate is None or _size_estimate > CACHE_MAX_BYTES
+
+    if due:
+        evict()
+
+
+def cached(key: str, fetch: Callable[[], Any]) -> Any:
+    if not _enabled:
+        return fetch()
+
+    hit, value = get(key)
+    if hit:
+        return value
+
+    value = fetch()
+    try:
+        put(key, value)
+    except OSError as e:
+        print(f"Warning: Failed to write response cache: {e}")
+    return value
+
+
+# -------------------------------------------------
+# Eviction / stats
+# -------------------------------------------------
+
+def evict(max_bytes: int = CACHE_MAX_BYTES):
+    # Rescans the directory (other processes may share it) and, when over
+    # the limit, trims it to CACHE_EVICT_TARGET of max_bytes. Lookups and
+    # stores only wait on _lock for the final bookkeeping.
+    global _size_estimate
+    with _evict_lock:
+        entries = []
+        total = 0
+        for p in CACHE_DIR.glob("*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+
+        evicted = 0
+        if total > max_bytes:
+            target = int(max_bytes * CACHE_EVICT_TARGET)
+            # Least recently used first
+            for _, size, p in sorted(entries, key=lambda e: e[0]):
+                if total <= target:
+                    break
+                try:
+                    p.unlink()
+                except OSError:
+                    continue
+                total -= size
+                evicted += 1
+
+        with _lock:
+            _size_estimate = total
+            _stats["evictions"] += evicted
+
+
+def invalidate(match: Callable[[str], bool]) -> int:
+    # Drops every entry whose normalized key satisfies match(key), e.g.
+    # lookups scoped to a resource group that was just redeployed
+    global _size_estimate
+    removed = 0
+    with _evict_lock:
+        for p in CACHE_DIR.glob("*.json"):
+            try:
+                with open(p, "r", encoding="utf-8") as f:
+                    key = json.load(f).get("key") or ""
+            except (OSError, json.JSONDecodeError):
+                continue
+            if match(key):
+                p.unlink(missing_ok=True)
+                removed += 1
+
+        if removed:
+            with _lock:
+                _size_estimate = None
+    return removed
+
+
+def clear():
+    global _size_estimate
+    for p in CACHE_DIR.glob("*.json"):
+        p.unlink(missing_ok=True)
+    with _lock:
+        _size_estimate = None
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return dict(_stats)
+
+
+def print_stats():
+    s = stats()
+    if not _enabled:
+        print("Response cache: disabled")
+        return
+    print(
+        f"Response cache: {s['hits']} hits, {s['misses']} misses, "
+        f"{s['stores']} stores, {s['evictions']} evictions"
+    )
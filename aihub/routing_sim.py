@@ -0,0 +1,398 @@
+import argparse
+import heapq
+import itertools
+import json
+import math
+import random
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from .backend_routing import (
+    RoutingAttempt, RoutingTable, build_tables, clusters_from_config,
+    is_failure, load_clusters_from_policy
+)
+from .loadgen import PERCENTILES, percentile
+from .mock_openai import RateLimiter, parse_latency
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+BACKEND_TYPES = ("PTU", "PAYG")
+
+# Azure OpenAI grants 6 RPM per 1,000 TPM of pay-as-you-go quota
+PAYG_RPM_PER_1000_TPM = 6
+
+# Round trip of a throttled call between the gateway and a backend
+REJECT_LATENCY = 0.05
+
+TRACE_TIME_FORMATS = ("%m/%d/%Y %I:%M:%S %p", "%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%dT%H:%M:%SZ")
+
+# (offset seconds, deployment, prompt tokens, completion tokens)
+TraceRecord = Tuple[float, str, int, int]
+
+
+# -------------------------------------------------
+# Backend capacity model
+# -------------------------------------------------
+
+class SimBackend:
+    # Capacity of one deployment on one backend (Azure quotas are per
+    # deployment). PTU: provisioned token throughput, no request limit.
+    # PAYG: TPM quota plus the derived RPM quota.
+    def __init__(
+        self,
+        backend_id: str,
+        kind: str = "PAYG",
+        tpm: int = 0,
+        rpm: int | None = None,
+        latency: str = "const:500",
+        token_ms: float = 20.0
+    ):
+        kind = kind.upper()
+        if kind not in BACKEND_TYPES:
+            raise ValueError(f"Backend {backend_id}: type must be one of {', '.join(BACKEND_TYPES)}")
+        if rpm is None:
+            rpm = tpm * PAYG_RPM_PER_1000_TPM // 1000 if kind == "PAYG" else 0
+
+        self.backend_id = backend_id
+        self.kind = kind
+        self.tpm = tpm
+        self.tokens = RateLimiter(tpm, now=0.0)
+        self.requests = RateLimiter(rpm, now=0.0)
+        self.latency = parse_latency(latency)
+        self.token_seconds = token_ms / 1000
+        # Tokens charged against the TPM bucket; utilization is measured
+        # against the same bucket
+        self.admitted_tokens = 0
+
+    def admit(self, tokens: int, now: float) -> float:
+        # 0 when accepted (quota consumed), else seconds until it would fit
+        wait = max(self.requests.check(1, now), self.tokens.check(tokens, now))
+        if not wait:
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.admitted_tokens += tokens
+        return wait
+
+    def token_budget(self, duration: float) -> float:
+        # Everything the bucket could hand out over the run: it starts
+        # with a minute's worth and refills at tpm / 60 per second
+        return self.tpm + self.tpm / 60 * duration
+
+    def utilization(self, duration: float) -> float | None:
+        if not self.tpm:
+            return None
+        return min(1.0, self.admitted_tokens / self.token_budget(duration))
+
+    def service_time(self, completion_tokens: int) -> float:
+        return self.latency() + completion_tokens * self.token_seconds
+
+
+# -------------------------------------------------
+# Traces
+# -------------------------------------------------
+
+def _parse_time(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    for fmt in TRACE_TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    return datetime.fromisoformat(value).timestamp()
+
+
+def load_trace(path: str) -> List[TraceRecord]:
+    # JSON array or JSONL of usage records (src/usage-reports/usage-record.json
+    # shape) or of {"time", "deployment", "promptTokens", "responseTokens"}
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        docs = json.loads(text)
+    elif stripped.startswith("{") and "\n{" not in stripped:
+        docs = [json.loads(text)]
+    else:
+        docs = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    records = []
+    for doc in docs:
+        records.append((
+            _parse_time(doc.get("time", doc.get("timestamp"))),
+            doc.get("deployment") or doc["deploymentName"],
+            int(doc.get("promptTokens", 0)),
+            int(doc.get("responseTokens", 0))
+        ))
+
+    records.sort(key=lambda r: r[0])
+    start = records[0][0] if records else 0.0
+    return [(t - start, d, p, c) for t, d, p, c in records]
+
+
+def synthetic_trace(
+    rate: float,
+    duration: float,
+    deployment: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    rng: random.Random
+) -> List[TraceRecord]:
+    # Poisson arrivals at `rate` requests per second
+    records = []
+    t = rng.expovariate(rate)
+    while t < duration:
+        records.append((t, deployment, prompt_tokens, completion_tokens))
+        t += rng.expovariate(rate)
+    return records
+
+
+# -------------------------------------------------
+# Simulation
+# -------------------------------------------------
+
+class RouteStats:
+    def __init__(self):
+        self.attempts = 0
+        self.served = 0
+        self.throttled = 0
+        self.spillover = 0
+        self.tokens = 0
+
+
+class Simulation:
+    # Discrete-event replay: every request runs the frag-backend-routing
+    # algorithm (via RoutingAttempt) against the modelled backends.
+    # capacity and route statistics are keyed by (backend_id, deployment).
+    def __init__(self, tables: Dict[str, RoutingTable], capacity: Dict[Tuple[str, str], SimBackend]):
+        self.tables = tables
+        self.capacity = capacity
+        self.now = 0.0
+        self._events: List[Tuple[float, int, Callable, tuple]] = []
+        self._seq = itertools.count()
+
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+        self.statuses: Dict[int, int] = {}
+        self.latencies: List[float] = []
+        self.retries: Dict[int, int] = {}
+
+    def _at(self, when: float, handler: Callable, *args):
+        heapq.heappush(self._events, (when, next(self._seq), handler, args))
+
+    def _finish(self, arrived: float, status: int, attempt: RoutingAttempt | None):
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if status == 200:
+            self.latencies.append(self.now - arrived)
+        if attempt is not None:
+            self.retries[attempt.retries] = self.retries.get(attempt.retries, 0) + 1
+
+    def _arrive(self, deployment: str, prompt_tokens: int, completion_tokens: int):
+        table = self.tables.get(deployment)
+        if table is None:
+            # frag-validate-routes: 400 "No routes" for unknown deployments
+            self._finish(self.now, 400, None)
+            return
+        attempt = RoutingAttempt(table)
+        self._forward(attempt, deployment, self.now, prompt_tokens, completion_tokens)
+
+    def _forward(
+        self, attempt: RoutingAttempt, deployment: str, arrived: float,
+        prompt_tokens: int, completion_tokens: int
+    ):
+        index = attempt.next_route(self.now)
+        if index is None:
+            self._finish(arrived, attempt.error[0], attempt)
+            return
+
+        key = (attempt.table.routes[index].backend_id, deployment)
+        backend = self.capacity[key]
+        stats = self.routes.setdefault(key, RouteStats())
+        stats.attempts += 1
+
+        wait = backend.admit(prompt_tokens + completion_tokens, self.now)
+        if wait:
+            stats.throttled += 1
+            headers = {"Retry-After": str(math.ceil(wait))}
+            self._at(self.now + REJECT_LATENCY, self._respond, attempt, deployment, arrived,
+                     prompt_tokens, completion_tokens, 429, headers)
+            return
+
+        self._at(self.now + backend.service_time(completion_tokens), self._respond, attempt, deployment,
+                 arrived, prompt_tokens, completion_tokens, 200, {})
+
+    def _respond(
+        self, attempt: RoutingAttempt, deployment: str, arrived: float,
+        prompt_tokens: int, completion_tokens: int, status: int, headers: Dict[str, str]
+    ):
+        route = attempt.table.routes[attempt.route_index]
+
+        if not is_failure(status):
+            stats = self.routes[(route.backend_id, deployment)]
+            stats.served += 1
+            stats.tokens += prompt_tokens + completion_tokens
+            # Served below the best priority its cluster offers
+            if route.priority > min(r.priority for r in attempt.table.routes):
+                stats.spillover += 1
+            self._finish(arrived, status, attempt)
+            return
+
+        if attempt.on_response(self.now, status, headers):
+            self._forward(attempt, deployment, arrived, prompt_tokens, completion_tokens)
+        else:
+            self._finish(arrived, status, attempt)
+
+    def run(self, trace: Iterable[TraceRecord]) -> Dict:
+        for offset, deployment, prompt_tokens, completion_tokens in trace:
+            self._at(offset, self._arrive, deployment, prompt_tokens, completion_tokens)
+
+        while self._events:
+            self.now, _, handler, args = heapq.heappop(self._events)
+            handler(*args)
+
+        return self.summary()
+
+    def summary(self) -> Dict:
+        duration = self.now or 1.0
+        latencies = sorted(self.latencies)
+        total = sum(self.statuses.values())
+
+        return {
+            "duration": self.now,
+            "requests": total,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "throughput": self.statuses.get(200, 0) / duration,
+            "clientThrottleRate": self.statuses.get(429, 0) / total if total else 0.0,
+            "latency": {f"p{p}": percentile(latencies, p) for p in PERCENTILES},
+            "retries": {str(k): v for k, v in sorted(self.retries.items())},
+            "routes": {
+                f"{backend_id}/{deployment}": {
+                    "backend": backend_id,
+                    "deployment": deployment,
+                    "type": self.capacity[(backend_id, deployment)].kind,
+                    "attempts": s.attempts,
+                    "served": s.served,
+                    "throttled": s.throttled,
+                    "spillover": s.spillover,
+                    "throughput": s.served / duration,
+                    "tokensPerMinute": s.tokens / duration * 60,
+                    # Share of the TPM bucket's budget that admission used
+                    "utilization": self.capacity[(backend_id, deployment)].utilization(duration)
+                }
+                for (backend_id, deployment), s in sorted(self.routes.items())
+            }
+        }
+
+
+# -------------------------------------------------
+# Report
+# -------------------------------------------------
+
+def print_summary(summary: Dict):
+    print(f"Simulated {summary['duration']:.0f}s, {summary['requests']} requests")
+    print("Client status codes: " + ", ".join(
+        f"{status}={count}" for status, count in summary["statuses"].items()
+    ))
+    latency = summary["latency"]
+    print(
+        f"Achieved {summary['throughput']:.2f} req/s, client 429 rate "
+        f"{summary['clientThrottleRate'] * 100:.1f}%, latency p50/p95/p99 "
+        + "/".join(f"{latency[f'p{p}'] * 1000:.0f}" if latency[f"p{p}"] is not None else "-" for p in PERCENTILES)
+        + " ms"
+    )
+    print("Retries per request: " + ", ".join(f"{k}={v}" for k, v in summary["retries"].items()))
+    print()
+    print(
+        f"{'Route':<32} {'Type':<5} {'Attempts':>9} {'Served':>8} {'429':>7} "
+        f"{'Spill':>7} {'Req/s':>8} {'TPM':>10} {'Util':>6}"
+    )
+    for route, s in summary["routes"].items():
+        util = f"{s['utilization'] * 100:.0f}%" if s["utilization"] is not None else "-"
+        print(
+            f"{route:<32} {s['type']:<5} {s['attempts']:>9} {s['served']:>8} "
+            f"{s['throttled']:>7} {s['spillover']:>7} {s['throughput']:>8.2f} "
+            f"{s['tokensPerMinute']:>10.0f} {util:>6}"
+        )
+
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+
+def load_config(path: str) -> Tuple[Dict, Dict[Tuple[str, str], SimBackend]]:
+    # {"backends": {"openai-backend-0": {"type": "PTU", "tpm": 300000,
+    #   "latency": "lognormal:400,0.3", "token_ms": 15,
+    #   "deployments": {"embedding": {"tpm": 100000}}}, ...},
+    #  optional "routes"/"clusters" (default: openai_api_policy.xml)}
+    # Every deployment on a backend gets its own quota: the backend's
+    # settings, overridden by its "deployments" entry
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+
+    clusters = clusters_from_config(doc) if "clusters" in doc else load_clusters_from_policy()
+
+    missing = {r.backend_id for routes in clusters.values() for r in routes} - doc["backends"].keys()
+    if missing:
+        raise ValueError(f"No capacity configured for backends: {', '.join(sorted(missing))}")
+
+    capacity = {}
+    for deployment, routes in clusters.items():
+        for route in routes:
+            base = doc["backends"][route.backend_id]
+            spec = {**base, **base.get("deployments", {}).get(deployment, {})}
+            capacity[(route.backend_id, deployment)] = SimBackend(
+                route.backend_id,
+                kind=spec.get("type", "PAYG"),
+                tpm=spec.get("tpm", 0),
+                rpm=spec.get("rpm"),
+                latency=spec.get("latency", "const:500"),
+                token_ms=spec.get("token_ms", 20.0)
+            )
+    return clusters, capacity
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay traffic through the APIM backend routing algorithm against modelled PTU/PAYG capacity"
+    )
+    parser.add_argument("--config", required=True, help="JSON with backend capacities (and optional routes/clusters)")
+
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--trace", help="Usage records (JSON array or JSONL) to replay")
+    source.add_argument("--rate", type=float, help="Synthetic Poisson load in requests per second")
+
+    parser.add_argument("--speedup", type=float, default=1.0, help="Compress trace time (2 = twice the traffic rate)")
+    parser.add_argument("--duration", type=float, default=600.0, help="Synthetic load seconds")
+    parser.add_argument("--deployment", default="chat", help="Synthetic load deployment")
+    parser.add_argument("--prompt-tokens", type=int, default=500)
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (route ties, latency, arrivals)")
+    parser.add_argument("--json", metavar="PATH", help="Also write the summary as JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Latency samplers draw from the module-level generator
+    random.seed(args.seed)
+
+    clusters, capacity = load_config(args.config)
+
+    if args.trace:
+        trace = [(t / args.speedup, d, p, c) for t, d, p, c in load_trace(args.trace)]
+    else:
+        trace = synthetic_trace(
+            args.rate, args.duration, args.deployment,
+            args.prompt_tokens, args.completion_tokens, rng
+        )
+
+    summary = Simulation(build_tables(clusters, rng), capacity).run(trace)
+    print_summary(summary)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nSummary written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List, Tuple
+
+from .gateway import OPENAI_API_VERSION, chat_headers, chat_payload, chat_url
+from .loadgen import PERCENTILES, REQUEST_TIMEOUT, parse_key, percentile, require_httpx
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+DEPLOYMENT_PATH = "/openai/deployments/{}/chat/completions"
+DEFAULT_DEPLOYMENT = "chat"
+DEFAULT_PROMPT = "Tell me a joke."
+DEFAULT_MAX_TOKENS = 150
+
+# Response header naming the backend that served the stream (Azure
+# OpenAI reports its region); combined with the deployment as the route
+ROUTE_HEADER = "x-ms-region"
+
+# Upper bounds (ms) of the inter-chunk gap histogram buckets
+GAP_BUCKETS_MS = (5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+# -------------------------------------------------
+# Probe
+# -------------------------------------------------
+
+class StreamResult:
+    __slots__ = (
+        "route", "status", "ttft", "duration", "chunks", "gaps",
+        "completion_tokens", "error"
+    )
+
+    def __init__(self, route: str, status: int | None = None):
+        self.route = route
+        self.status = status
+        self.ttft: float | None = None
+        self.duration: float | None = None
+        self.chunks = 0
+        self.gaps: List[float] = []
+        self.completion_tokens = 0
+        self.error: str | None = None
+
+
+def _has_content(event: Dict) -> bool:
+    # Azure sends a prompt_filter_results chunk (no choices) and a role-only
+    # delta first; the first token is the first non-empty content delta
+    return any(
+        (choice.get("delta") or {}).get("content")
+        for choice in event.get("choices") or []
+    )
+
+
+async def iter_sse(response):
+    # Yields the data payload of each server-sent event as it completes;
+    # multi-line data fields are joined as the SSE spec requires
+    data: List[str] = []
+    async for line in response.aiter_lines():
+        if line.startswith("data:"):
+            data.append(line[5:].lstrip())
+        elif not line and data:
+            yield "\n".join(data)
+            data = []
+    if data:
+        yield "\n".join(data)
+
+
+async def probe_stream(
+    client,
+    url: str,
+    deployment: str,
+    key: str,
+    payload: Dict,
+    route_header: str = ROUTE_HEADER
+) -> StreamResult:
+    started = time.perf_counter()
+    result = StreamResult(deployment)
+
+    try:
+        async with client.stream("POST", url, headers=chat_headers(key), json=payload) as r:
+            result.status = r.status_code
+            served_by = r.headers.get(route_header)
+            if served_by:
+                result.route = f"{deployment}@{served_by}"
+
+            if r.status_code != 200:
+                # 429s are counted as throttled; anything else is an error
+                if r.status_code != 429:
+                    result.error = f"HTTP {r.status_code}"
+                await r.aread()
+                result.duration = time.perf_counter() - started
+                return result
+
+            last = None
+            async for data in iter_sse(r):
+                if data == "[DONE]":
+                    break
+                now = time.perf_counter()
+                event = json.loads(data)
+                result.chunks += 1
+
+                usage = event.get("usage")
+                if usage:
+                    result.completion_tokens = usage.get("completion_tokens", 0)
+
+                if not _has_content(event):
+                    continue
+                if result.ttft is None:
+                    result.ttft = now - started
+                else:
+                    result.gaps.append(now - last)
+                last = now
+
+            # e.g. only a content-filter chunk, or [DONE] straight away;
+            # counted as an error so every stream lands in one bucket
+            if result.ttft is None:
+                result.error = "no content"
+    except Exception as e:
+        result.error = type(e).__name__
+
+    result.duration = time.perf_counter() - started
+    return result
+
+
+async def run_probe(
+    gateway_url: str,
+    deployments: List[str],
+    keys: List[Tuple[str, str]],
+    payload: Dict,
+    requests: int = 10,
+    concurrency: int = 1,
+    api_version: str = OPENAI_API_VERSION,
+    route_header: str = ROUTE_HEADER,
+    http2: bool = False,
+    timeout: float = REQUEST_TIMEOUT
+) -> List[StreamResult]:
+    httpx = require_httpx(http2)
+    slots = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(http2=http2, timeout=timeout) as client:
+        async def one(i):
+            deployment = deployments[i % len(deployments)]
+            _, key = keys[i % len(keys)]
+            url = chat_url(gateway_url, DEPLOYMENT_PATH.format(deployment), api_version)
+            async with slots:
+                return await probe_stream(client, url, deployment, key, payload, route_header)
+
+        return await asyncio.gather(*(one(i) for i in range(requests)))
+
+
+# -------------------------------------------------
+# Statistics
+# -------------------------------------------------
+
+def gap_histogram(gaps: List[float]) -> Dict[str, int]:
+    labels = [f"<={b}ms" for b in GAP_BUCKETS_MS] + [f">{GAP_BUCKETS_MS[-1]}ms"]
+    counts = dict.fromkeys(labels, 0)
+    for gap in gaps:
+        ms = gap * 1000
+        index = next(
+            (i for i, bound in enumerate(GAP_BUCKETS_MS) if ms <= bound),
+            len(GAP_BUCKETS_MS)
+        )
+        counts[labels[index]] += 1
+    return counts
+
+
+def _percentiles(values: List[float]) -> Dict[str, float | None]:
+    values = sorted(values)
+    return {f"p{p}": percentile(values, p) for p in PERCENTILES}
+
+
+def summarize(results: List[StreamResult]) -> Dict[str, Dict]:
+    by_route: Dict[str, List[StreamResult]] = {}
+    for r in results:
+        by_route.setdefault(r.route, []).append(r)
+
+    summary = {}
+    for route, items in sorted(by_route.items()):
+        ok = [r for r in items if r.status == 200 and r.error is None and r.ttft is not None]
+        gaps = [g for r in ok for g in r.gaps]
+        streaming_time = sum(r.duration - r.ttft for r in ok)
+
+        summary[route] = {
+            "streams": len(items),
+            "ok": len(ok),
+            "throttled": sum(1 for r in items if r.status == 429),
+            "errors": sum(1 for r in items if r.error),
+            "ttft": _percentiles([r.ttft for r in ok]),
+            "duration": _percentiles([r.duration for r in ok]),
+            "interChunk": _percentiles(gaps),
+            "interChunkHistogram": gap_histogram(gaps),
+            "chunksPerStream": sum(r.chunks for r in ok) / len(ok) if ok else 0.0,
+            # Generation speed once the first token arrived
+            "tokensPerSecondAfterFirstToken": (
+                sum(r.completion_tokens for r in ok) / streaming_time
+                if streaming_time else None
+            )
+        }
+    return summary
+
+
+# -------------------------------------------------
+# Report
+# -------------------------------------------------
+
+def _ms(value: float | None) -> str:
+    return f"{value * 1000:.0f}" if value is not None else "-"
+
+
+def print_summary(summary: Dict[str, Dict]):
+    for route, s in summary.items():
+        print(f"\nRoute: {route}")
+        print(
+            f"  Streams: {s['streams']} (ok {s['ok']}, 429 {s['throttled']}, "
+            f"errors {s['errors']}), {s['chunksPerStream']:.1f} chunks/stream"
+        )
+        for name, label in (("ttft", "TTFT"), ("duration", "Total"), ("interChunk", "Inter-chunk")):
+            p = s[name]
+            print(
+                f"  {label + ' ms:':<16} p50 {_ms(p['p50']):>6}  "
+                f"p95 {_ms(p['p95']):>6}  p99 {_ms(p['p99']):>6}"
+            )
+        rate = s["tokensPerSecondAfterFirstToken"]
+        if rate is not None:
+            print(f"  Tokens/s after first token: {rate:.1f}")
+        print("  Inter-chunk histogram: " + "  ".join(
+            f"{bucket} {count}" for bucket, count in s["interChunkHistogram"].items()
+        ))
+
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure streaming (SSE) latency through the APIM gateway"
+    )
+    parser.add_argument("gateway", help="Gateway base URL (e.g. https://<apim>.azure-api.net)")
+    parser.add_argument(
+        "--key", action="append", dest="keys", required=True, metavar="[LABEL=]KEY",
+        help="APIM product subscription key (repeatable)"
+    )
+    parser.add_argument(
+        "--deployment", action="append", dest="deployments", metavar="NAME",
+        help=f"Deployment to stream from (repeatable, default {DEFAULT_DEPLOYMENT})"
+    )
+    parser.add_argument("--api-version", default=OPENAI_API_VERSION)
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT)
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS)
+    parser.add_argument("--requests", type=int, default=10, help="Streams to open in total")
+    parser.add_argument("--concurrency", type=int, default=1, help="Streams open at once")
+    parser.add_argument("--route-header", default=ROUTE_HEADER, help="Response header identifying the backend")
+    parser.add_argument("--http2", action="store_true", help="Negotiate HTTP/2 (needs httpx[http2])")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT)
+    parser.add_argument("--json", metavar="PATH", help="Also write the summary as JSON")
+    args = parser.parse_args()
+
+    payload = chat_payload(args.prompt, args.max_tokens)
+    payload["stream"] = True
+    # The final chunk then carries token usage (stream_options, 2024-10-21)
+    payload["stream_options"] = {"include_usage": True}
+
+    results = asyncio.run(run_probe(
+        args.gateway,
+        args.deployments or [DEFAULT_DEPLOYMENT],
+        [parse_key(k) for k in args.keys],
+        payload,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        api_version=args.api_version,
+        route_header=args.route_header,
+        http2=args.http2,
+        timeout=args.timeout
+    ))
+
+    summary = summarize(results)
+    print_summary(summary)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nSummary written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
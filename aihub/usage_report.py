@@ -0,0 +1,545 @@
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+# -------------------------------------------------
+# CONFIGURATION
+# -------------------------------------------------
+
+PRICING_FILE = Path(__file__).resolve().parent.parent / "src" / "usage-reports" / "model-pricing.json"
+
+# Default report dimensions; "hour" is the record timestamp floored to the hour
+DEFAULT_GROUP_BY = ["productName", "appId", "model", "backendId", "hour"]
+
+# String fields of the frag-openai-usage.xml event that can be grouped on
+DIMENSIONS = [
+    "appId", "subscriptionId", "productName", "targetService", "model",
+    "gatewayName", "gatewayRegion", "backendId", "routeLocation", "routeName",
+    "deploymentName", "operationName"
+]
+TOKEN_COLUMNS = ["promptTokens", "responseTokens", "totalTokens"]
+
+# DateTime.UtcNow.ToString() in the fragment (en-US), then ISO 8601 as
+# written by Stream Analytics / Event Hubs capture conversions
+TIMESTAMP_FORMATS = ["%m/%d/%Y %I:%M:%S %p", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"]
+
+# Normalized records per partial group-by
+BATCH_SIZE = 200_000
+
+# Arrow's NDJSON reader holds a multiple of its block size in memory while
+# parsing; larger blocks cost memory without reading any faster
+NDJSON_BLOCK_SIZE = 4 << 20
+
+# Records per table on the streamed (non-NDJSON) path
+RECORD_CHUNK = 20_000
+
+# Partial aggregates are merged once this many rows are pending
+MERGE_ROWS = 1_000_000
+
+# Fragment fallback when a field is missing
+MISSING = "NA"
+
+
+def _require_pyarrow():
+    # pyarrow is optional and only imported when a report is built, as in
+    # inventory_columnar
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.csv
+        import pyarrow.json
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError(
+            "Usage reports require pyarrow (pip install pyarrow)"
+        ) from e
+    return pyarrow
+
+
+# -------------------------------------------------
+# Reading exports
+# -------------------------------------------------
+
+def iter_json_records(path: str, chunk_size: int = 1 << 20) -> Iterator[Dict]:
+    # Streams the objects of a JSON array, a single object or concatenated /
+    # line-delimited objects without loading the whole file
+    decoder = json.JSONDecoder()
+    separators = " \t\r\n,[]"
+
+    with open(path, "r", encoding="utf-8-sig") as f:
+        buf = f.read(chunk_size)
+        pos = 0
+        eof = not buf
+
+        while True:
+            while pos < len(buf) and buf[pos] in separators:
+                pos += 1
+            if pos >= len(buf):
+                if eof:
+                    return
+                buf = f.read(chunk_size)
+                pos = 0
+                eof = not buf
+                continue
+
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Object cut at the chunk boundary
+                if eof:
+                    raise
+                more = f.read(chunk_size)
+                buf = buf[pos:] + more
+                pos = 0
+                eof = not more
+                continue
+
+            yield record
+            pos = end
+
+
+def _int(value) -> int | None:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _records_to_table(pa, records: List[Dict]):
+    # Typed columns straight from the dicts; numbers may be strings or ints
+    columns = {"timestamp": pa.array([r.get("timestamp") for r in records], pa.string())}
+    for name in DIMENSIONS:
+        columns[name] = pa.array(
+            [None if r.get(name) is None else str(r.get(name)) for r in records],
+            pa.string()
+        )
+    for name in TOKEN_COLUMNS:
+        columns[name] = pa.array([_int(r.get(name)) for r in records], pa.int64())
+    return pa.table(columns)
+
+
+def _batches_from_records(pa, path: str) -> Iterator:
+    records: List[Dict] = []
+    for record in iter_json_records(path):
+        records.append(record)
+        if len(records) >= RECORD_CHUNK:
+            yield _records_to_table(pa, records)
+            records = []
+    if records:
+        yield _records_to_table(pa, records)
+
+
+def _batches_from_ndjson(pa, path: str) -> Iterator:
+    # Arrow's native NDJSON reader; column types are inferred per block,
+    # normalize() reconciles them
+    reader = pa.json.open_json(
+        path,
+        read_options=pa.json.ReadOptions(block_size=NDJSON_BLOCK_SIZE, use_threads=False)
+    )
+    for batch in reader:
+        yield pa.Table.from_batches([batch])
+
+
+def read_batches(path: str, native: bool = True) -> Iterator:
+    # Raw tables of a few thousand records each, in file order
+    pa = _require_pyarrow()
+    if native and Path(path).suffix in (".ndjson", ".jsonl"):
+        return _batches_from_ndjson(pa, path)
+    return _batches_from_records(pa, path)
+
+
+# -------------------------------------------------
+# Normalization
+# -------------------------------------------------
+
+def parse_timestamps(pa, values):
+    pc = pa.compute
+    if pa.types.is_timestamp(values.type):
+        # Arrow's NDJSON reader already parsed ISO 8601 values
+        return pc.cast(values, pa.timestamp("s"), safe=False)
+    values = pc.cast(values, pa.string())
+    # Fractional seconds and zone suffixes are not needed for hourly buckets
+    trimmed = pc.utf8_slice_codeunits(values, 0, 19)
+
+    parsed = []
+    for fmt in TIMESTAMP_FORMATS:
+        source = values if "%p" in fmt else trimmed
+        parsed.append(pc.strptime(source, format=fmt, unit="s", error_is_null=True))
+    return pc.coalesce(*parsed)
+
+
+def normalize(pa, table, dimensions: List[str] = DIMENSIONS):
+    # Raw batch -> typed columns: strings for the requested dimensions,
+    # int64 tokens and an hour bucket. Columns missing from a batch get the
+    # fragment default.
+    pc = pa.compute
+    rows = table.num_rows
+    names = set(table.column_names)
+    columns = {}
+
+    for name in dimensions:
+        if name in names:
+            columns[name] = pc.fill_null(pc.cast(table[name], pa.string()), MISSING)
+        else:
+            columns[name] = pa.array([MISSING] * rows, pa.string())
+
+    for name in TOKEN_COLUMNS:
+        if name in names:
+            values = table[name]
+            if pa.types.is_string(values.type):
+                # "" would fail the cast; nulls become 0 below
+                values = pc.if_else(pc.equal(values, ""), None, values)
+            columns[name] = pc.fill_null(pc.cast(values, pa.int64()), 0)
+        else:
+            columns[name] = pa.array([0] * rows, pa.int64())
+
+    if "timestamp" in names:
+        columns["hour"] = pc.floor_temporal(parse_timestamps(pa, table["timestamp"]), unit="hour")
+    else:
+        columns["hour"] = pa.nulls(rows, pa.timestamp("s"))
+
+    return pa.table(columns)
+
+
+# -------------------------------------------------
+# Aggregation
+# -------------------------------------------------
+
+SUM_COLUMNS = ["requests"] + TOKEN_COLUMNS
+
+
+def _aggregate(pa, table, keys: List[str], counted: bool):
+    # counted: "requests" already holds partial counts to be summed
+    if counted:
+        aggregations = [(c, "sum") for c in SUM_COLUMNS]
+    else:
+        # Every row counts, including those whose timestamp did not parse
+        aggregations = [("hour", "count", pa.compute.CountOptions(mode="all"))]
+        aggregations += [(c, "sum") for c in TOKEN_COLUMNS]
+
+    result = table.group_by(keys).aggregate(aggregations)
+    renames = {f"{c}_sum": c for c in SUM_COLUMNS}
+    renames["hour_count"] = "requests"
+    return result.rename_columns([renames.get(c, c) for c in result.column_names])
+
+
+class UsageAggregator:
+    # Folds batches into partial group-by results and merges them as they
+    # pile up, so memory follows the number of groups, not records
+    def __init__(self, keys: List[str], batch_size: int = BATCH_SIZE, merge_rows: int = MERGE_ROWS):
+        self.pa = _require_pyarrow()
+        self.keys = keys
+        self.dimensions = [k for k in keys if k != "hour"]
+        self.batch_size = batch_size
+        self.merge_rows = merge_rows
+        self.pending = []
+        self.pending_records = 0
+        self.partials = []
+        self.pending_rows = 0
+        self.next_merge = merge_rows
+        self.records = 0
+        self.unparsed_timestamps = 0
+        # deploymentName -> requests without an active price, set by build_report
+        self.unpriced: Dict[str, int] = {}
+
+    def add(self, batch):
+        table = normalize(self.pa, batch, self.dimensions)
+        self.records += table.num_rows
+        self.unparsed_timestamps += table["hour"].null_count
+
+        self.pending.append(table)
+        self.pending_records += table.num_rows
+        if self.pending_records >= self.batch_size:
+            self._fold()
+
+    def _fold(self):
+        table = self.pa.concat_tables(self.pending)
+        self.pending = []
+        self.pending_records = 0
+
+        partial = _aggregate(self.pa, table, self.keys, counted=False)
+        self.partials.append(partial)
+        self.pending_rows += partial.num_rows
+        if self.pending_rows >= self.next_merge and len(self.partials) > 1:
+            self._merge()
+
+    def _merge(self):
+        combined = self.pa.concat_tables(self.partials)
+        merged = _aggregate(self.pa, combined, self.keys, counted=True)
+        self.partials = [merged]
+        self.pending_rows = merged.num_rows
+        # With many distinct groups, wait for the partials to double again
+        self.next_merge = max(self.merge_rows, 2 * merged.num_rows)
+
+    def checkpoint(self) -> tuple:
+        # Tables are immutable, so the lists can be shared
+        return (list(self.pending), self.pending_records, list(self.partials),
+                self.pending_rows, self.next_merge, self.records, self.unparsed_timestamps)
+
+    def restore(self, state: tuple):
+        (pending, self.pending_records, partials,
+         self.pending_rows, self.next_merge, self.records, self.unparsed_timestamps) = state
+        self.pending = list(pending)
+        self.partials = list(partials)
+
+    def result(self):
+        if self.pending:
+            self._fold()
+        if not self.partials:
+            return None
+        if len(self.partials) > 1:
+            self._merge()
+        return self.partials[0]
+
+
+# -------------------------------------------------
+# Pricing
+# -------------------------------------------------
+
+def load_pricing(path: Path | str = PRICING_FILE) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [p for p in json.load(f) if p.get("isActive", True)]
+
+
+def _pricing_table(pa, entries: List[Dict]):
+    return pa.table({
+        "deploymentName": pa.array([p["deploymentName"] for p in entries], pa.string()),
+        "region": pa.array([p.get("region", "ALL") for p in entries], pa.string()),
+        "costPerInputUnit": pa.array([float(p.get("CostPerInputUnit", 0)) for p in entries], pa.float64()),
+        "costPerOutputUnit": pa.array([float(p.get("CostPerOutputUnit", 0)) for p in entries], pa.float64()),
+        "costUnit": pa.array([float(p.get("CostUnit", 1)) or 1.0 for p in entries], pa.float64()),
+        "baseCost": pa.array([float(p.get("BaseCost", 0)) for p in entries], pa.float64()),
+        "method": pa.array([p.get("CalculationMethod", "tokens") for p in entries], pa.string()),
+        "currency": pa.array([p.get("Currency", "USD") for p in entries], pa.string())
+    })
+
+
+PRICE_COLUMNS = ["costPerInputUnit", "costPerOutputUnit", "costUnit", "baseCost", "method", "currency"]
+
+
+def _join_prices(pa, groups, entries: List[Dict]):
+    # Region-specific entries win over "ALL"; they need routeLocation in
+    # the groups to apply
+    pc = pa.compute
+    prices = _pricing_table(pa, entries)
+    is_all = pc.equal(prices["region"], "ALL")
+
+    joined = groups.join(
+        prices.filter(is_all).drop_columns(["region"]),
+        keys="deploymentName", join_type="left outer"
+    )
+    regional = prices.filter(pc.invert(is_all))
+    if regional.num_rows and "routeLocation" in groups.column_names:
+        regional = regional.rename_columns(
+            ["deploymentName", "routeLocation"] + [f"regional.{c}" for c in PRICE_COLUMNS]
+        )
+        joined = joined.join(regional, keys=["deploymentName", "routeLocation"], join_type="left outer")
+        for c in PRICE_COLUMNS:
+            index = joined.column_names.index(c)
+            joined = joined.set_column(index, c, pc.coalesce(joined[f"regional.{c}"], joined[c]))
+        joined = joined.drop_columns([f"regional.{c}" for c in PRICE_COLUMNS])
+    return joined
+
+
+def apply_pricing(pa, groups, entries: List[Dict]):
+    # Adds "cost" to per-deployment/hour groups:
+    #   tokens:     prompt/unit * input price + response/unit * output price
+    #   percentage: BaseCost * input price * the group's share of the
+    #               deployment's requests in that calendar month (see
+    #               AI-Search-Cost-Estimation-Logic.md)
+    pc = pa.compute
+    table = _join_prices(pa, groups, entries)
+
+    month = pc.floor_temporal(table["hour"], unit="month")
+    table = table.append_column("month", month)
+    monthly = table.group_by(["deploymentName", "month"]).aggregate([("requests", "sum")])
+    monthly = monthly.rename_columns(["deploymentName", "month", "monthRequests"])
+    table = table.join(monthly, keys=["deploymentName", "month"], join_type="left outer")
+
+    share = pc.divide(pc.cast(table["requests"], pa.float64()), pc.cast(table["monthRequests"], pa.float64()))
+    percentage_cost = pc.multiply(pc.multiply(table["baseCost"], table["costPerInputUnit"]), share)
+    is_percentage = pc.equal(table["method"], "percentage")
+
+    token_cost = pc.add(
+        pc.multiply(pc.divide(pc.cast(table["promptTokens"], pa.float64()), table["costUnit"]),
+                    table["costPerInputUnit"]),
+        pc.multiply(pc.divide(pc.cast(table["responseTokens"], pa.float64()), table["costUnit"]),
+                    table["costPerOutputUnit"])
+    )
+    cost = pc.if_else(is_percentage, percentage_cost, token_cost)
+    return table.append_column("cost", cost).drop_columns(["month", "monthRequests"])
+
+
+# -------------------------------------------------
+# Report
+# -------------------------------------------------
+
+def _internal_keys(group_by: List[str], entries: List[Dict]) -> List[str]:
+    # Pricing needs the deployment and month of every group (and the route
+    # location for region-specific prices); they are folded away afterwards
+    keys = list(group_by)
+    needed = ["deploymentName", "hour"]
+    if any(p.get("region", "ALL") != "ALL" for p in entries):
+        needed.append("routeLocation")
+    return keys + [k for k in needed if k not in keys]
+
+
+def aggregate_files(paths: List[str], keys: List[str], batch_size: int = BATCH_SIZE) -> UsageAggregator:
+    aggregator = UsageAggregator(keys, batch_size)
+    for path in paths:
+        state = aggregator.checkpoint()
+        try:
+            for batch in read_batches(path):
+                aggregator.add(batch)
+        except aggregator.pa.ArrowInvalid as e:
+            # Arrow infers one type per column and block; exports mixing
+            # numbers and strings in a field take the slower streamed path
+            print(f"{path}: {e}; re-reading with the streaming parser")
+            aggregator.restore(state)
+            for batch in read_batches(path, native=False):
+                aggregator.add(batch)
+    return aggregator
+
+
+def build_report(
+    paths: List[str],
+    group_by: List[str] = DEFAULT_GROUP_BY,
+    pricing: List[Dict] | None = None,
+    batch_size: int = BATCH_SIZE
+):
+    # Returns (table, aggregator): one row per group with requests, token
+    # sums and cost, most expensive first
+    pa = _require_pyarrow()
+    pc = pa.compute
+    entries = load_pricing() if pricing is None else pricing
+
+    unknown = [k for k in group_by if k not in DIMENSIONS and k != "hour"]
+    if unknown:
+        raise ValueError(f"Unknown group-by fields: {', '.join(unknown)}")
+
+    aggregator = aggregate_files(paths, _internal_keys(group_by, entries), batch_size)
+    groups = aggregator.result()
+    if groups is None:
+        return None, aggregator
+
+    priced = apply_pricing(pa, groups, entries)
+    unpriced = _unpriced(pa, priced)
+    aggregator.unpriced = dict(zip(
+        unpriced["deploymentName"].to_pylist(), unpriced["requests_sum"].to_pylist()
+    ))
+    priced = priced.set_column(
+        priced.column_names.index("cost"), "cost", pc.fill_null(priced["cost"], 0.0)
+    )
+
+    report = priced.group_by(group_by).aggregate(
+        [(c, "sum") for c in SUM_COLUMNS + ["cost"]]
+    )
+    report = report.rename_columns([c.removesuffix("_sum") for c in report.column_names])
+    report = report.select(group_by + SUM_COLUMNS + ["cost"])
+    return report.sort_by([("cost", "descending"), ("totalTokens", "descending")]), aggregator
+
+
+def _unpriced(pa, priced):
+    # Deployments without an active price entry, with their request counts
+    missing = priced.filter(pa.compute.is_null(priced["method"]))
+    return missing.group_by("deploymentName").aggregate([("requests", "sum")])
+
+
+def _cell(value) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:,.4f}"
+    if isinstance(value, int):
+        return f"{value:,}"
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d %H:00")
+    return str(value)
+
+
+def print_report(report, top: int = 50):
+    columns = report.column_names
+    rows = [[_cell(v) for v in row.values()] for row in report.slice(0, top).to_pylist()]
+    widths = [
+        max([len(c)] + [len(r[i]) for r in rows]) for i, c in enumerate(columns)
+    ]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)).rstrip())
+    for r in rows:
+        print("  ".join(v.ljust(w) for v, w in zip(r, widths)).rstrip())
+    if report.num_rows > top:
+        print(f"... {report.num_rows - top} more groups")
+
+
+def write_report(pa, report, path: str):
+    suffix = Path(path).suffix
+    if suffix == ".parquet":
+        pa.parquet.write_table(report, path)
+    elif suffix == ".csv":
+        pa.csv.write_csv(report, path)
+    elif suffix == ".json":
+        rows = report.to_pylist()
+        for row in rows:
+            if row.get("hour") is not None:
+                row["hour"] = row["hour"].isoformat() + "Z"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    else:
+        raise ValueError(f"{path}: output must be .csv, .json or .parquet")
+
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Aggregate AI Hub Gateway usage records into token and cost reports"
+    )
+    parser.add_argument(
+        "exports", nargs="+",
+        help="Usage record exports (.ndjson/.jsonl read natively, .json arrays streamed)"
+    )
+    parser.add_argument(
+        "--group-by", default=",".join(DEFAULT_GROUP_BY),
+        help=f"Comma-separated fields (default {','.join(DEFAULT_GROUP_BY)})"
+    )
+    parser.add_argument("--pricing", default=str(PRICING_FILE), help="model-pricing.json")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Records per batch")
+    parser.add_argument("--top", type=int, default=50, help="Groups to print")
+    parser.add_argument("--out", metavar="PATH", help="Also write the report (.csv, .json or .parquet)")
+    args = parser.parse_args()
+
+    pa = _require_pyarrow()
+    group_by = [k.strip() for k in args.group_by.split(",") if k.strip()]
+    unknown = [k for k in group_by if k not in DIMENSIONS and k != "hour"]
+    if unknown:
+        parser.error(f"unknown --group-by fields: {', '.join(unknown)} (choose from hour, {', '.join(DIMENSIONS)})")
+
+    started = time.perf_counter()
+    report, aggregator = build_report(
+        args.exports, group_by, load_pricing(args.pricing), args.batch_size
+    )
+    elapsed = time.perf_counter() - started
+
+    print(f"Read {aggregator.records:,} records from {len(args.exports)} file(s) in {elapsed:.1f}s")
+    if report is None:
+        return
+    if aggregator.unparsed_timestamps:
+        print(f"Warning: {aggregator.unparsed_timestamps:,} records had an unparsed timestamp (hour is empty)")
+    for deployment, requests in sorted(aggregator.unpriced.items()):
+        print(f"Warning: no active price for deployment {deployment!r} ({requests:,} requests, cost 0)")
+
+    print()
+    print_report(report, args.top)
+
+    if args.out:
+        write_report(pa, report, args.out)
+        print(f"\nReport written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,18 @@
-import subprocess
+import argparse
+import asyncio
+import hashlib
 import json
-import csv
-import shutil
+import os
+import time
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Tuple
 from pathlib import Path
-import json
-import subprocess
-import sys
+
+from aihub import command_runner
+from aihub import inventory
+from aihub import inventory_incremental
+from aihub import response_cache
+from aihub.azcli import get_latest_subscription_deployment, run_cmd, run_cmd_capture
 
 AZD_KEY_MAP = {
     "environmentName": "AZD_ENV_NAME",
@@ -16,23 +21,26 @@ AZD_KEY_MAP = {
     "resourceGroupName": "AZURE_RESOURCE_GROUP",
 }
 PARAMS_FILE = "parameters.json"
+AZD_DIR = ".azure"
 
-def load_parameters(params_file: str) -> dict:
-    with open(params_file, "r", encoding="utf-8") as f:
-        return json.load(f)["parameters"]
+INFRA_DIR = "infra"
 
+# Inputs whose content decides whether azd up has anything to do: bicep,
+# policy XML and the API specs pulled in through loadTextContent
+DEPLOYMENT_INPUT_PATTERNS = ["**/*.bicep", "**/*.xml", "**/*.yaml", "**/*.json"]
+DEPLOY_MANIFEST_FILE = "deploy-manifest.json"
 
-def setup_azd_environment():
-    params = load_parameters(PARAMS_FILE)
+# Write azd environment values straight into .azure/<env>/.env in one
+# pass (set AZD_BULK_ENV=0 to fall back to one `azd env set` per key)
+AZD_BULK_ENV = os.environ.get("AZD_BULK_ENV", "1") == "1"
 
-    AZD_ENV_NAME = params["environmentName"]["value"]
+def load_parameters(params_file: str) -> dict:
+    with open(params_file, "r", encoding="utf-8") as f:
+        return json.load(f)["parameters"]
 
-    print(f"Creating/selecting azd environment: {AZD_ENV_NAME}")
-    run_cmd(["azd", "env", "new", AZD_ENV_NAME, "--no-prompt"])
-    run_cmd(["azd", "env", "select", AZD_ENV_NAME])
-
-    print("Setting azd environment values:")
 
+def desired_azd_values(params: dict) -> Dict[str, str]:
+    values = {}
     for param_name, param_body in params.items():
         value = param_body.get("value")
 
@@ -40,284 +48,110 @@ def setup_azd_environment():
             continue
 
         azd_key = AZD_KEY_MAP.get(param_name, param_name.upper())
+        values[azd_key] = str(value)
 
-        print(f"  {azd_key} = {value}")
-        run_cmd(["azd", "env", "set", azd_key, str(value)])
+    return values
 
-def load_azd_env() -> Dict[str, str]:
-    result = run_cmd_capture(["azd", "env", "get-values"])
+# -------------------------------------------------
+# azd environment files (.azure/<env>/.env)
+# -------------------------------------------------
+def azd_env_file(env_name: str) -> Path:
+    return Path(AZD_DIR) / env_name / ".env"
 
-    if result.returncode != 0:
-        raise RuntimeError(
-            f"Failed to load azd environment values\n{result.stderr}"
-        )
+def azd_default_environment() -> str | None:
+    config = Path(AZD_DIR) / "config.json"
+    if not config.exists():
+        return None
+    try:
+        with open(config, "r", encoding="utf-8") as f:
+            return json.load(f).get("defaultEnvironment")
+    except (OSError, json.JSONDecodeError):
+        return None
 
+def parse_env_lines(lines: List[str]) -> Dict[str, str]:
     env = {}
-    for line in result.stdout.splitlines():
+    for line in lines:
         if "=" in line:
             k, v = line.split("=", 1)
             env[k.strip()] = v.strip().strip('"').strip("'")
-
     return env
 
-# -------------------------------------------------
-# Azure CLI discovery 
-# -------------------------------------------------
-def find_az_cli() -> str:
-    for exe in ("az", "az.cmd"):
-        path = shutil.which(exe)
-        if path:
-            return path
-    raise FileNotFoundError("Azure CLI not found on PATH")
-
+def format_env_value(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+def write_azd_env_values(env_name: str, changes: Dict[str, str]):
+    path = azd_env_file(env_name)
+    lines = path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+
+    # Update keys in place, keep everything else (including values azd
+    # itself wrote after provisioning), append new keys at the end
+    remaining = dict(changes)
+    out = []
+    for line in lines:
+        key = line.split("=", 1)[0].strip() if "=" in line else None
+        if key in remaining:
+            out.append(f"{key}={format_env_value(remaining.pop(key))}")
+        else:
+            out.append(line)
+    for key, value in remaining.items():
+        out.append(f"{key}={format_env_value(value)}")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(".env.tmp")
+    tmp.write_text("\n".join(out) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+def setup_azd_environment(bulk: bool = AZD_BULK_ENV):
+    params = load_parameters(PARAMS_FILE)
 
-AZ_CLI = find_az_cli()
+    AZD_ENV_NAME = params["environmentName"]["value"]
 
+    print(f"Creating/selecting azd environment: {AZD_ENV_NAME}")
+    if azd_env_file(AZD_ENV_NAME).exists():
+        print(f"  azd environment {AZD_ENV_NAME} already exists")
+    else:
+        run_cmd(["azd", "env", "new", AZD_ENV_NAME, "--no-prompt"])
 
-def run_cmd(cmd):
-    process = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        stdin=sys.stdin,
-        text=True,
-        bufsize=1
-    )
+    if azd_default_environment() != AZD_ENV_NAME:
+        run_cmd(["azd", "env", "select", AZD_ENV_NAME])
 
-    for line in process.stdout:
-        print(line, end="")
+    desired = desired_azd_values(params)
 
-    process.wait()
-    return process.returncode
+    if not bulk:
+        print("Setting azd environment values:")
+        for azd_key, value in desired.items():
+            print(f"  {azd_key} = {value}")
+            run_cmd(["azd", "env", "set", azd_key, value])
+        return
 
-def run_cmd_capture(cmd):
-    result = subprocess.run(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
+    # One read and one atomic write of the .env file instead of an
+    # `azd env set` process per parameter; unchanged keys are skipped
+    current = parse_env_lines(
+        azd_env_file(AZD_ENV_NAME).read_text(encoding="utf-8").splitlines()
+        if azd_env_file(AZD_ENV_NAME).exists() else []
     )
-    return result
+    changes = {k: v for k, v in desired.items() if current.get(k) != v}
 
-# -------------------------------------------------
-# Azure CLI helpers
-# -------------------------------------------------
-def run_az_json(cmd: List[str]) -> Any:
-    result = run_cmd_capture([AZ_CLI] + cmd + ["-o", "json"])
-
-    if result.returncode != 0:
-        raise RuntimeError(
-            f"Azure CLI command failed:\n"
-            f"Command: {' '.join(cmd)}\n"
-            f"STDERR:\n{result.stderr}"
-        )
+    if not changes:
+        print("azd environment values are up to date")
+        return
 
-    try:
-        return json.loads(result.stdout)
-    except json.JSONDecodeError as e:
-        raise RuntimeError(
-            f"Failed to parse JSON output from Azure CLI:\n"
-            f"STDOUT:\n{result.stdout}"
-        ) from e
-
-def run_az_raw(cmd: List[str]):
-    result = run_cmd([AZ_CLI] + cmd)
-    if result != 0:
-        print("STDERR:", result.stderr)
-        raise RuntimeError("Azure CLI command failed")
-
-# -------------------------------------------------
-# Inventory logic
-# -------------------------------------------------
-def set_subscription(subscription_id: str):
-    run_az_raw([
-        "account", "set",
-        "--subscription", subscription_id
-    ])
-
-
-def get_resources(resource_group: str) -> List[Dict]:
-    return run_az_json([
-        "resource", "list",
-        "--resource-group", resource_group
-    ])
-
-def get_private_endpoints(resource_id: str) -> List[Dict]:
-    return run_az_json([
-        "network", "private-endpoint", "list",
-        "--query",
-        f"[?properties.privateLinkServiceConnections[].properties.privateLinkServiceId && "
-        f"contains(join(',', properties.privateLinkServiceConnections[].properties.privateLinkServiceId), '{resource_id}')]"
-    ])
-
-def get_public_endpoint(resource: Dict) -> str | None:
-    rid = resource.get("id")
-    name = resource.get("name")
-    location = resource.get("location")
-
-    # Azure OpenAI accounts
-    if "openai" in name.lower():
-        return f"https://{name}.openai.azure.com"
-
-    # Standard Cognitive Services
-    try:
-        acct = run_az_json([
-            "cognitiveservices", "account", "show",
-            "--ids", rid
-        ])
-        return acct.get("properties", {}).get("endpoint")
-    except Exception:
-        return None
-    
-def get_cognitive_network_access(resource_id: str) -> Dict:
-    try:
-        acct = run_az_json([
-            "cognitiveservices", "account", "show",
-            "--ids", resource_id
-        ])
-        props = acct.get("properties", {})
-        return {
-            "publicNetworkAccess": props.get("publicNetworkAccess"),
-            "endpoint": props.get("endpoint")
-        }
-    except Exception:
-        return {
-            "publicNetworkAccess": None,
-            "endpoint": None
-        }
-
-def extract_network_info(resource: Dict) -> Dict:
-    network = {
-        "publicEndpoint": None,
-        "publicNetworkAccess": None,
-        "vnet": None,
-        "subnet": None,
-        "privateEndpoints": []
-    }
-
-    rid = resource.get("id")
-    name = resource.get("name", "").lower()
-    rtype = resource.get("type")
-
-    if not rid:
-        return network
-
-    # -------------------------------------------------
-    # Public endpoint + network access (Cognitive / OpenAI)
-    # -------------------------------------------------
-
-    if rtype == "Microsoft.CognitiveServices/accounts" and "openai" in name:
-        network["publicEndpoint"] = f"https://{resource['name']}.openai.azure.com"
-        network["publicNetworkAccess"] = "Enabled"  # logical endpoint exists
-
-    elif rtype == "Microsoft.CognitiveServices/accounts":
-        net_access = get_cognitive_network_access(rid)
-        network["publicNetworkAccess"] = net_access.get("publicNetworkAccess")
-
-        # Only set endpoint if public access is enabled
-        if net_access.get("publicNetworkAccess") == "Enabled":
-            network["publicEndpoint"] = net_access.get("endpoint")
-
-    # -------------------------------------------------
-    # Private endpoints (authoritative for VNET / subnet)
-    # -------------------------------------------------
-
-    for pe in get_private_endpoints(rid):
-        subnet_id = (
-            pe.get("properties", {})
-              .get("subnet", {})
-              .get("id")
-        )
+    print("Setting azd environment values:")
+    for azd_key, value in changes.items():
+        print(f"  {azd_key} = {value}")
 
-        network["privateEndpoints"].append({
-            "name": pe.get("name"),
-            "subnetId": subnet_id
-        })
-
-        if subnet_id:
-            parts = subnet_id.split("/")
-            if "virtualNetworks" in parts and "subnets" in parts:
-                network["vnet"] = parts[parts.index("virtualNetworks") + 1]
-                network["subnet"] = parts[parts.index("subnets") + 1]
-
-    return network
-
-def build_inventory(resource_group: str) -> List[Dict]:
-    inventory: List[Dict] = []
-
-    resources = get_resources(resource_group)
-    if not resources:
-        print(f"No resources found in resource group {resource_group}")
-        return inventory
-
-    for r in resources:
-        name = r.get("name", "<unknown>")
-        rtype = r.get("type", "<unknown>")
-        rid = r.get("id")
-
-        print(f"Processing resource: {name} ({rtype})")
-
-        # Default network structure (always present)
-        net = {
-            "publicEndpoint": None,
-            "vnet": None,
-            "subnet": None,
-            "privateEndpoints": []
-        }
-
-        # Network enrichment is best-effort, never fatal
-        try:
-            if rid:
-                net = extract_network_info(r)
-        except Exception as e:
-            print(
-                f"Warning: Failed to extract network info for "
-                f"{name} ({rtype}): {e}"
-            )
+    write_azd_env_values(AZD_ENV_NAME, changes)
 
-        inventory.append({
-            "name": name,
-            "type": rtype,
-            "resourceGroup": r.get("resourceGroup", resource_group),
-            "location": r.get("location"),
-            "id": rid,
-            "tags": r.get("tags", {}),
-            "publicEndpoint": net.get("publicEndpoint"),
-            "vnet": net.get("vnet"),
-            "subnet": net.get("subnet"),
-            "privateEndpoints": net.get("privateEndpoints", [])
-        })
-
-    return inventory
-
-def write_outputs(inventory: List[Dict], resource_group: str):
-    with open("resources_inventory.json", "w", encoding="utf-8") as f:
-        json.dump({
-            "generatedAt": datetime.utcnow().isoformat() + "Z",
-            "resourceGroup": resource_group,
-            "resources": inventory
-        }, f, indent=2)
+def load_azd_env() -> Dict[str, str]:
+    result = run_cmd_capture(["azd", "env", "get-values"])
 
-    with open("resources_inventory.csv", "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "name", "type", "resourceGroup", "location",
-                "publicEndpoint", "vnet", "subnet"
-            ]
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"Failed to load azd environment values\n{result.stderr}"
         )
-        writer.writeheader()
-        for r in inventory:
-            writer.writerow({
-                "name": r["name"],
-                "type": r["type"],
-                "resourceGroup": r["resourceGroup"],
-                "location": r["location"],
-                "publicEndpoint": r["publicEndpoint"],
-                "vnet": r["vnet"],
-                "subnet": r["subnet"]
-            })
 
+    return parse_env_lines(result.stdout.splitlines())
 
 def copy_parameters_to_infra(
     source_file: str = "parameters.json",
@@ -338,18 +172,59 @@ def copy_parameters_to_infra(
 
     print(f"Copied {source_file} -> {target_path}")
 
-def get_latest_subscription_deployment() -> str:
-    result = run_cmd([
-        AZ_CLI,
-        "deployment", "sub", "list",
-        "--query", "[0].name",
-        "-o", "tsv"
-    ])
-
-    if result != 0 or not result.stdout.strip():
-        raise RuntimeError("Unable to determine latest subscription deployment")
+# -------------------------------------------------
+# Deployment manifest (skip azd up when nothing changed)
+# -------------------------------------------------
+def deployment_input_files() -> List[Path]:
+    files = [Path(PARAMS_FILE)]
+    for pattern in DEPLOYMENT_INPUT_PATTERNS:
+        files.extend(Path(INFRA_DIR).glob(pattern))
+
+    # main.parameters.json is generated from parameters.json
+    generated = Path(INFRA_DIR) / "main.parameters.json"
+    return sorted({f for f in files if f.is_file() and f != generated})
+
+def hash_deployment_inputs() -> Dict[str, str]:
+    hashes = {}
+    for path in deployment_input_files():
+        hashes[path.as_posix()] = hashlib.sha256(path.read_bytes()).hexdigest()
+    return hashes
+
+def manifest_digest(file_hashes: Dict[str, str]) -> str:
+    h = hashlib.sha256()
+    for path, digest in sorted(file_hashes.items()):
+        h.update(f"{path}\0{digest}\n".encode("utf-8"))
+    return h.hexdigest()
+
+def deployment_manifest_path(env_name: str) -> Path:
+    return Path(AZD_DIR) / env_name / DEPLOY_MANIFEST_FILE
+
+def load_deployment_manifest(env_name: str) -> Dict:
+    path = deployment_manifest_path(env_name)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def save_deployment_manifest(env_name: str, file_hashes: Dict[str, str]):
+    path = deployment_manifest_path(env_name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "deployedAt": datetime.utcnow().isoformat() + "Z",
+            "digest": manifest_digest(file_hashes),
+            "files": file_hashes
+        }, f, indent=2)
 
-    return result.stdout.strip()
+def changed_deployment_inputs(previous: Dict, file_hashes: Dict[str, str]) -> List[str]:
+    old = previous.get("files", {})
+    return sorted(
+        p for p in set(old) | set(file_hashes)
+        if old.get(p) != file_hashes.get(p)
+    )
 
 def get_deployment_portal_link(subscription_id: str, deployment_name: str) -> str:
     return (
@@ -359,61 +234,179 @@ def get_deployment_portal_link(subscription_id: str, deployment_name: str) -> st
         f"{deployment_name}"
     )
 
+async def provision_with_monitor(
+    subscription_id: str,
+    env_name: str,
+    pipeline: inventory.PipelinedInventory | None = None
+) -> Tuple[command_runner.CommandResult, Dict | None]:
+    from aihub import deployment_monitor
+
+    # azd up runs on the command runner while the monitor follows the
+    # subscription deployment it creates through ARM
+    started = time.time()
+    provisioning = asyncio.create_task(
+        command_runner.run_async(["azd", "up"], tee=True, interactive=True)
+    )
+    monitor = asyncio.create_task(
+        deployment_monitor.watch_new_deployment(
+            subscription_id, env_name, started, provisioning,
+            on_module_succeeded=pipeline.on_module_succeeded if pipeline else None
+        )
+    )
+
+    result = await provisioning
+    try:
+        report = await monitor
+    except Exception as e:
+        print(f"Warning: Deployment monitor failed: {e}")
+        report = None
+
+    return result, report
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Deploy the AI Hub Gateway landing zone and inventory it")
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Run azd up even if parameters.json and infra/ are unchanged"
+    )
+    parser.add_argument(
+        "--verify", action="store_true",
+        help="When provisioning is skipped, run an 'azd provision --preview' what-if"
+    )
+    parser.add_argument(
+        "--no-monitor", action="store_true",
+        help="Do not follow deployment progress or write deployment_timing.json"
+    )
+    parser.add_argument(
+        "--pipeline", action="store_true",
+        help="Start inventory enrichment for each module as soon as it is provisioned"
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache")
+    return parser.parse_args(argv)
+
 def main():
     print("Starting Azure resource inventory collection")
 
+    args = parse_args()
+    if args.no_cache:
+        response_cache.set_enabled(False)
+
     setup_azd_environment()
 
     azd_env = load_azd_env()
     print("Loaded azd environment values", azd_env )
 
-    copy_parameters_to_infra()
-    
     subscription_id = azd_env.get("AZURE_SUBSCRIPTION_ID")
     if not subscription_id:
         raise RuntimeError("AZURE_SUBSCRIPTION_ID not found in azd environment")
 
-    print("Running azd up to create infrastructure and resource group")
+    env_name = load_parameters(PARAMS_FILE)["environmentName"]["value"]
 
-    result = run_cmd(["azd", "up"])
+    # Resolved up front so a pipelined inventory knows its target
+    resource_group = azd_env.get("AZURE_RESOURCE_GROUP") or azd_env.get("EXISTING_VNET_RG")
 
-    if result != 0:
-        print("azd up STDOUT:")
-        print(result)
-        raise RuntimeError("azd up failed")
+    file_hashes = hash_deployment_inputs()
+    previous_manifest = load_deployment_manifest(env_name)
+    unchanged = previous_manifest.get("digest") == manifest_digest(file_hashes)
 
-    print(f"Using resource group: {azd_env}")    
-    try:
-        deployment_name = get_latest_subscription_deployment()
-        portal_link = get_deployment_portal_link(subscription_id, deployment_name)
-
-        print("Monitor deployment here:")
-        print(portal_link)
-    except Exception as e:
-        print("Warning: Unable to determine deployment portal link")
-        print(str(e))
+    pipeline = None
 
-    if "AZURE_RESOURCE_GROUP" in azd_env:
-        resource_group = azd_env["AZURE_RESOURCE_GROUP"]
-    elif "EXISTING_VNET_RG" in azd_env:
-        resource_group = azd_env["EXISTING_VNET_RG"]
-    else:
-        raise RuntimeError(
-            "No resource group found in AZD environment "
-            "(expected AZURE_RESOURCE_GROUP or EXISTING_VNET_RG)"
-        )
-
-    print(f"Using subscription: {subscription_id}")
-    print(f"Using resource group: {resource_group}")
-    output_file = "azure_deep_inventory.xlsx"
-
-    set_subscription(subscription_id)
+    # The pipelined inventory's enrichment pool must not outlive a failed
+    # azd up or any other error before finish()
+    try:
+        if unchanged and not args.force:
+            print("parameters.json and infra/ unchanged since the last successful deployment, skipping azd up")
+
+            if args.verify:
+                print("Running what-if preview against the deployed environment")
+                if not run_cmd(["azd", "provision", "--preview"]).ok:
+                    raise RuntimeError("azd provision --preview failed")
+        else:
+            if previous_manifest:
+                print("Deployment inputs changed:")
+                for path in changed_deployment_inputs(previous_manifest, file_hashes):
+                    print(f"  {path}")
+
+            copy_parameters_to_infra()
+
+            print("Running azd up to create infrastructure and resource group")
+
+            # The monitor talks to ARM directly and needs its dependencies
+            if inventory.arm_available() and not args.no_monitor:
+                from aihub import deployment_monitor
+
+                if args.pipeline and resource_group:
+                    inventory.set_subscription(subscription_id)
+                    pipeline = inventory.PipelinedInventory(resource_group, subscription_id)
+
+                result, report = asyncio.run(
+                    provision_with_monitor(subscription_id, env_name, pipeline)
+                )
+                if report:
+                    deployment_monitor.print_timing_summary(report)
+                    deployment_monitor.write_timing_report(report)
+            else:
+                result = run_cmd(["azd", "up"])
+
+            if not result.ok:
+                print("azd up STDERR:")
+                print(result.stderr)
+                raise RuntimeError("azd up failed")
+
+            # Only a successful deployment is recorded
+            save_deployment_manifest(env_name, file_hashes)
+
+            # The inventory below must describe the deployed state, not
+            # lookups cached before azd up
+            if resource_group:
+                inventory.invalidate_cached(resource_group, subscription_id)
+
+            print(f"Using resource group: {azd_env}")
+            try:
+                deployment_name = get_latest_subscription_deployment()
+                portal_link = get_deployment_portal_link(subscription_id, deployment_name)
+
+                print("Monitor deployment here:")
+                print(portal_link)
+            except Exception as e:
+                print("Warning: Unable to determine deployment portal link")
+                print(str(e))
+
+        if not resource_group:
+            raise RuntimeError(
+                "No resource group found in AZD environment "
+                "(expected AZURE_RESOURCE_GROUP or EXISTING_VNET_RG)"
+            )
 
-    inventory = build_inventory(resource_group)
-    write_outputs(inventory, resource_group)
+        print(f"Using subscription: {subscription_id}")
+        print(f"Using resource group: {resource_group}")
+        output_file = "azure_deep_inventory.xlsx"
 
-    print("Inventory generation completed successfully")
+        inventory.set_subscription(subscription_id)
 
+        if pipeline:
+            records = pipeline.finish()
+            inventory.write_outputs(records, resource_group)
+        elif inventory.INVENTORY_INCREMENTAL and inventory.backend() != "graph":
+            records, plan = inventory.build_inventory_incremental(
+                resource_group, subscription_id=subscription_id
+            )
+            inventory_incremental.write_change_report(plan, resource_group)
+
+            if inventory_incremental.has_changes(plan):
+                inventory.write_outputs(records, resource_group)
+            else:
+                print("Inventory unchanged, keeping existing output files")
+        else:
+            records = inventory.build_inventory(resource_group)
+            inventory.write_outputs(records, resource_group)
+
+        response_cache.print_stats()
+        print("Inventory generation completed successfully")
+
+    finally:
+        if pipeline is not None:
+            pipeline.close()
 
 if __name__ == "__main__":
     main()
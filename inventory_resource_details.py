@@ -1,266 +1,17 @@
-import subprocess
+import argparse
 import json
-import csv
-import shutil
-from datetime import datetime
-from typing import Dict, List, Any
 from pathlib import Path
-import json
-
-
-def find_az_cli() -> str:
-    for exe in ("az", "az.cmd"):
-        path = shutil.which(exe)
-        if path:
-            return path
-    raise FileNotFoundError("Azure CLI not found on PATH")
-
-
-AZ_CLI = find_az_cli()
-
-
-import subprocess
-import sys
-
-def run_cmd(cmd):
-    process = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        stdin=sys.stdin,
-        text=True,
-        bufsize=1
-    )
-
-    for line in process.stdout:
-        print(line, end="")
-
-    process.wait()
-    return process.returncode
-
-def run_cmd_capture(cmd):
-    result = subprocess.run(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
-    return result
-
-def run_az_json(cmd: List[str]) -> Any:
-    result = run_cmd_capture([AZ_CLI] + cmd + ["-o", "json"])
-
-    if result.returncode != 0:
-        raise RuntimeError(
-            f"Azure CLI command failed:\n"
-            f"Command: {' '.join(cmd)}\n"
-            f"STDERR:\n{result.stderr}"
-        )
-
-    try:
-        return json.loads(result.stdout)
-    except json.JSONDecodeError as e:
-        raise RuntimeError(
-            f"Failed to parse JSON output from Azure CLI:\n"
-            f"STDOUT:\n{result.stdout}"
-        ) from e
-
-def run_az_raw(cmd: List[str]):
-    result = run_cmd([AZ_CLI] + cmd)
-    if result != 0:
-        print("STDERR:", result.stderr)
-        raise RuntimeError("Azure CLI command failed")
-
-def set_subscription(subscription_id: str):
-    run_az_raw([
-        "account", "set",
-        "--subscription", subscription_id
-    ])
-
-
-def get_resources(resource_group: str) -> List[Dict]:
-    return run_az_json([
-        "resource", "list",
-        "--resource-group", resource_group
-    ])
-
-def get_private_endpoints(resource_id: str) -> List[Dict]:
-    return run_az_json([
-        "network", "private-endpoint", "list",
-        "--query",
-        f"[?properties.privateLinkServiceConnections[].properties.privateLinkServiceId && "
-        f"contains(join(',', properties.privateLinkServiceConnections[].properties.privateLinkServiceId), '{resource_id}')]"
-    ])
-
-def get_public_endpoint(resource: Dict) -> str | None:
-    rid = resource.get("id")
-    name = resource.get("name")
-    location = resource.get("location")
-
-    # Azure OpenAI accounts
-    if "openai" in name.lower():
-        return f"https://{name}.openai.azure.com"
-
-    # Standard Cognitive Services
-    try:
-        acct = run_az_json([
-            "cognitiveservices", "account", "show",
-            "--ids", rid
-        ])
-        return acct.get("properties", {}).get("endpoint")
-    except Exception:
-        return None
-    
-def get_cognitive_network_access(resource_id: str) -> Dict:
-    try:
-        acct = run_az_json([
-            "cognitiveservices", "account", "show",
-            "--ids", resource_id
-        ])
-        props = acct.get("properties", {})
-        return {
-            "publicNetworkAccess": props.get("publicNetworkAccess"),
-            "endpoint": props.get("endpoint")
-        }
-    except Exception:
-        return {
-            "publicNetworkAccess": None,
-            "endpoint": None
-        }
-
-def extract_network_info(resource: Dict) -> Dict:
-    network = {
-        "publicEndpoint": None,
-        "publicNetworkAccess": None,
-        "vnet": None,
-        "subnet": None,
-        "privateEndpoints": []
-    }
-
-    rid = resource.get("id")
-    name = resource.get("name", "").lower()
-    rtype = resource.get("type")
-
-    if not rid:
-        return network
-
-    # -------------------------------------------------
-    # Public endpoint + network access (Cognitive / OpenAI)
-    # -------------------------------------------------
-
-    # Azure OpenAI accounts (endpoint always exists)
-    if rtype == "Microsoft.CognitiveServices/accounts" and "openai" in name:
-        network["publicEndpoint"] = f"https://{resource['name']}.openai.azure.com"
-        network["publicNetworkAccess"] = "Enabled"  # logical endpoint exists
+from typing import List
 
-    # Other Cognitive Services (Content Safety, Language, etc.)
-    elif rtype == "Microsoft.CognitiveServices/accounts":
-        net_access = get_cognitive_network_access(rid)
-        network["publicNetworkAccess"] = net_access.get("publicNetworkAccess")
+from aihub import fleet
+from aihub import inventory
+from aihub import inventory_columnar
+from aihub import inventory_incremental
+from aihub import inventory_stream
+from aihub import response_cache
+# Shared with deploy.py; kept importable from this script
+from aihub.azcli import get_latest_subscription_deployment  # noqa: F401
 
-        # Only set endpoint if public access is enabled
-        if net_access.get("publicNetworkAccess") == "Enabled":
-            network["publicEndpoint"] = net_access.get("endpoint")
-
-    # -------------------------------------------------
-    # Private endpoints (authoritative for VNET / subnet)
-    # -------------------------------------------------
-
-    for pe in get_private_endpoints(rid):
-        subnet_id = (
-            pe.get("properties", {})
-              .get("subnet", {})
-              .get("id")
-        )
-
-        network["privateEndpoints"].append({
-            "name": pe.get("name"),
-            "subnetId": subnet_id
-        })
-
-        if subnet_id:
-            parts = subnet_id.split("/")
-            if "virtualNetworks" in parts and "subnets" in parts:
-                network["vnet"] = parts[parts.index("virtualNetworks") + 1]
-                network["subnet"] = parts[parts.index("subnets") + 1]
-
-    return network
-
-def build_inventory(resource_group: str) -> List[Dict]:
-    inventory: List[Dict] = []
-
-    resources = get_resources(resource_group)
-    if not resources:
-        print(f"No resources found in resource group {resource_group}")
-        return inventory
-
-    for r in resources:
-        name = r.get("name", "<unknown>")
-        rtype = r.get("type", "<unknown>")
-        rid = r.get("id")
-
-        print(f"Processing resource: {name} ({rtype})")
-
-        # Default network structure (always present)
-        net = {
-            "publicEndpoint": None,
-            "vnet": None,
-            "subnet": None,
-            "privateEndpoints": []
-        }
-
-        # Network enrichment is best-effort, never fatal
-        try:
-            if rid:
-                net = extract_network_info(r)
-        except Exception as e:
-            print(
-                f"Warning: Failed to extract network info for "
-                f"{name} ({rtype}): {e}"
-            )
-
-        inventory.append({
-            "name": name,
-            "type": rtype,
-            "resourceGroup": r.get("resourceGroup", resource_group),
-            "location": r.get("location"),
-            "id": rid,
-            "tags": r.get("tags", {}),
-            "publicEndpoint": net.get("publicEndpoint"),
-            "vnet": net.get("vnet"),
-            "subnet": net.get("subnet"),
-            "privateEndpoints": net.get("privateEndpoints", [])
-        })
-
-    return inventory
-
-def write_outputs(inventory: List[Dict], resource_group: str):
-    with open("resources_inventory.json", "w", encoding="utf-8") as f:
-        json.dump({
-            "generatedAt": datetime.utcnow().isoformat() + "Z",
-            "resourceGroup": resource_group,
-            "resources": inventory
-        }, f, indent=2)
-
-    with open("resources_inventory.csv", "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "name", "type", "resourceGroup", "location",
-                "publicEndpoint", "vnet", "subnet"
-            ]
-        )
-        writer.writeheader()
-        for r in inventory:
-            writer.writerow({
-                "name": r["name"],
-                "type": r["type"],
-                "resourceGroup": r["resourceGroup"],
-                "location": r["location"],
-                "publicEndpoint": r["publicEndpoint"],
-                "vnet": r["vnet"],
-                "subnet": r["subnet"]
-            })
 
 def write_infra_parameters(azd_env: dict):
     params = {
@@ -306,33 +57,99 @@ def write_infra_parameters(azd_env: dict):
 
     print("Generated infra/main.parameters.json with all required parameters")
 
-def get_latest_subscription_deployment() -> str:
-    result = run_cmd([
-        AZ_CLI,
-        "deployment", "sub", "list",
-        "--query", "[0].name",
-        "-o", "tsv"
-    ])
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Azure resource inventory")
+    parser.add_argument(
+        "--scope", action="append", default=[],
+        metavar="SUBSCRIPTION_ID/RESOURCE_GROUP",
+        help="Inventory this resource group (repeatable, enables fleet mode)"
+    )
+    parser.add_argument(
+        "--tag", metavar="KEY[=VALUE]",
+        help="Inventory every resource group with this tag in --subscription"
+    )
+    parser.add_argument(
+        "--subscription", action="append", default=[],
+        help="Subscription searched by --tag (repeatable)"
+    )
+    parser.add_argument(
+        "--max-scopes", type=int, default=fleet.FLEET_MAX_SCOPES,
+        help="Resource groups inventoried concurrently in fleet mode"
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Write each resource to NDJSON/CSV as soon as it is enriched"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="With --stream, continue an interrupted run"
+    )
+    parser.add_argument(
+        "--columnar", metavar="DIR",
+        help="Also export the inventory as partitioned Parquet tables (needs pyarrow)"
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache")
+    return parser.parse_args(argv)
+
+def main_fleet(args: argparse.Namespace):
+    scopes = [fleet.parse_scope(s) for s in args.scope]
+    if args.tag:
+        if not args.subscription:
+            raise RuntimeError("--tag requires at least one --subscription")
+        scopes += fleet.resolve_tag_scopes(args.subscription, args.tag)
 
-    if result != 0 or not result.stdout.strip():
-        raise RuntimeError("Unable to determine latest subscription deployment")
+    if not scopes:
+        raise RuntimeError("No resource groups selected")
 
-    return result.stdout.strip()
+    print(f"Inventorying {len(scopes)} resource group(s)")
+    doc = fleet.build_fleet_inventory(scopes, args.max_scopes)
+    fleet.write_fleet_outputs(doc)
+
+    if args.columnar:
+        inventory_columnar.export_snapshot(fleet.FLEET_OUTPUT_FILE, args.columnar)
 
 def main():
     print("Starting Azure resource inventory collection")
 
+    args = parse_args()
+    if args.no_cache:
+        response_cache.set_enabled(False)
+
+    if args.scope or args.tag:
+        main_fleet(args)
+        response_cache.print_stats()
+        return
+
     subscription_id = "fcaf66af-3bf2-4d80-8301-271f841abb7c"    
     resource_group = "rg-hbai-lz1"      
     output_file = "azure_deep_inventory.xlsx"
 
     # 6. Set subscription context
-    set_subscription(subscription_id)
+    inventory.set_subscription(subscription_id)
 
     # 7. Inventory
-    inventory = build_inventory(resource_group)
-    write_outputs(inventory, resource_group)
+    snapshot = "resources_inventory.json"
+    if args.stream:
+        inventory.build_inventory_streaming(resource_group, resume=args.resume)
+        snapshot = inventory_stream.NDJSON_FILE
+    elif inventory.INVENTORY_INCREMENTAL and inventory.backend() != "graph":
+        records, plan = inventory.build_inventory_incremental(
+            resource_group, subscription_id=subscription_id
+        )
+        inventory_incremental.write_change_report(plan, resource_group)
+
+        if inventory_incremental.has_changes(plan):
+            inventory.write_outputs(records, resource_group)
+        else:
+            print("Inventory unchanged, keeping existing output files")
+    else:
+        records = inventory.build_inventory(resource_group)
+        inventory.write_outputs(records, resource_group)
+
+    if args.columnar:
+        inventory_columnar.export_snapshot(snapshot, args.columnar)
 
+    response_cache.print_stats()
     print("Inventory generation completed successfully")
 
 
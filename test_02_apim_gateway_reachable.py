@@ -1,4 +1,4 @@
-import requests
+import os
 from datetime import datetime
 from openpyxl import Workbook
 
@@ -6,76 +6,21 @@ from openpyxl import Workbook
 # CONFIGURATION
 # -------------------------------------------------
 
-APIM_GATEWAY_URL = "https://apim-oygf3jjanv6um.azure-api.net"
+# Overridable to run against the local mock (python -m aihub.mock_openai)
+APIM_GATEWAY_URL = os.environ.get("APIM_GATEWAY_URL", "https://apim-oygf3jjanv6um.azure-api.net")
 CHAT_PATH = "/openai/deployments/chat/chat/completions"
 API_VERSION = "2024-10-21"
 
 REPORT_FILE = "apim_chat_test_report.xlsx"
 
-import requests
-from azure.identity import DefaultAzureCredential
+from aihub.apim import ApimClient, get_gateway_session
+from aihub.gateway import chat_payload, chat_url, post_chat
 
 AZURE_SUBSCRIPTION_ID = "9ad6f7f4-b0d6-4d88-a6d1-3fc2257d5583"
 RESOURCE_GROUP = "rg-hbai-lz2"
 APIM_SERVICE_NAME = "apim-oygf3jjanv6um"
-MGMT_API_VERSION = "2022-08-01"
-
-def get_apim_subscription_key():
-    credential = DefaultAzureCredential()
-    token = credential.get_token(
-        "https://management.azure.com/.default"
-    ).token
-
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-
-    list_url = (
-        f"https://management.azure.com/subscriptions/{AZURE_SUBSCRIPTION_ID}"
-        f"/resourceGroups/{RESOURCE_GROUP}"
-        f"/providers/Microsoft.ApiManagement"
-        f"/service/{APIM_SERVICE_NAME}"
-        f"/subscriptions?api-version={MGMT_API_VERSION}"
-    )
-
-    r = requests.get(list_url, headers=headers)
-    r.raise_for_status()
-
-    subscriptions = r.json()["value"]
-
-    subscription_id = None
-    for sub in subscriptions:
-        name = sub.get("properties", {}).get("displayName")
-        if name and name.lower() == "built-in all-access subscription":
-            subscription_id = sub["name"]
-            break
-
-    if not subscription_id:
-        for sub in subscriptions:
-            if sub.get("properties", {}).get("state") == "active":
-                subscription_id = sub["name"]
-                break
-
-    if not subscription_id:
-        raise RuntimeError("No active APIM subscription found")
-
-    secret_url = (
-        f"https://management.azure.com/subscriptions/{AZURE_SUBSCRIPTION_ID}"
-        f"/resourceGroups/{RESOURCE_GROUP}"
-        f"/providers/Microsoft.ApiManagement"
-        f"/service/{APIM_SERVICE_NAME}"
-        f"/subscriptions/{subscription_id}/listSecrets"
-        f"?api-version={MGMT_API_VERSION}"
-    )
-
-    r = requests.post(secret_url, headers=headers)
-    r.raise_for_status()
 
-    return r.json()["primaryKey"]
-
-APIM_SUBSCRIPTION_KEY = get_apim_subscription_key()
-print("Using APIM Subscription Key:", APIM_SUBSCRIPTION_KEY)
+APIM = ApimClient(AZURE_SUBSCRIPTION_ID, RESOURCE_GROUP, APIM_SERVICE_NAME)
 
 # -------------------------------------------------
 # EXCEL SETUP
@@ -113,7 +58,7 @@ def log(step, expected, actual, status, evidence=""):
 
 def check_gateway():
     try:
-        r = requests.get(APIM_GATEWAY_URL, timeout=10)
+        r = get_gateway_session().get(APIM_GATEWAY_URL, timeout=10)
         log(
             "Gateway HTTPS reachable",
             "HTTPS reachable",
@@ -136,37 +81,24 @@ def check_gateway():
 # TEST 2: CHAT API (REAL CALL)
 # -------------------------------------------------
 
-def test_chat_api():
+def check_chat_api(subscription_key):
     step = "OpenAI Chat Completions API"
 
+    # Key in the query string; post_chat ALSO sends it as a header
+    # (belt + suspenders)
     url = (
-        f"{APIM_GATEWAY_URL}{CHAT_PATH}"
-        f"?api-version={API_VERSION}"
-        f"&subscription-key={APIM_SUBSCRIPTION_KEY}"
+        chat_url(APIM_GATEWAY_URL, CHAT_PATH, API_VERSION)
+        + f"&subscription-key={subscription_key}"
     )
 
-    headers = {
-        "Content-Type": "application/json",
-        # Header ALSO included (belt + suspenders)
-        "Ocp-Apim-Subscription-Key": APIM_SUBSCRIPTION_KEY
-    }
-
-    payload = {
-        "model": "chat",
-        "messages": [
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": "How to calculate the distance between Earth and Moon?"}
-        ],
-        "max_tokens": 150
-    }
-
-    response = requests.post(
-        url,
-        headers=headers,
-        json=payload,
-        timeout=30
+    payload = chat_payload(
+        "How to calculate the distance between Earth and Moon?",
+        max_tokens=150,
+        system="You are a helpful assistant."
     )
 
+    response = post_chat(get_gateway_session(), url, subscription_key, payload, timeout=30)
+
     if response.status_code != 200:
         log(
             step,
@@ -193,10 +125,14 @@ def test_chat_api():
 def main():
     ok = True
 
+    # A key from the environment skips the management-plane lookup
+    subscription_key = os.environ.get("APIM_SUBSCRIPTION_KEY") or APIM.get_subscription_key()
+    print("Using APIM Subscription Key:", subscription_key)
+
     if not check_gateway():
         ok = False
 
-    if not test_chat_api():
+    if not check_chat_api(subscription_key):
         ok = False
 
     wb.save(REPORT_FILE)
@@ -1,5 +1,10 @@
+import os
+
 import requests
-from azure.identity import DefaultAzureCredential
+
+from aihub.apim import ApimClient, get_gateway_session
+from aihub.apim_policy import has_backend_routing
+from aihub.gateway import chat_payload, chat_url, post_chat
 
 # =================================================
 # CONFIGURATION
@@ -10,143 +15,57 @@ RESOURCE_GROUP = "rg-hbai-lz2"
 APIM_NAME = "apim-oygf3jjanv6um"
 API_ID = "openai"
 
-APIM_GATEWAY_URL = "https://apim-oygf3jjanv6um.azure-api.net"
+# Overridable to run against the local mock (python -m aihub.mock_openai)
+APIM_GATEWAY_URL = os.environ.get("APIM_GATEWAY_URL", "https://apim-oygf3jjanv6um.azure-api.net")
 CHAT_PATH = "/openai/deployments/chat/chat/completions"
 
 MGMT_API_VERSION = "2022-08-01"
 OPENAI_API_VERSION = "2024-10-21"
 
 # =================================================
-# AUTH (Azure AD)
-# =================================================
-
-credential = DefaultAzureCredential()
-token = credential.get_token(
-    "https://management.azure.com/.default"
-).token
-
-MGMT_HEADERS = {
-    "Authorization": f"Bearer {token}",
-    "Content-Type": "application/json"
-}
-
-# =================================================
-# APIM SUBSCRIPTION KEY
+# MANAGEMENT CLIENT (token fetched on first call)
 # =================================================
 
-def get_apim_subscription_key():
-    list_url = (
-        f"https://management.azure.com/subscriptions/{AZURE_SUBSCRIPTION_ID}"
-        f"/resourceGroups/{RESOURCE_GROUP}"
-        f"/providers/Microsoft.ApiManagement"
-        f"/service/{APIM_NAME}"
-        f"/subscriptions?api-version={MGMT_API_VERSION}"
-    )
-
-    r = requests.get(list_url, headers=MGMT_HEADERS)
-    r.raise_for_status()
-
-    subs = r.json()["value"]
-
-    subscription_id = None
-
-    # Prefer Built-in all-access
-    for sub in subs:
-        name = sub.get("properties", {}).get("displayName")
-        if name and name.lower() == "built-in all-access subscription":
-            subscription_id = sub["name"]
-            break
-
-    # Fallback: any active
-    if not subscription_id:
-        for sub in subs:
-            if sub.get("properties", {}).get("state") == "active":
-                subscription_id = sub["name"]
-                break
-
-    if not subscription_id:
-        raise RuntimeError("No active APIM subscription found")
-
-    secret_url = (
-        f"https://management.azure.com/subscriptions/{AZURE_SUBSCRIPTION_ID}"
-        f"/resourceGroups/{RESOURCE_GROUP}"
-        f"/providers/Microsoft.ApiManagement"
-        f"/service/{APIM_NAME}"
-        f"/subscriptions/{subscription_id}/listSecrets"
-        f"?api-version={MGMT_API_VERSION}"
-    )
-
-    r = requests.post(secret_url, headers=MGMT_HEADERS)
-    r.raise_for_status()
-
-    return r.json()["primaryKey"]
+APIM = ApimClient(
+    AZURE_SUBSCRIPTION_ID, RESOURCE_GROUP, APIM_NAME, MGMT_API_VERSION
+)
 
 # =================================================
 # POLICY CHECKS (INFORMATIONAL)
 # =================================================
 
 def api_policy_info():
-    url = (
-        f"https://management.azure.com/subscriptions/{AZURE_SUBSCRIPTION_ID}"
-        f"/resourceGroups/{RESOURCE_GROUP}"
-        f"/providers/Microsoft.ApiManagement"
-        f"/service/{APIM_NAME}"
-        f"/apis/{API_ID}"
-        f"/policies/policy?api-version={MGMT_API_VERSION}"
-    )
+    try:
+        policy = APIM.get(f"/apis/{API_ID}/policies/policy")
+    except requests.HTTPError:
+        policy = None
 
-    r = requests.get(url, headers=MGMT_HEADERS)
-
-    if r.status_code != 200:
+    if not policy:
         return False, "No explicit API policy (OK for backend-attached APIs)"
 
-    xml = r.json()["properties"]["value"]
+    xml = policy["properties"]["value"]
 
-    if any(k in xml for k in ("set-backend", "set-backend-service", "forward-request")):
+    # Parsed with fragments resolved, so commented-out policies do not count
+    if has_backend_routing(xml):
         return True, "Explicit backend routing policy found"
 
     return False, "No explicit backend policy (backend likely attached at API config)"
 
 def list_operations():
-    url = (
-        f"https://management.azure.com/subscriptions/{AZURE_SUBSCRIPTION_ID}"
-        f"/resourceGroups/{RESOURCE_GROUP}"
-        f"/providers/Microsoft.ApiManagement"
-        f"/service/{APIM_NAME}"
-        f"/apis/{API_ID}"
-        f"/operations?api-version={MGMT_API_VERSION}"
-    )
-
-    r = requests.get(url, headers=MGMT_HEADERS)
-    r.raise_for_status()
-    return [op["name"] for op in r.json()["value"]]
+    return [op["name"] for op in APIM.list(f"/apis/{API_ID}/operations")]
 
 # =================================================
 # RUNTIME CHECKS
 # =================================================
 
 def gateway_runtime_ok():
-    r = requests.get(APIM_GATEWAY_URL, timeout=10)
+    r = get_gateway_session().get(APIM_GATEWAY_URL, timeout=10)
     return r.status_code in (200, 401, 403, 404)
 
 def backend_execution_verified(subscription_key):
-    url = (
-        f"{APIM_GATEWAY_URL}{CHAT_PATH}"
-        f"?api-version={OPENAI_API_VERSION}"
-    )
-
-    headers = {
-        "Content-Type": "application/json",
-        "Ocp-Apim-Subscription-Key": subscription_key
-    }
-
-    payload = {
-        "model": "chat",
-        "messages": [{"role": "user", "content": "Reply OK"}],
-        "max_tokens": 5
-    }
-
-    r = requests.post(url, headers=headers, json=payload, timeout=30)
+    # Same request the load generator (aihub.loadgen) sends
+    url = chat_url(APIM_GATEWAY_URL, CHAT_PATH, OPENAI_API_VERSION)
+    r = post_chat(get_gateway_session(), url, subscription_key, chat_payload(), timeout=30)
 
     if r.status_code != 200:
         return False, f"HTTP {r.status_code}"
@@ -163,11 +82,16 @@ def backend_execution_verified(subscription_key):
 # =================================================
 
 if __name__ == "__main__":
-    key = get_apim_subscription_key()
-    print("APIM subscription key acquired")
-
-    ok, msg = api_policy_info()
-    print("API policy:", msg)
+    # A key from the environment skips the management-plane lookups
+    key = os.environ.get("APIM_SUBSCRIPTION_KEY")
+    if key:
+        print("API policy: skipped (APIM_SUBSCRIPTION_KEY set)")
+    else:
+        key = APIM.get_subscription_key()
+        print("APIM subscription key acquired")
+
+        ok, msg = api_policy_info()
+        print("API policy:", msg)
 
     print("Gateway runtime:", gateway_runtime_ok())
 
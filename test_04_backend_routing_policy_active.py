@@ -1,5 +1,10 @@
-import requests
-from azure.identity import DefaultAzureCredential
+import argparse
+
+from aihub.apim import APIM_MAX_IN_FLIGHT, ApimClient
+from aihub.apim_policy import SECTIONS, PolicyParseError, has_backend_routing, summarize
+from aihub.apim_snapshot import (
+    crawl, load_snapshot, policy_text, snapshot_analyzer, write_snapshot
+)
 
 # -------------------------------------------------
 # CONFIG
@@ -11,78 +16,62 @@ APIM_NAME = "apim-oygf3jjanv6um"
 MGMT_API_VERSION = "2022-08-01"
 
 # -------------------------------------------------
-# AUTH
+# MANAGEMENT CLIENT (token fetched on first call)
 # -------------------------------------------------
 
-credential = DefaultAzureCredential()
-token = credential.get_token(
-    "https://management.azure.com/.default"
-).token
-
-HEADERS = {
-    "Authorization": f"Bearer {token}",
-    "Content-Type": "application/json"
-}
-
-BASE_URL = (
-    f"https://management.azure.com/subscriptions/{AZURE_SUBSCRIPTION_ID}"
-    f"/resourceGroups/{RESOURCE_GROUP}"
-    f"/providers/Microsoft.ApiManagement"
-    f"/service/{APIM_NAME}"
+APIM = ApimClient(
+    AZURE_SUBSCRIPTION_ID, RESOURCE_GROUP, APIM_NAME, MGMT_API_VERSION
 )
 
 # -------------------------------------------------
 # HELPERS
 # -------------------------------------------------
 
-def mgmt_get(path):
-    url = f"{BASE_URL}{path}?api-version={MGMT_API_VERSION}"
-    r = requests.get(url, headers=HEADERS)
-
-    if r.status_code == 404:
+def extract_backend_from_policy(policy, analyzer=None):
+    # Parsed with fragments resolved; comments and anything inherited
+    # through <base/> do not count as routing
+    return has_backend_routing(policy, analyzer)
+
+def pipeline_lines(pipeline, parent=None):
+    # With a parent, only sections that differ from it are listed
+    lines = []
+    for name in SECTIONS:
+        steps = summarize(pipeline[name])
+        if parent is not None and steps == summarize(parent[name]):
+            continue
+        lines.append(f"    {name}: {', '.join(steps) or '-'}")
+    return lines
+
+def effective_pipeline(analyzer, policy, label, parent=None, source="policy"):
+    # None when the policy does not parse; routing is then reported from
+    # the keyword check in has_backend_routing
+    try:
+        return analyzer.effective_pipeline(policy, parent=parent, source=source)
+    except PolicyParseError as e:
+        print(f"  Warning: {label} does not parse, using keyword check ({e})")
         return None
 
-    r.raise_for_status()
-
-    content_type = r.headers.get("Content-Type", "")
-
-    # Policies return XML, not JSON
-    if "application/json" in content_type:
-        return r.json()
-    else:
-        return r.text
-
-def extract_backend_from_policy(policy_xml: str):
-    keywords = [
-        "set-backend-service",
-        "set-backend",
-        "forward-request"
-    ]
-    return any(k in policy_xml for k in keywords)
-
-# -------------------------------------------------
-# LIST BACKENDS
-# -------------------------------------------------
-
-def list_backends():
-    data = mgmt_get("/backends")
-    return {b["name"]: b for b in data["value"]}
-
 # -------------------------------------------------
 # MAIN ROUTING INSPECTION
 # -------------------------------------------------
 
-def inspect_backend_routing():
-    backends = list_backends()
-    apis = mgmt_get("/apis")["value"]
+def inspect_backend_routing(max_in_flight=APIM_MAX_IN_FLIGHT, snapshot=None, pipelines=False):
+    # Reports from a saved snapshot when given, otherwise crawls live.
+    # pipelines adds the effective pipeline sections; without it the
+    # report keeps its original format.
+    if snapshot is None:
+        snapshot = crawl(APIM, max_in_flight)
+
+    analyzer = snapshot_analyzer(snapshot)
+    backends = snapshot["backends"]
 
     print("\n========== APIM BACKEND ROUTING REPORT ==========\n")
 
-    for api in apis:
+    for api in snapshot["apis"]:
         api_id = api["name"]
-        api_path = api["properties"]["path"]
-        service_url = api["properties"].get("serviceUrl")
-        backend_id = api["properties"].get("backendId")
+        api_path = api["path"]
+        service_url = api["serviceUrl"]
+        backend_id = api["backendId"]
 
         print(f"API: {api_id}")
         print(f"  Path: /{api_path}")
@@ -93,7 +82,7 @@ def inspect_backend_routing():
             print("  Routing type: API-attached backend")
             print(f"  Backend ID: {backend_id}")
             if backend:
-                print(f"  Backend URL: {backend['properties'].get('url')}")
+                print(f"  Backend URL: {backend.get('url')}")
         elif service_url:
             print("  Routing type: Direct serviceUrl")
             print(f"  Backend URL: {service_url}")
@@ -101,31 +90,65 @@ def inspect_backend_routing():
             print("  Routing type: Policy-based or inherited")
 
         # ---- API policy
-        api_policy = mgmt_get(f"/apis/{api_id}/policies/policy")
+        api_policy = policy_text(snapshot, api["policy"])
         if api_policy:
-            has_backend = extract_backend_from_policy(api_policy)
+            has_backend = extract_backend_from_policy(api_policy, analyzer)
             print(f"  API policy routing: {'YES' if has_backend else 'NO'}")
         else:
             print("  API policy routing: None")
 
+        # ---- Effective pipeline (fragments resolved)
+        api_pipeline = None
+        if pipelines:
+            api_pipeline = effective_pipeline(analyzer, api_policy, "API policy", source="api")
+        if api_pipeline is not None:
+            print("  Effective pipeline:")
+            print("\n".join(pipeline_lines(api_pipeline)))
+
         # ---- Operation-level routing
-        operations = mgmt_get(f"/apis/{api_id}/operations")["value"]
-        for op in operations:
+        for op in api["operations"]:
             op_id = op["name"]
-            op_policy = mgmt_get(
-                f"/apis/{api_id}/operations/{op_id}/policies/policy"
-            )
+            op_policy = policy_text(snapshot, op["policy"])
             if op_policy:
-                has_backend = extract_backend_from_policy(op_policy)
+                has_backend = extract_backend_from_policy(op_policy, analyzer)
                 if has_backend:
                     print(f"  Operation '{op_id}' routing: YES")
 
+                if not pipelines:
+                    continue
+                op_pipeline = effective_pipeline(
+                    analyzer, op_policy, f"Operation '{op_id}' policy",
+                    parent=api_pipeline, source="operation"
+                )
+                if op_pipeline is None:
+                    continue
+                lines = pipeline_lines(op_pipeline, parent=api_pipeline)
+                if lines:
+                    print(f"  Operation '{op_id}' effective pipeline:")
+                    print("\n".join(lines))
+
 
         print("-" * 60)
 
+    return snapshot
+
 # -------------------------------------------------
 # RUN
 # -------------------------------------------------
 
 if __name__ == "__main__":
-    inspect_backend_routing()
+    parser = argparse.ArgumentParser(description="APIM backend routing report")
+    parser.add_argument("--save", metavar="PATH", help="Also save the crawl as a snapshot")
+    parser.add_argument("--snapshot", metavar="PATH", help="Report from a saved snapshot instead of crawling")
+    parser.add_argument(
+        "--pipelines", action="store_true",
+        help="Also print effective policy pipelines (fragments resolved)"
+    )
+    args = parser.parse_args()
+
+    snapshot = load_snapshot(args.snapshot) if args.snapshot else None
+    snapshot = inspect_backend_routing(snapshot=snapshot, pipelines=args.pipelines)
+
+    if args.save:
+        write_snapshot(snapshot, args.save)
+        print(f"Snapshot saved to {args.save}")
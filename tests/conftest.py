@@ -0,0 +1,135 @@
+import asyncio
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import pytest
+
+# The aihub package lives at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+# -------------------------------------------------
+# Fake ARM server
+# -------------------------------------------------
+
+# handler(request) -> (status, headers, body); body is JSON-encoded
+Handler = Callable[[Dict], Tuple[int, Dict[str, str], object]]
+
+
+class FakeArmServer:
+    # Minimal management endpoint on localhost: routes are (method, path)
+    # -> handler, every request is recorded for assertions
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], Handler] = {}
+        self.requests: List[Dict] = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def route(self, method: str, path: str, handler: Handler):
+        self.routes[(method, path.lower())] = handler
+
+    def start(self) -> "FakeArmServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                path, _, query = self.path.partition("?")
+                params = dict(p.partition("=")[::2] for p in query.split("&") if p)
+                request = {
+                    "method": self.command,
+                    "path": path,
+                    "params": params,
+                    "headers": dict(self.headers)
+                }
+                server.requests.append(request)
+
+                handler = server.routes.get((self.command, path.lower()))
+                if handler is None:
+                    status, headers, body = 404, {}, {"error": {"code": "NotFound"}}
+                else:
+                    status, headers, body = handler(request)
+
+                data = json.dumps(body).encode("utf-8") if body is not None else b""
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = _serve
+            do_POST = _serve
+
+        return RequestHandler
+
+
+@pytest.fixture
+def fake_arm():
+    server = FakeArmServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache():
+    # Tests must see every request on the wire, never a cached answer
+    from aihub import response_cache
+    response_cache.set_enabled(False)
+    yield
+    response_cache.set_enabled(True)
+
+
+# -------------------------------------------------
+# Mock Azure OpenAI (aihub.mock_openai)
+# -------------------------------------------------
+
+@pytest.fixture
+def mock_server():
+    # Starts MockServers on an event loop in a background thread, so the
+    # code under test can own the test thread's loop; start(server)
+    # returns the backend URLs (server.gateway_url is set as well)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    servers = []
+
+    def start(server):
+        servers.append(server)
+        return asyncio.run_coroutine_threadsafe(server.start(port=0), loop).result(5)
+
+    yield start
+
+    async def shutdown():
+        # Keep-alive connection handlers are still waiting for the next
+        # request; they must finish before the loop is closed
+        for server in servers:
+            server.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
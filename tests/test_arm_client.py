@@ -0,0 +1,92 @@
+import time
+
+import pytest
+from azure.core.credentials import AccessToken
+
+from aihub import arm_client
+from aihub.arm_client import ArmClient
+
+RESOURCES_PATH = "/subscriptions/sub-1/resourceGroups/rg-1/resources"
+
+
+class CountingCredential:
+    # Hands out token-1, token-2, ... valid for `lifetime` seconds
+    def __init__(self, lifetime: int = 3600):
+        self.lifetime = lifetime
+        self.calls = 0
+
+    def get_token(self, *scopes):
+        self.calls += 1
+        return AccessToken(f"token-{self.calls}", int(time.time()) + self.lifetime)
+
+
+def ok(body):
+    return lambda request: (200, {}, body)
+
+
+def bearer(request) -> str:
+    return request["headers"].get("Authorization", "")
+
+
+def test_list_follows_next_link(fake_arm):
+    fake_arm.route("GET", RESOURCES_PATH, ok({
+        "value": [{"name": "a"}, {"name": "b"}],
+        "nextLink": f"{fake_arm.url}/page2?api-version=2021-04-01&$skiptoken=abc"
+    }))
+    fake_arm.route("GET", "/page2", ok({
+        "value": [{"name": "c"}],
+        "nextLink": f"{fake_arm.url}/page3?api-version=2021-04-01&$skiptoken=def"
+    }))
+    fake_arm.route("GET", "/page3", ok({"value": [{"name": "d"}]}))
+
+    client = ArmClient(fake_arm.url, credential=CountingCredential())
+    items = client.list(RESOURCES_PATH, "2021-04-01")
+
+    assert [i["name"] for i in items] == ["a", "b", "c", "d"]
+    assert [r["path"] for r in fake_arm.requests] == [RESOURCES_PATH, "/page2", "/page3"]
+    # nextLink is followed as given, continuation token included
+    assert fake_arm.requests[1]["params"] == {"api-version": "2021-04-01", "$skiptoken": "abc"}
+
+
+def test_retries_throttled_request_after_retry_after(fake_arm):
+    responses = iter([
+        (429, {"Retry-After": "0.3"}, {"error": {"code": "TooManyRequests"}}),
+        (200, {}, {"name": "acct"})
+    ])
+    fake_arm.route("GET", "/acct", lambda request: next(responses))
+
+    client = ArmClient(fake_arm.url, credential=CountingCredential())
+    started = time.monotonic()
+    result = client.get("/acct", "2023-05-01")
+
+    assert result == {"name": "acct"}
+    assert len(fake_arm.requests) == 2
+    assert time.monotonic() - started >= 0.3
+
+
+def test_gives_up_after_max_retries(fake_arm):
+    fake_arm.route("GET", "/acct", lambda request: (429, {"Retry-After": "0"}, None))
+
+    client = ArmClient(fake_arm.url, credential=CountingCredential())
+    with pytest.raises(RuntimeError, match="HTTP 429"):
+        client.request("GET", "/acct", "2023-05-01", max_retries=2)
+
+    assert len(fake_arm.requests) == 3
+
+
+def test_token_is_cached_then_refreshed_before_expiry(fake_arm, monkeypatch):
+    fake_arm.route("GET", "/acct", ok({"name": "acct"}))
+    credential = CountingCredential(lifetime=3600)
+    client = ArmClient(fake_arm.url, credential=credential)
+
+    client.get("/acct")
+    client.get("/acct")
+    assert credential.calls == 1
+    assert [bearer(r) for r in fake_arm.requests] == ["Bearer token-1", "Bearer token-1"]
+
+    # An hour-long token is now inside the refresh margin
+    monkeypatch.setattr(arm_client, "TOKEN_REFRESH_MARGIN", 3600 + 60)
+    client.get("/acct")
+
+    assert credential.calls == 2
+    assert bearer(fake_arm.requests[-1]) == "Bearer token-2"
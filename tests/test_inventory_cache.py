@@ -0,0 +1,84 @@
+import pytest
+
+from aihub import arm_client, inventory, response_cache
+from aihub.arm_client import ArmClient, StaticTokenCredential
+
+ACCOUNT_ID = (
+    "/subscriptions/sub-1/resourceGroups/rg-1/providers/"
+    "Microsoft.CognitiveServices/accounts/lang-1"
+)
+OTHER_ACCOUNT_ID = ACCOUNT_ID.replace("rg-1", "rg-2")
+
+
+@pytest.fixture
+def arm_cache(fake_arm, tmp_path, monkeypatch):
+    # ARM backend against the fake server, with a real on-disk cache
+    monkeypatch.setattr(inventory, "_backend", "arm")
+    monkeypatch.setattr(arm_client, "_client", ArmClient(fake_arm.url, StaticTokenCredential("t")))
+    monkeypatch.setattr(response_cache, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(response_cache, "_size_estimate", None)
+    response_cache.set_enabled(True)
+    return fake_arm
+
+
+def serve_account(fake_arm, resource_id: str, access: str):
+    fake_arm.route("GET", resource_id, lambda request: (200, {}, {
+        "properties": {"publicNetworkAccess": access, "endpoint": "https://lang-1.example"}
+    }))
+
+
+def test_cached_account_is_stale_across_a_deploy_until_invalidated(arm_cache):
+    serve_account(arm_cache, ACCOUNT_ID, "Enabled")
+    serve_account(arm_cache, OTHER_ACCOUNT_ID, "Enabled")
+    inventory.get_cognitive_network_access(ACCOUNT_ID)
+    inventory.get_cognitive_network_access(OTHER_ACCOUNT_ID)
+
+    # The deploy disables public access
+    serve_account(arm_cache, ACCOUNT_ID, "Disabled")
+    stale = inventory.get_cognitive_network_access(ACCOUNT_ID)
+    assert stale["publicNetworkAccess"] == "Enabled"
+    assert len(arm_cache.requests) == 2
+
+    assert inventory.invalidate_cached("rg-1", "sub-1") == 1
+
+    fresh = inventory.get_cognitive_network_access(ACCOUNT_ID)
+    assert fresh["publicNetworkAccess"] == "Disabled"
+    # Other resource groups keep their entries
+    inventory.get_cognitive_network_access(OTHER_ACCOUNT_ID)
+    assert len(arm_cache.requests) == 3
+
+
+def test_invalidation_covers_listings_of_the_deployed_scope(arm_cache):
+    resources_path = "/subscriptions/sub-1/resourceGroups/rg-1/resources"
+    endpoints_path = "/subscriptions/sub-1/providers/Microsoft.Network/privateEndpoints"
+    arm_cache.route("GET", resources_path, lambda request: (200, {}, {"value": []}))
+    arm_cache.route("GET", endpoints_path, lambda request: (200, {}, {"value": []}))
+
+    inventory.get_resources("rg-1", "sub-1")
+    inventory.list_private_endpoints("sub-1")
+    assert inventory.invalidate_cached("RG-1", "sub-1") == 2
+
+    inventory.get_resources("rg-1", "sub-1")
+    inventory.list_private_endpoints("sub-1")
+    assert len(arm_cache.requests) == 4
+
+
+def test_cli_keys_are_matched_by_resource_group_flag(monkeypatch):
+    keys = {
+        response_cache.normalize_key("az", "sub-1", "resource", "list", "--resource-group", "rg-1"): True,
+        response_cache.normalize_key("az", "sub-1", "resource", "list", "--resource-group", "rg-10"): False,
+        response_cache.normalize_key("az", "sub-1", "network", "private-endpoint", "list"): True,
+        response_cache.normalize_key(
+            "az", "network", "private-endpoint", "list", "--subscription", "sub-2"
+        ): False
+    }
+    seen = []
+
+    def record(match):
+        seen.extend(key for key in keys if match(key))
+        return len(seen)
+
+    monkeypatch.setattr(response_cache, "invalidate", record)
+    inventory.invalidate_cached("rg-1", "sub-1")
+
+    assert sorted(seen) == sorted(k for k, expected in keys.items() if expected)
@@ -0,0 +1,27 @@
+import json
+
+from aihub.inventory_stream import StreamingInventoryWriter
+
+
+def record(name: str) -> dict:
+    return {"id": f"/subscriptions/s/resourceGroups/rg/providers/T/x/{name}", "name": name}
+
+
+def test_resume_drops_resources_deleted_since_the_interrupted_run(tmp_path):
+    ndjson, csv = str(tmp_path / "inv.ndjson"), str(tmp_path / "inv.csv")
+
+    interrupted = StreamingInventoryWriter(ndjson, csv)
+    for name in ("a", "b", "c"):
+        interrupted.write(record(name))
+    interrupted.close(commit=False)
+
+    # "b" was deleted; ids are matched case-insensitively
+    current = [record("a")["id"].upper(), record("c")["id"], record("d")["id"]]
+    with StreamingInventoryWriter(ndjson, csv, resume=True, current_ids=current) as writer:
+        assert [writer.is_recorded(record(n)["id"]) for n in "abcd"] == [True, False, True, False]
+        writer.write(record("d"))
+
+    with open(ndjson, encoding="utf-8") as f:
+        assert [json.loads(line)["name"] for line in f] == ["a", "c", "d"]
+    with open(csv, encoding="utf-8") as f:
+        assert [line.split(",")[0] for line in f.read().splitlines()[1:]] == ["a", "c", "d"]
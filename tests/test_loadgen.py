@@ -0,0 +1,95 @@
+import pytest
+
+from aihub.gateway import chat_payload, chat_url
+from aihub.loadgen import LoadConfig, Sample, percentile, run_load, summarize
+from aihub.mock_openai import MockBackend, MockServer
+
+KEY = "test-key"
+
+
+@pytest.fixture
+def mock_backend(mock_server):
+    def start(backend: MockBackend) -> str:
+        url, = mock_server(MockServer([backend], keys=[KEY]))
+        return url
+    return start
+
+
+def load(url, key=KEY, **kwargs) -> LoadConfig:
+    return LoadConfig(chat_url(url), [("k", key)], chat_payload(), **kwargs)
+
+
+# -------------------------------------------------
+# Statistics
+# -------------------------------------------------
+
+def test_percentile_is_nearest_rank():
+    values = [i / 1000 for i in range(1, 101)]
+    assert [percentile(values, p) for p in (50, 95, 99, 100)] == [0.05, 0.095, 0.099, 0.1]
+    assert [percentile([1, 2, 3], p) for p in (50, 95, 99)] == [2, 3, 3]
+    assert percentile([7], 50) == 7
+    assert percentile([], 50) is None
+
+
+def test_summarize_counts_statuses_per_key():
+    samples = [
+        Sample("a", 200, 0.1, total_tokens=10),
+        Sample("a", 200, 0.3, total_tokens=10),
+        Sample("a", 429, 0.01),
+        Sample("b", 500, 0.02),
+        Sample("b", None, 1.0, error="ConnectTimeout")
+    ]
+    summary = summarize(samples, elapsed=2.0)
+    total = summary["total"]
+
+    assert (total["requests"], total["ok"], total["throttled"], total["errors"]) == (5, 2, 1, 2)
+    assert total["throttleRate"] == 0.2
+    assert total["throughput"] == 1.0
+    assert total["tokensPerSecond"] == 10.0
+    # Only successful requests contribute latencies
+    assert total["latency"] == {"p50": 0.1, "p95": 0.3, "p99": 0.3}
+    assert summary["keys"]["b"]["ok"] == 0
+    assert summary["statuses"] == {"200": 2, "429": 1, "500": 1, "ConnectTimeout": 1}
+
+
+# -------------------------------------------------
+# Against aihub.mock_openai
+# -------------------------------------------------
+
+def test_open_loop_sends_at_the_configured_rate(mock_backend):
+    pytest.importorskip("httpx")
+    url = mock_backend(MockBackend("b", latency="const:50"))
+
+    summary = run_load(load(url, rps=20, duration=1.0))
+    total = summary["total"]
+
+    assert summary["statuses"] == {"200": 20}
+    assert total["latency"]["p50"] >= 0.05
+    assert total["tokensPerSecond"] > 0
+
+
+def test_open_loop_counts_queueing_as_latency(mock_backend):
+    # One request in flight at a time against a 100 ms backend: arrivals
+    # fall behind the schedule, and the wait shows up in the tail
+    pytest.importorskip("httpx")
+    url = mock_backend(MockBackend("b", latency="const:100"))
+
+    summary = run_load(load(url, rps=20, duration=0.5, max_in_flight=1))
+    latency = summary["total"]["latency"]
+
+    assert summary["statuses"] == {"200": 10}
+    assert latency["p50"] >= 0.2
+    assert latency["p99"] >= 0.5
+
+
+def test_closed_loop_reports_throttling_and_rejected_keys(mock_backend):
+    pytest.importorskip("httpx")
+    url = mock_backend(MockBackend("b", latency="const:10", rpm=5))
+
+    summary = run_load(load(url, users=2, duration=0.5))
+    assert summary["total"]["ok"] == 5
+    assert summary["total"]["throttled"] == summary["total"]["requests"] - 5
+
+    rejected = run_load(load(url, key="wrong-key", users=1, duration=0.2))
+    assert set(rejected["statuses"]) == {"401"}
+    assert rejected["total"]["errors"] == rejected["total"]["requests"]
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+import requests
+
+from aihub.backend_routing import clusters_from_config
+from aihub.gateway import chat_payload, chat_url, post_chat
+from aihub.mock_openai import MockBackend, MockGateway, MockServer
+
+KEY = "test-key"
+
+
+@pytest.fixture
+def gateway(mock_server):
+    # start(backends, clusters=None) -> (gateway URL, MockGateway)
+    def start(backends, clusters=None):
+        gw = MockGateway(backends, clusters)
+        server = MockServer(backends, keys=[KEY], gateway=gw)
+        mock_server(server)
+        return server.gateway_url, gw
+    return start
+
+
+def chat(url: str, deployment: str = "chat") -> requests.Response:
+    path = f"/openai/deployments/{deployment}/chat/completions"
+    return post_chat(requests, chat_url(url, path), KEY, chat_payload(), timeout=5)
+
+
+def test_throttled_priority_1_spills_over_to_priority_2(gateway):
+    primary = MockBackend("primary", latency="const:5", throttle_rate=1.0, retry_after=1)
+    secondary = MockBackend("secondary", latency="const:5")
+    url, gw = gateway([primary, secondary])
+
+    responses = [chat(url) for _ in range(5)]
+
+    assert [r.status_code for r in responses] == [200] * 5
+    assert {r.headers["x-ms-backend"] for r in responses} == {"secondary"}
+    # Only the first request hit the primary; it then sat out its
+    # Retry-After window
+    assert primary.stats["requests"] == 1
+    assert gw.stats["retries"] == 1
+
+    time.sleep(1.1)
+    assert chat(url).headers["x-ms-backend"] == "secondary"
+    assert primary.stats["requests"] == 2
+
+
+def test_no_route_errors_once_every_backend_is_throttling(gateway):
+    backends = [
+        MockBackend(name, latency="const:5", throttle_rate=1.0, retry_after=30)
+        for name in ("a", "b")
+    ]
+    url, gw = gateway(backends)
+
+    # Both routes tried; the last backend's 429 is returned
+    first = chat(url)
+    assert first.status_code == 429
+    assert [b.stats["requests"] for b in backends] == [1, 1]
+
+    second = chat(url)
+    assert second.status_code == 503
+    assert second.reason == "Service Unavailable"
+    assert second.text == "No backends are currently available"
+    assert gw.stats["noRoute"] == 1
+
+
+def test_clusters_decide_priority_and_unknown_deployments(gateway):
+    backends = [MockBackend("east", latency="const:5"), MockBackend("west", latency="const:5")]
+    clusters = clusters_from_config({
+        "routes": [
+            {"name": "east", "backend-id": "east", "priority": 2},
+            {"name": "west", "backend-id": "west", "priority": 1}
+        ],
+        "clusters": {"chat": ["east", "west"]}
+    })
+    url, _ = gateway(backends, clusters)
+
+    assert chat(url).headers["x-ms-backend"] == "west"
+
+    missing = chat(url, "embedding")
+    assert missing.status_code == 400
+    assert missing.reason == "No routes"
+
+
+def test_routes_must_name_known_backends():
+    clusters = clusters_from_config({
+        "routes": [{"name": "x", "backend-id": "x", "priority": 1}],
+        "clusters": {"chat": ["x"]}
+    })
+    with pytest.raises(ValueError, match="unknown backends: x"):
+        MockGateway([MockBackend("a")], clusters)
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from aihub.gateway import chat_payload, chat_url
+from aihub.mock_openai import MockBackend, MockServer
+from aihub.stream_probe import DEPLOYMENT_PATH, iter_sse, probe_stream, summarize
+
+KEY = "test-key"
+
+
+class FakeLines:
+    def __init__(self, lines):
+        self.lines = lines
+
+    async def aiter_lines(self):
+        for line in self.lines:
+            yield line
+
+
+def events(lines):
+    async def collect():
+        return [data async for data in iter_sse(FakeLines(lines))]
+    return asyncio.run(collect())
+
+
+# -------------------------------------------------
+# SSE parsing
+# -------------------------------------------------
+
+def test_iter_sse_joins_multi_line_data():
+    assert events([
+        ": keep-alive comment",
+        "event: message",
+        "data: {\"a\":",
+        "data:  1}",
+        "",
+        "data: [DONE]",
+        ""
+    ]) == ["{\"a\":\n1}", "[DONE]"]
+
+
+def test_iter_sse_yields_trailing_event_without_blank_line():
+    assert events(["data: first", "", "", "data: last"]) == ["first", "last"]
+    assert events([]) == []
+
+
+# -------------------------------------------------
+# Against aihub.mock_openai
+# -------------------------------------------------
+
+def probe(mock_server, backend: MockBackend):
+    httpx = pytest.importorskip("httpx")
+    base, = mock_server(MockServer([backend], keys=[KEY]))
+    url = chat_url(base, DEPLOYMENT_PATH.format("chat"))
+    payload = chat_payload("Tell me a joke.", max_tokens=50)
+    payload["stream"] = True
+    payload["stream_options"] = {"include_usage": True}
+
+    async def run():
+        async with httpx.AsyncClient(timeout=5) as client:
+            return await probe_stream(client, url, "chat", KEY, payload)
+    return asyncio.run(run())
+
+
+def test_probe_stream_times_first_token_and_gaps(mock_server):
+    result = probe(mock_server, MockBackend("b", latency="const:50", token_ms=10, completion_tokens=5))
+
+    assert (result.status, result.error) == (200, None)
+    assert result.route == "chat@local"
+    assert result.ttft >= 0.05
+    # filter results, role, 5 content deltas, finish, usage
+    assert result.chunks == 9
+    assert len(result.gaps) == 4
+    assert all(gap >= 0.005 for gap in result.gaps)
+    assert result.completion_tokens == 5
+
+
+def test_stream_without_content_is_an_error(mock_server):
+    result = probe(mock_server, MockBackend("b", latency="const:5", completion_tokens=0))
+
+    assert result.status == 200
+    assert result.ttft is None
+    assert result.error == "no content"
+
+
+def test_every_stream_is_ok_throttled_or_an_error(mock_server):
+    results = [
+        probe(mock_server, MockBackend("ok", latency="const:5")),
+        probe(mock_server, MockBackend("empty", latency="const:5", completion_tokens=0)),
+        probe(mock_server, MockBackend("throttled", throttle_rate=1.0)),
+        probe(mock_server, MockBackend("failing", error_rate=1.0))
+    ]
+    assert [r.error for r in results] == [None, "no content", None, "HTTP 500"]
+
+    s = summarize(results)["chat@local"]
+    assert (s["streams"], s["ok"], s["throttled"], s["errors"]) == (4, 1, 1, 2)